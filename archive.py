@@ -0,0 +1,58 @@
+"""
+Raw dump archive
+
+Every detail page dump the scraper captures can be kept, zlib-compressed
+and stored under its SHA-256, so identical dumps are written once. The
+dump_index table maps each list item (its content-desc) to the dumps of
+its detail page, which is all reextract.py needs to rebuild the row with
+the current extractor.
+"""
+
+import hashlib
+import os
+import threading
+import zlib
+import config
+
+
+class DumpArchive:
+    def __init__(self, root=None):
+        self.root = root or config.ARCHIVE_DIR
+        self._known = set()  # Digests already on disk, saves a stat per dump
+        self._lock = threading.Lock()
+
+    def _path(self, digest):
+        return os.path.join(self.root, digest[:2], f"{digest}.xml.z")
+
+    def put(self, xml):
+        """Store a dump if it is new. Returns its digest."""
+        data = xml.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            if digest in self._known:
+                return digest
+            self._known.add(digest)
+
+        path = self._path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, 'wb') as f:
+                f.write(zlib.compress(data, config.ARCHIVE_COMPRESSION_LEVEL))
+            os.replace(tmp, path)
+        return digest
+
+    def get(self, digest):
+        with open(self._path(digest), 'rb') as f:
+            return zlib.decompress(f.read()).decode('utf-8')
+
+    def __contains__(self, digest):
+        return os.path.exists(self._path(digest))
+
+
+def join_digests(digests):
+    return ' '.join(digests)
+
+
+def split_digests(value):
+    return value.split() if value else []
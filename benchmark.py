@@ -0,0 +1,799 @@
+"""
+Offline benchmarks
+
+Runs the scraper against the replay device (see replay.py) on a simulated
+clock, so a 50k attendee run takes minutes of CPU instead of days of
+device time, and no emulator is needed.
+
+Usage:
+    python benchmark.py loop --sizes 100,1000,10000,50000
+    python benchmark.py parser
+    python benchmark.py export --rows 1000000
+    python benchmark.py query --rows 500000
+    python benchmark.py stats --rows 500000
+    python benchmark.py scale --sizes 100000,300000,1000000
+    python benchmark.py rules --pages 2000
+    python benchmark.py watchlist --sizes 1000,10000,50000 --targets 50
+    python benchmark.py jobs --events 6 --size 40 --devices 1,3
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+import tempfile
+import random
+import sqlite3
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import config
+import database
+import export
+import extractor
+import hierarchy
+import identity
+import metrics
+import scraper
+import waits
+import watchlist
+import replay
+import rules
+import scheduler
+import synthetic
+from archive import DumpArchive, split_digests
+from replay import (LatencyModel, ReplayDevice, ReplayStop, ScaledClock, SimClock, synthetic_attendees,
+                    load_recorded_attendee)
+
+# Modules whose `time` is swapped for the simulated clock during a run
+SIMULATED_MODULES = [scraper, extractor, waits, metrics, watchlist]
+
+SELECTOR_CALLS = ('exists', 'count', 'info', 'get_text')
+
+
+@contextmanager
+def simulated_time(clock):
+    saved = [(module, module.time) for module in SIMULATED_MODULES]
+    for module, _ in saved:
+        module.time = clock
+    try:
+        yield clock
+    finally:
+        for module, original in saved:
+            module.time = original
+
+
+@contextmanager
+def scratch_config(**overrides):
+    saved = {key: getattr(config, key) for key in overrides}
+    for key, value in overrides.items():
+        setattr(config, key, value)
+    try:
+        yield
+    finally:
+        for key, value in saved.items():
+            setattr(config, key, value)
+
+
+def run_loop_once(size, latency, seed=0, recorded=None):
+    attendees = synthetic_attendees(size, seed=seed)
+    if recorded:
+        attendees[0] = load_recorded_attendee(recorded)
+
+    clock = SimClock()
+    device = ReplayDevice(attendees, latency=latency, clock=clock)
+    waits.controller.reset()
+    metrics.registry.reset()
+
+    with tempfile.TemporaryDirectory() as tmp, \
+            scratch_config(DB_PATH=os.path.join(tmp, 'bench.db'), MAX_ATTENDEES=size, CAPTURE_ON_ERROR=False), \
+            simulated_time(clock):
+        database.init_db()
+        wall_start = time.perf_counter()
+        try:
+            saved = scraper.run_scraper(device)
+        except ReplayStop:
+            saved = database.get_attendee_count()
+        wall = time.perf_counter() - wall_start
+
+    rpcs = sum(device.calls.values())
+    per = max(saved, 1)
+    phases = {
+        'dump': device.call_time['dump_hierarchy'],
+        'click': device.call_time['click'],
+        'swipe': device.call_time['swipe'],
+        'press': device.call_time['press'],
+        'selector': sum(device.call_time[c] for c in SELECTOR_CALLS),
+        'sleep': clock.slept - sum(device.call_time.values()),
+    }
+    return {
+        'size': size,
+        'saved': saved,
+        'sim_seconds': clock.now,
+        'attendees_per_min': saved / (clock.now / 60) if clock.now else 0.0,
+        'rpcs_per_attendee': rpcs / per,
+        'calls_per_attendee': {call: n / per for call, n in sorted(device.calls.items())},
+        'phase_seconds_per_attendee': {phase: t / per for phase, t in phases.items()},
+        'detail_reopens': sum(n - 1 for n in device.opened.values() if n > 1),
+        'waits': waits.controller.stats(),
+        'metrics': metrics.registry.snapshot(),
+        'wall_seconds': wall,
+    }
+
+
+def print_loop_report(results):
+    print(f"{'size':>7} {'saved':>7} {'sim min':>9} {'att/min':>8} {'rpc/att':>8} "
+          f"{'dump':>6} {'click':>6} {'swipe':>6} {'press':>6} {'select':>6} {'sleep':>6} {'wall s':>7}")
+    for r in results:
+        p = r['phase_seconds_per_attendee']
+        print(f"{r['size']:>7} {r['saved']:>7} {r['sim_seconds'] / 60:>9.1f} "
+              f"{r['attendees_per_min']:>8.1f} {r['rpcs_per_attendee']:>8.1f} "
+              f"{p['dump']:>6.2f} {p['click']:>6.2f} {p['swipe']:>6.2f} {p['press']:>6.2f} "
+              f"{p['selector']:>6.2f} {p['sleep']:>6.2f} {r['wall_seconds']:>7.1f}")
+    print("(phase columns are simulated seconds per saved attendee)")
+    for r in results:
+        waited = ', '.join(f"{name} {s['p50']:.2f}/{s['p90']:.2f}"
+                           for name, s in sorted(r['waits'].items()) if s['p50'] is not None)
+        print(f"{r['size']:>7} waits p50/p90 s: {waited}")
+
+
+def cmd_loop(args):
+    latency = LatencyModel(json.loads(args.latency) if args.latency else None,
+                           jitter=args.jitter, seed=args.seed)
+    results = []
+    for size in args.sizes:
+        results.append(run_loop_once(size, latency, seed=args.seed, recorded=args.recorded))
+        print(f"size={size} done in {results[-1]['wall_seconds']:.1f}s wall", file=sys.stderr)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_loop_report(results)
+
+
+def _etree_texts(xml):
+    # The extractor's original path: full ElementTree, then walk every node
+    root = ET.fromstring(xml)
+    texts = []
+    for elem in root.iter():
+        if elem.get('class') == 'android.widget.TextView':
+            text = elem.get('text', '').strip()
+            if text:
+                texts.append(text)
+    return texts
+
+
+def _fast_texts(xml):
+    return hierarchy.texts(hierarchy.parse.__wrapped__(xml))  # Bypass the cache
+
+
+def _scaled_dump(xml, factor):
+    """Repeat the body of a dump `factor` times, like a long scrolled page."""
+    start = xml.index('<node', xml.index('<hierarchy'))
+    end = xml.rindex('</hierarchy>')
+    return xml[:start] + xml[start:end] * factor + xml[end:]
+
+
+def _time_per_call(func, arg, min_seconds=0.5):
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        func(arg)
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return elapsed / calls
+
+
+def cmd_parser(args):
+    with open(args.dump, encoding='utf-8') as f:
+        base = f.read()
+    cases = [(os.path.basename(args.dump), base), (f"{args.scale}x synthetic", _scaled_dump(base, args.scale))]
+
+    print(f"{'dump':>20} {'KB':>7} {'etree ms':>9} {'fast ms':>8} {'speedup':>8} {'texts':>6}")
+    for label, xml in cases:
+        # The fast parser drops systemui nodes, so compare against the app's texts
+        fast_texts = _fast_texts(xml)
+        app_texts = set(fast_texts)
+        if fast_texts != [t for t in _etree_texts(xml) if t in app_texts]:
+            print(f"{label}: MISMATCH between parsers", file=sys.stderr)
+        slow = _time_per_call(_etree_texts, xml)
+        fast = _time_per_call(_fast_texts, xml)
+        print(f"{label:>20} {len(xml) / 1024:>7.0f} {slow * 1000:>9.2f} {fast * 1000:>8.2f} "
+              f"{slow / fast:>7.1f}x {len(fast_texts):>6}")
+
+
+def synthetic_rows(count, seed=0):
+    """Yield attendee rows for database benchmarks (names made unique with a serial)."""
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    for i in range(count):
+        name = f"{rng.choice(replay.FIRST_NAMES)} {rng.choice(replay.LAST_NAMES)} {i}"
+        countries = rng.sample(replay.COUNTRIES, rng.choice([0, 1, 2, 2, 3, 5]))
+        yield (name, rng.choice(replay.ROLES), rng.choice(replay.COMPANIES),
+               rng.choice(replay.INDUSTRIES + [None]), rng.choice(replay.JOB_FUNCTIONS + [None]),
+               ', '.join(countries) or None, start + timedelta(seconds=i * 3))
+
+
+def fill_db(path, rows, seed=0):
+    """Create an attendee database at path with `rows` synthetic rows."""
+    with scratch_config(DB_PATH=path):
+        database.init_db()
+    conn = database._connect(path)
+    conn.executemany(database.INSERT_ATTENDEE_SQL, map(database.with_identity, synthetic_rows(rows, seed)))
+    conn.commit()
+    conn.close()
+
+
+def _measure(func):
+    """Run func twice: (result, seconds untraced, peak traced memory in bytes)."""
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    try:
+        func()
+        return result, seconds, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _fetchall_csv(db_path, path):
+    # The old way out: get_all_attendees() then write
+    with scratch_config(DB_PATH=db_path):
+        rows = database.get_all_attendees()
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else [])
+        writer.writeheader()
+        writer.writerows(rows)
+    return len(rows)
+
+
+def cmd_export(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'export.db')
+        start = time.perf_counter()
+        fill_db(db_path, args.rows, args.seed)
+        print(f"filled {args.rows} rows in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+        cases = [(fmt, {}) for fmt in args.formats]
+        cases.append(('csv', {'country': 'India', 'industry': 'FinTech'}))
+        print(f"{'format':>8} {'filter':>28} {'rows':>9} {'seconds':>8} {'rows/s':>9} {'peak MB':>8}")
+        for fmt, filters in cases:
+            out = os.path.join(tmp, f"out.{fmt}")
+            try:
+                rows, seconds, peak = _measure(lambda: export.export(out, fmt, db_path=db_path, **filters))
+            except RuntimeError as e:
+                print(f"{fmt:>8} skipped: {e}")
+                continue
+            label = ','.join(f"{k}={v}" for k, v in filters.items()) or '-'
+            print(f"{fmt:>8} {label:>28} {rows:>9} {seconds:>8.2f} {rows / seconds:>9.0f} {peak / 2**20:>8.1f}")
+
+        if args.baseline:
+            out = os.path.join(tmp, 'fetchall.csv')
+            rows, seconds, peak = _measure(lambda: _fetchall_csv(db_path, out))
+            print(f"{'fetchall':>8} {'-':>28} {rows:>9} {seconds:>8.2f} {rows / seconds:>9.0f} {peak / 2**20:>8.1f}")
+
+
+def _time_lookups(func, args_list):
+    """Per-call latencies (seconds) and total rows for func(*args) over args_list."""
+    latencies, rows = [], 0
+    for args in args_list:
+        start = time.perf_counter()
+        rows += len(func(*args))
+        latencies.append(time.perf_counter() - start)
+    return sorted(latencies), rows
+
+
+def _scan_query(sql):
+    # Pre-index equivalent: string match over every row
+    def run(value, limit, conn):
+        return conn.execute(sql, (value, limit)).fetchall()
+    return run
+
+
+def cmd_query(args):
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'query.db')
+        start = time.perf_counter()
+        fill_db(db_path, args.rows, args.seed)
+        print(f"filled {args.rows} rows (with indexes, links and FTS) in "
+              f"{time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+        names = [row[0] for row in synthetic_rows(args.rows, args.seed) if rng.random() < 0.001]
+        conn = sqlite3.connect(db_path)  # One reader, as an API server would keep
+        n = args.lookups
+        pick = lambda pool: [rng.choice(pool) for _ in range(n)]
+        cases = [
+            ('country', database.find_by_country, pick(replay.COUNTRIES)),
+            ('industry', database.find_by_industry, pick(replay.INDUSTRIES)),
+            ('job_function', database.find_by_job_function, pick(replay.JOB_FUNCTIONS)),
+            ('company', database.find_by_company, pick(replay.COMPANIES)),
+            ('fts name', database.search_attendees, [f'"{name}"' for name in pick(names)]),
+            ('fts word', database.search_attendees, pick(replay.LAST_NAMES)),
+            ('fts word fast', lambda q, limit, conn: database.search_attendees(q, limit, conn, ranked=False),
+             pick(replay.LAST_NAMES)),
+        ]
+        if args.baseline:
+            cases += [
+                ('scan country', _scan_query("SELECT * FROM attendees WHERE (', ' || operates_in || ',') "
+                                             "LIKE '%, ' || ? || ',%' LIMIT ?"), pick(replay.COUNTRIES)),
+                ('scan name', _scan_query("SELECT * FROM attendees WHERE name LIKE '%' || ? || '%' LIMIT ?"),
+                 pick(names)),
+            ]
+
+        print(f"{'lookup':>14} {'calls':>6} {'rows/call':>10} {'p50 ms':>8} {'p99 ms':>8} {'mean ms':>8}")
+        for label, func, values in cases:
+            if label.startswith('scan'):
+                values = values[:max(1, n // 20)]  # Full scans are slow
+            args_list = [(value, args.limit, conn) for value in values]
+            latencies, rows = _time_lookups(func, args_list)
+            calls = len(latencies)
+            print(f"{label:>14} {calls:>6} {rows / calls:>10.1f} {latencies[calls // 2] * 1000:>8.3f} "
+                  f"{latencies[min(calls - 1, calls * 99 // 100)] * 1000:>8.3f} "
+                  f"{sum(latencies) / calls * 1000:>8.3f}")
+        conn.close()
+
+
+def _insert_rate(db_path, rows, batch_size):
+    # Rows/s through executemany batches, as the store's writer thread commits them
+    conn = database._connect(db_path)
+    start = time.perf_counter()
+    for i in range(0, len(rows), batch_size):
+        conn.executemany(database.INSERT_ATTENDEE_SQL, map(database.with_identity, rows[i:i + batch_size]))
+        conn.commit()
+    seconds = time.perf_counter() - start
+    conn.close()
+    return len(rows) / seconds
+
+
+PROGRESS_SCAN = ['COUNT(*)'] + [f"COUNT(NULLIF({column}, ''))" for column in database.STAT_COLUMNS] + ['MAX(scraped_at)']
+
+
+def _scan_dashboard(conn, limit):
+    # What a dashboard poll cost before the aggregate tables: a recount of everything
+    counts = conn.execute(f"SELECT {', '.join(PROGRESS_SCAN)} FROM attendees").fetchone()
+    tops = [conn.execute(f"SELECT {column}, COUNT(*) FROM attendees WHERE {column} != '' GROUP BY {column} "
+                         "ORDER BY COUNT(*) DESC LIMIT ?", (limit,)).fetchall()
+            for column in database.STAT_COLUMNS]
+    tops.append(conn.execute("SELECT country_id, COUNT(*) FROM attendee_countries GROUP BY country_id "
+                             "ORDER BY COUNT(*) DESC LIMIT ?", (limit,)).fetchall())
+    return counts, tops
+
+
+def _dashboard(conn, limit):
+    return database.get_progress(conn), database.get_breakdowns(limit, conn)
+
+
+def cmd_stats(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'stats.db')
+        start = time.perf_counter()
+        fill_db(db_path, args.rows, args.seed)
+        print(f"filled {args.rows} rows in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+        conn = sqlite3.connect(db_path)
+        print(f"{'poll':>10} {'calls':>6} {'p50 ms':>8} {'p99 ms':>8}")
+        for label, func, calls in (('tables', _dashboard, args.polls), ('scan', _scan_dashboard, 5)):
+            latencies, _ = _time_lookups(lambda limit, conn: [func(conn, limit)], [(args.top, conn)] * calls)
+            print(f"{label:>10} {calls:>6} {latencies[calls // 2] * 1000:>8.3f} "
+                  f"{latencies[min(calls - 1, calls * 99 // 100)] * 1000:>8.3f}")
+        conn.close()
+
+        # Write cost of the triggers: the same inserts with and without them
+        extra = list(synthetic_rows(args.rows + args.inserts, args.seed + 1))[args.rows:]
+        half = len(extra) // 2
+        with_triggers = _insert_rate(db_path, extra[:half], config.DB_BATCH_SIZE)
+        conn = sqlite3.connect(db_path)
+        for (trigger,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' "
+                                       "AND name LIKE '%stats%'").fetchall():
+            conn.execute(f"DROP TRIGGER {trigger}")
+        conn.commit()
+        conn.close()
+        without = _insert_rate(db_path, extra[half:], config.DB_BATCH_SIZE)
+        print(f"inserts: {with_triggers:.0f} rows/s with the stats triggers, {without:.0f} without "
+              f"({1 - with_triggers / without:.0%} slower)")
+
+
+def _row(label, calls, seconds, peak=None, note=''):
+    peak = f"{peak / 2**20:>8.1f}" if peak is not None else f"{'-':>8}"
+    print(f"{label:>16} {calls:>8} {seconds / max(calls, 1) * 1e6:>9.1f} {seconds:>8.2f} {peak} {note}")
+
+
+def _bulk_insert(db_path, rows, batch_size):
+    # The store's writer path: INSERT OR IGNORE batches, so identity collisions are dropped
+    conn = database._connect(db_path)
+    sql = database.INSERT_ATTENDEE_SQL.replace('INSERT', 'INSERT OR IGNORE', 1)
+    batch = []
+    for row in rows:
+        batch.append(database.with_identity(row))
+        if len(batch) >= batch_size:
+            conn.executemany(sql, batch)
+            conn.commit()
+            batch = []
+    conn.executemany(sql, batch)
+    conn.commit()
+    conn.close()
+
+
+def _scale_extractor(pages, seed):
+    attendees = list(synthetic.generate_attendees(pages, seed))
+    details = [synthetic.detail_dumps(attendee) for attendee in attendees]
+    lists = list(synthetic.list_dumps(attendees))
+    fields = ('name', 'job_title', 'company', 'industry', 'job_function')
+    expected = [tuple(a[f] for f in fields) + (', '.join(a['operates_in']) or None,) for a in attendees]
+
+    print(f"extractor on {pages} synthetic pages ({sum(map(len, details))} detail dumps, "
+          f"{sum(len(xml) for dumps in details for xml in dumps) / sum(map(len, details)) / 1024:.0f} KB each)")
+    print(f"{'op':>16} {'calls':>8} {'us/call':>9} {'total s':>8} {'peak MB':>8}")
+    hierarchy.parse.cache_clear()
+    results, seconds, peak = _measure(lambda: [extractor.extract_from_dumps(dumps) for dumps in details])
+    wrong = sum(tuple(r[f] for f in fields + ('operates_in',)) != e for r, e in zip(results, expected))
+    _row('extract detail', pages, seconds, peak, f"({wrong} wrong)")
+    hierarchy.parse.cache_clear()
+    items, seconds, peak = _measure(lambda: [extractor.extract_list_items(xml) for xml in lists])
+    _row('extract list', len(lists), seconds, peak, f"({sum(map(len, items))} items)")
+
+
+def _scale_store(size, seed, lookups):
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'scale.db')
+        database.init_db(db_path)
+        descs, sample = [], []
+        probes = max(1, size // lookups)
+
+        def rows():
+            # Stream rows into the DB, keeping only content-descs (the clicked set) and a sample of attendees
+            for i, attendee in enumerate(synthetic.generate_attendees(size, seed)):
+                descs.append(replay.list_content_desc(attendee))
+                if i % probes == 0:
+                    sample.append(attendee)
+                yield synthetic.attendee_row(attendee, datetime(2025, 1, 1) + timedelta(seconds=i * 3))
+
+        start = time.perf_counter()
+        _bulk_insert(db_path, rows(), config.DB_BATCH_SIZE)
+        fill = time.perf_counter() - start
+        stored = database.get_attendee_count(db_path)
+        collisions = synthetic.collision_stats(a['name'] for a in synthetic.generate_attendees(size, seed))
+        print(f"\n{size} attendees: {collisions['distinct']} distinct names, {collisions['sharing']} "
+              f"({collisions['sharing'] / size:.1%}) share theirs, largest group {collisions['largest']}")
+        print(f"{'op':>16} {'calls':>8} {'us/call':>9} {'total s':>8} {'peak MB':>8}")
+        _row('insert', size, fill, None, f"({size - stored} identity collisions dropped, "
+                                         f"{os.path.getsize(db_path) / 2**20:.0f} MB on disk)")
+
+        names = [attendee['name'] for attendee in sample]
+        keys = [identity.attendee_identity(a['name'], a['job_title'], a['company']) for a in sample]
+        with scratch_config(DB_PATH=db_path):
+            calls = names[:max(1, lookups // 10)]
+            latencies, _ = _time_lookups(lambda name: [database.attendee_exists(name)], [(n,) for n in calls])
+            _row('attendee_exists', len(calls), sum(latencies))
+
+            store, seconds, peak = _measure(lambda: database.AttendeeStore(db_path))
+            _row('open store', 1, seconds, peak, f"({store.known_count} keys in memory)")
+            misses = [identity.attendee_identity(f"{name} {i}") for i, name in enumerate(names)]
+            _, seconds, _ = _measure(lambda: [store.exists(key) for key in keys + misses])
+            _row('store.exists', 2 * len(keys), seconds)
+
+            extra = [synthetic.attendee_row(dict(a, name=f"{a['name']} {size + i}"), datetime.now())
+                     for i, a in enumerate(synthetic.generate_attendees(lookups, seed + 1))]
+            start = time.perf_counter()
+            for a in sample:
+                store.save(a['name'], a['job_title'], a['company'], None, None, None)
+            for row in extra:
+                store.save(*row[:6])
+            store.flush()
+            _row('save', len(names) + len(extra), time.perf_counter() - start, None,
+                 f"({store.saved} new, {len(names) + len(extra) - store.saved} already stored)")
+            store.close()
+
+        del descs[size // 2:]  # A run interrupted halfway
+        # What the set holds on to includes its members, so count them rather than trace the set alone
+        texts, seconds, _ = _measure(lambda: set(descs))
+        held = sys.getsizeof(texts) + sum(map(sys.getsizeof, texts))
+        _row('clicked (text)', len(texts), seconds, held, "(content-desc strings, before identity keys)")
+        del texts
+        clicked, seconds, _ = _measure(lambda: set(map(identity.list_identity, descs)))
+        held = sys.getsizeof(clicked) + sum(map(sys.getsizeof, clicked))
+        _row('clicked set', len(clicked), seconds, held, "(build with hashing, keys included)")
+        probe = [identity.list_identity(desc) for desc in rng.sample(descs, min(len(descs), lookups))]
+        _, seconds, _ = _measure(lambda: [key in clicked for key in probe])
+        _row('clicked lookup', len(probe), seconds)
+
+        conn = sqlite3.connect(db_path)
+        conn.executemany(database.MARK_CLICKED_SQL, ((key,) for key in clicked))
+        conn.commit()
+        conn.close()
+        checkpoint, seconds, peak = _measure(lambda: database.load_checkpoint(db_path))
+        _row('load_checkpoint', 1, seconds, peak, f"({len(checkpoint['clicked'])} clicked)")
+
+
+def cmd_scale(args):
+    _scale_extractor(args.pages, args.seed)
+    for size in args.sizes:
+        _scale_store(size, args.seed, args.lookups)
+
+
+def _legacy_parse_detail_texts(all_texts):
+    # The hand-written parser the rules engine replaced, kept as the regression reference
+    data = dict.fromkeys(database.ATTENDEE_FIELDS)
+    skip_texts = ['Introduction', 'Interests', 'Chat', 'Suggest meeting',
+                  'Navigate up', 'Operates in', 'Industry', 'Job Function']
+
+    name_index = None
+    for i, text in enumerate(all_texts):
+        if (text not in skip_texts and len(text) > 5 and 2 <= len(text.split()) <= 4 and
+                all(c.isalpha() or c.isspace() for c in text)):
+            data['name'] = text
+            name_index = i
+            break
+    if name_index is not None:
+        for offset, field in ((1, 'job_title'), (2, 'company')):
+            if name_index + offset < len(all_texts) and all_texts[name_index + offset] not in skip_texts:
+                data[field] = all_texts[name_index + offset]
+
+    for i, text in enumerate(all_texts):
+        if text == config.FIELD_LABEL_INDUSTRY and i + 1 < len(all_texts):
+            if all_texts[i + 1] not in skip_texts:
+                data['industry'] = all_texts[i + 1]
+        elif text == config.FIELD_LABEL_JOB_FUNCTION and i + 1 < len(all_texts):
+            if all_texts[i + 1] not in skip_texts:
+                data['job_function'] = all_texts[i + 1]
+        elif text == config.FIELD_LABEL_OPERATES_IN:
+            countries = []
+            for next_text in all_texts[i + 1:]:
+                if next_text in [config.FIELD_LABEL_INDUSTRY, config.FIELD_LABEL_JOB_FUNCTION]:
+                    break
+                if (next_text not in skip_texts and len(next_text) > 2 and
+                        all(c.isalpha() or c.isspace() for c in next_text)):
+                    countries.append(next_text)
+                if len(countries) >= 5:
+                    break
+            if countries:
+                data['operates_in'] = ', '.join(countries)
+    return data
+
+
+def _synthetic_detail_case(attendee):
+    # Top, middle and bottom of the page, like capture_detail_page's worst case
+    bottom = replay._detail_max_scroll(attendee)
+    dumps = [replay.render_detail_page(attendee, scroll) for scroll in (0, bottom // 2, bottom)]
+    expected = {field: attendee.get(field) or None for field in database.ATTENDEE_FIELDS}
+    expected['operates_in'] = ', '.join(attendee['operates_in']) or None
+    return extractor.detail_texts(dumps), expected
+
+
+def _archived_detail_cases(limit):
+    archive = DumpArchive(config.ARCHIVE_DIR)
+    for _, _, digests in database.get_dump_index()[:limit]:
+        try:
+            yield extractor.detail_texts([archive.get(digest) for digest in split_digests(digests)]), None
+        except OSError:
+            continue
+
+
+def cmd_rules(args):
+    cases = []
+    if args.dump:
+        with open(args.dump, encoding='utf-8') as f:
+            cases.append(('recorded', extractor.detail_texts([f.read()]), None))
+    cases += [('synthetic', *_synthetic_detail_case(attendee))
+              for attendee in synthetic_attendees(args.pages, args.seed)]
+    if args.archived:
+        cases += [('archived', texts, expected) for texts, expected in _archived_detail_cases(args.archived)]
+
+    engine = rules.compile_rules()
+    failures, legacy_failures = {}, {}
+    for source, texts, expected in cases:
+        # Without ground truth the legacy parser is the reference
+        legacy_data = _legacy_parse_detail_texts(texts)
+        reference = expected or legacy_data
+        data = engine.apply(texts)
+        if data != reference:
+            failures[source] = failures.get(source, 0) + 1
+            if args.verbose:
+                print(f"{source}: {data} != {reference}", file=sys.stderr)
+        if legacy_data != reference:
+            legacy_failures[source] = legacy_failures.get(source, 0) + 1
+
+    print(f"{'source':>10} {'pages':>7} {'mismatches':>11} {'legacy':>7}")
+    for source in dict.fromkeys(source for source, _, _ in cases):
+        pages = sum(1 for case in cases if case[0] == source)
+        print(f"{source:>10} {pages:>7} {failures.get(source, 0):>11} {legacy_failures.get(source, 0):>7}")
+
+    corpus = [texts for _, texts, _ in cases]
+    run = lambda parse: lambda pages: [parse(texts) for texts in pages]
+    compile_time = _time_per_call(lambda _: rules.compile_rules(), None)
+    legacy = _time_per_call(run(_legacy_parse_detail_texts), corpus) / len(corpus)
+    compiled = _time_per_call(run(engine.apply), corpus) / len(corpus)
+    print(f"\nlegacy parser {legacy * 1e6:.1f} us/page, rules engine {compiled * 1e6:.1f} us/page "
+          f"({legacy / compiled:.1f}x), compile once {compile_time * 1e6:.0f} us")
+    if failures:
+        sys.exit(1)
+
+
+def run_watchlist_once(size, targets, latency, seed=0):
+    attendees = synthetic_attendees(size, seed=seed)
+    rng = random.Random(seed)
+    names = [attendee['name'] for attendee in rng.sample(attendees, min(targets, size))]
+    # A few targets that are not at the event
+    queries = names + [f"Nobody {i}" for i in range(max(1, targets // 10))]
+
+    clock = SimClock()
+    device = ReplayDevice(attendees, latency=latency, clock=clock)
+    waits.controller.reset()
+    metrics.registry.reset()
+    with tempfile.TemporaryDirectory() as tmp, \
+            scratch_config(DB_PATH=os.path.join(tmp, 'bench.db'), WATCHLIST_REPORT=None, CAPTURE_ON_ERROR=False), \
+            simulated_time(clock):
+        database.init_db()
+        results = watchlist.run_watchlist(device, queries)
+        saved = database.get_attendee_count()
+
+    found = {r['target'] for r in results if r['matches']}
+    return {
+        'size': size,
+        'targets': len(queries),
+        'found': len(found),
+        'expected_found': len(names),
+        'saved': saved,
+        'sim_seconds': clock.now,
+        'seconds_per_target': clock.now / len(queries),
+        'rpcs_per_target': sum(device.calls.values()) / len(queries),
+        'detail_opens': sum(device.opened.values()),
+    }
+
+
+def cmd_watchlist(args):
+    latency = LatencyModel(json.loads(args.latency) if args.latency else None,
+                           jitter=args.jitter, seed=args.seed)
+    print(f"{'event':>7} {'targets':>8} {'found':>6} {'saved':>6} {'opens':>6} {'sim min':>8} "
+          f"{'s/target':>9} {'rpc/target':>11}")
+    for size in args.sizes:
+        r = run_watchlist_once(size, args.targets, latency, args.seed)
+        print(f"{r['size']:>7} {r['targets']:>8} {r['found']:>6} {r['saved']:>6} {r['detail_opens']:>6} "
+              f"{r['sim_seconds'] / 60:>8.1f} {r['seconds_per_target']:>9.2f} {r['rpcs_per_target']:>11.1f}")
+        if r['found'] != r['expected_found']:
+            print(f"{size}: found {r['found']} of {r['expected_found']} attendees on the watchlist",
+                  file=sys.stderr)
+
+
+def run_jobs_once(events, devices, speed, seed=0):
+    # Worker threads can't share a simulated clock: run in real time, sped up, with waits scaled to match
+    rng = random.Random(seed)
+    scale = 1 / speed
+    serials = [f"replay-{n}" for n in range(devices)]
+    connect = lambda serial: ReplayDevice([], latency=LatencyModel(jitter=0.2, seed=rng.random()),
+                                          clock=ScaledClock(speed), events=events)
+    waits.controller.reset()
+    metrics.registry.reset()
+
+    with tempfile.TemporaryDirectory() as tmp, \
+            scratch_config(JOBS_DB_PATH=os.path.join(tmp, 'jobs.db'), EVENTS_DIR=os.path.join(tmp, 'events'),
+                           WAIT_POLL_INTERVAL=config.WAIT_POLL_INTERVAL * scale,
+                           WAIT_MIN_BUDGET=config.WAIT_MIN_BUDGET * scale,
+                           WAIT_MAX_BUDGET=config.WAIT_MAX_BUDGET * scale, CLICK_TIMEOUT=config.CLICK_TIMEOUT * scale,
+                           JOB_POLL_INTERVAL=0.1, RESUME_FROM_CHECKPOINT=False, CAPTURE_ON_ERROR=False):
+        queue = scheduler.JobQueue()
+        for event in events:
+            queue.add(event, priority=rng.randint(0, 3))
+        start = time.perf_counter()
+        scheduler.Scheduler(serials, queue=queue, connect=connect).run()
+        wall = time.perf_counter() - start
+        jobs = queue.jobs()
+        rows = {job['event']: database.get_attendee_count(job['db_path']) for job in jobs}
+
+    return {
+        'devices': devices,
+        'jobs': len(jobs),
+        'done': sum(1 for job in jobs if job['status'] == scheduler.DONE),
+        'complete': sum(1 for event, attendees in events.items() if rows[event] == len(attendees)),
+        'rows': sum(rows.values()),
+        'wall_seconds': wall,
+        'sim_minutes': wall * speed / 60,
+    }
+
+
+def cmd_jobs(args):
+    attendees = synthetic_attendees(args.events * args.size, seed=args.seed)
+    events = {f"Event {n + 1}": attendees[n * args.size:(n + 1) * args.size] for n in range(args.events)}
+    print(f"{'devices':>8} {'jobs':>5} {'done':>5} {'complete':>9} {'rows':>6} {'sim min':>8} {'wall s':>7} "
+          f"{'vs first':>9}")
+    first = None
+    for devices in args.devices:
+        r = run_jobs_once(events, devices, args.speed, args.seed)
+        first = first or r['wall_seconds']
+        print(f"{r['devices']:>8} {r['jobs']:>5} {r['done']:>5} {r['complete']:>9} {r['rows']:>6} "
+              f"{r['sim_minutes']:>8.1f} {r['wall_seconds']:>7.1f} {first / r['wall_seconds']:>8.1f}x")
+
+
+def _sizes(value):
+    return [int(v) for v in value.split(',') if v]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline scraper benchmarks")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    loop = sub.add_parser('loop', help="Full scrape loop against the replay device")
+    loop.add_argument('--sizes', type=_sizes, default=[100, 1000, 10000, 50000])
+    loop.add_argument('--latency', help='JSON overrides, e.g. \'{"dump_hierarchy": 0.4}\'')
+    loop.add_argument('--jitter', type=float, default=0.2, help="Relative latency jitter")
+    loop.add_argument('--seed', type=int, default=0)
+    loop.add_argument('--recorded', default='hierarchy.xml',
+                      help="Recorded detail dump served as the first attendee ('' to skip)")
+    loop.add_argument('--json', action='store_true')
+    loop.set_defaults(func=cmd_loop)
+
+    parse = sub.add_parser('parser', help="Hierarchy parser vs ElementTree on recorded dumps")
+    parse.add_argument('--dump', default='hierarchy.xml')
+    parse.add_argument('--scale', type=int, default=10, help="Size factor of the synthetic dump")
+    parse.set_defaults(func=cmd_parser)
+
+    exp = sub.add_parser('export', help="Streaming export of a large synthetic database")
+    exp.add_argument('--rows', type=int, default=1000000)
+    exp.add_argument('--formats', type=lambda v: v.split(','), default=list(export.FORMATS))
+    exp.add_argument('--seed', type=int, default=0)
+    exp.add_argument('--baseline', action='store_true', help="Also time fetchall() + csv (needs the RAM)")
+    exp.set_defaults(func=cmd_export)
+
+    query = sub.add_parser('query', help="Indexed and full-text lookups on a large synthetic database")
+    query.add_argument('--rows', type=int, default=500000)
+    query.add_argument('--lookups', type=int, default=1000, help="Calls per lookup type")
+    query.add_argument('--limit', type=int, default=50, help="Rows per call")
+    query.add_argument('--seed', type=int, default=0)
+    query.add_argument('--baseline', action='store_true', help="Also time LIKE scans without the indexes")
+    query.set_defaults(func=cmd_query)
+
+    stat = sub.add_parser('stats', help="Dashboard polls from the aggregate tables vs recounting a large database")
+    stat.add_argument('--rows', type=int, default=500000)
+    stat.add_argument('--polls', type=int, default=200, help="Polls timed from the tables")
+    stat.add_argument('--top', type=int, default=config.STATS_TOP_N, help="Values per breakdown")
+    stat.add_argument('--inserts', type=int, default=20000, help="Rows inserted to time the trigger cost")
+    stat.add_argument('--seed', type=int, default=0)
+    stat.set_defaults(func=cmd_stats)
+
+    scale = sub.add_parser('scale', help="Time and memory of the store and extractor on synthetic events")
+    scale.add_argument('--sizes', type=_sizes, default=[100000, 300000, 1000000])
+    scale.add_argument('--pages', type=int, default=300, help="Synthetic detail pages for the extractor")
+    scale.add_argument('--lookups', type=int, default=10000, help="Lookups (and new rows) per store operation")
+    scale.add_argument('--seed', type=int, default=0)
+    scale.set_defaults(func=cmd_scale)
+
+    rule = sub.add_parser('rules', help="Detail field rules: regression corpus and speed vs the legacy parser")
+    rule.add_argument('--pages', type=int, default=2000, help="Synthetic detail pages")
+    rule.add_argument('--dump', default='hierarchy.xml', help="Recorded detail dump ('' to skip)")
+    rule.add_argument('--archived', type=int, default=0,
+                      help="Also check this many captures from the dump archive (ARCHIVE_DIR)")
+    rule.add_argument('--seed', type=int, default=0)
+    rule.add_argument('--verbose', action='store_true', help="Print every mismatch")
+    rule.set_defaults(func=cmd_rules)
+
+    watch = sub.add_parser('watchlist', help="Watchlist searches against replay events of growing size")
+    watch.add_argument('--sizes', type=_sizes, default=[1000, 10000, 50000])
+    watch.add_argument('--targets', type=int, default=50, help="Attendees on the watchlist")
+    watch.add_argument('--latency', help='JSON overrides, e.g. \'{"set_text": 0.3}\'')
+    watch.add_argument('--jitter', type=float, default=0.2, help="Relative latency jitter")
+    watch.add_argument('--seed', type=int, default=0)
+    watch.set_defaults(func=cmd_watchlist)
+
+    jobs = sub.add_parser('jobs', help="Job scheduler draining a backlog of replay events over a device pool")
+    jobs.add_argument('--events', type=int, default=6)
+    jobs.add_argument('--size', type=int, default=40, help="Attendees per event")
+    jobs.add_argument('--devices', type=_sizes, default=[1, 3], help="Pool sizes to compare")
+    jobs.add_argument('--speed', type=float, default=50, help="Simulated seconds per real second")
+    jobs.add_argument('--seed', type=int, default=0)
+    jobs.set_defaults(func=cmd_jobs)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)s - %(message)s')
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Error captures
+
+The scraper already fetches a hierarchy dump every few hundred ms, so a
+RecordingDevice keeps the last CAPTURE_RING_SIZE dumps and actions in a
+ring buffer for free. When the scrape loop hits an error it hands the
+buffer to a background thread, which writes it gzipped next to one
+screenshot and prunes old captures, so the error path costs a list copy.
+"""
+
+import atexit
+import gzip
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+import config
+from metrics import incr
+from utils import take_screenshot
+
+logger = logging.getLogger(__name__)
+
+_CAPTURE_PREFIX = "capture_"
+
+
+class FlightRecorder:
+    """Bounded history of what one device saw and did."""
+
+    def __init__(self, size=None):
+        self._events = deque(maxlen=size or config.CAPTURE_RING_SIZE)
+        self._lock = threading.Lock()
+
+    def record(self, kind, **data):
+        with self._lock:
+            self._events.append(dict(data, kind=kind, at=time.time()))
+
+    def snapshot(self):
+        with self._lock:
+            return list(self._events)
+
+
+class RecordingDevice:
+    """Device proxy that feeds every dump and action into a FlightRecorder."""
+
+    def __init__(self, device, recorder):
+        self._device = device
+        self.recorder = recorder
+
+    def dump_hierarchy(self, *args, **kwargs):
+        xml = self._device.dump_hierarchy(*args, **kwargs)
+        self.recorder.record('dump', xml=xml)
+        return xml
+
+    def click(self, x, y, *args, **kwargs):
+        self.recorder.record('click', x=x, y=y)
+        return self._device.click(x, y, *args, **kwargs)
+
+    def swipe(self, fx, fy, tx, ty, *args, **kwargs):
+        self.recorder.record('swipe', start=(fx, fy), end=(tx, ty))
+        return self._device.swipe(fx, fy, tx, ty, *args, **kwargs)
+
+    def press(self, key, *args, **kwargs):
+        self.recorder.record('press', key=key)
+        return self._device.press(key, *args, **kwargs)
+
+    def __call__(self, **selector):
+        self.recorder.record('selector', selector={k: str(v) for k, v in selector.items()})
+        return self._device(**selector)
+
+    def __getattr__(self, name):
+        return getattr(self._device, name)
+
+
+class CaptureWriter:
+    """Writes captures off the scrape thread, rate limited and with retention limits."""
+
+    def __init__(self, directory=None):
+        self.directory = directory or config.SCREENSHOT_DIR
+        self._queue = queue.Queue(maxsize=4)
+        self._last = 0.0
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="capture-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, device, recorder, reason, error=None):
+        """Queue a capture. Returns False if it was rate limited or the writer is busy."""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last < config.CAPTURE_MIN_INTERVAL:
+                incr('captures_skipped')
+                return False
+            self._last = now
+            self._seq += 1
+            seq = self._seq
+
+        capture = {
+            'reason': reason,
+            'error': repr(error) if error is not None else None,
+            'traceback': traceback.format_exception(error) if error is not None else None,
+            'captured_at': datetime.now().isoformat(),
+            'events': recorder.snapshot(),
+        }
+        try:
+            self._queue.put_nowait((seq, device, capture))
+        except queue.Full:
+            incr('captures_skipped')
+            return False
+        return True
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            try:
+                self._write(*item)
+                self._prune()
+            except Exception as e:
+                logger.warning(f"Could not write error capture: {e}")
+
+    def _write(self, seq, device, capture):
+        os.makedirs(self.directory, exist_ok=True)
+        base = f"{_CAPTURE_PREFIX}{datetime.now():%Y%m%d_%H%M%S}_{seq}"
+
+        if config.SAVE_SCREENSHOTS_ON_ERROR:
+            try:
+                capture['screenshot'] = take_screenshot(device, prefix=base)
+            except Exception as e:
+                capture['screenshot'] = None
+                logger.debug(f"Capture screenshot failed: {e}")
+
+        path = os.path.join(self.directory, f"{base}.json.gz")
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            json.dump(capture, f)
+        incr('captures_written')
+        logger.info(f"Error capture written: {path} ({len(capture['events'])} events)")
+
+    def _prune(self):
+        # Oldest first; a capture's screenshot starts with the same name
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.startswith(_CAPTURE_PREFIX):
+                path = os.path.join(self.directory, name)
+                entries.append((os.path.getmtime(path), os.path.getsize(path), path))
+        entries.sort()
+
+        captures = sum(1 for _, _, path in entries if path.endswith('.json.gz'))
+        total = sum(size for _, size, _ in entries)
+        limit = config.CAPTURE_MAX_MB * 2**20
+        while entries and (captures > config.CAPTURE_MAX_FILES or total > limit):
+            _, size, path = entries.pop(0)
+            os.remove(path)
+            total -= size
+            if path.endswith('.json.gz'):
+                captures -= 1
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def record(device):
+    """Wrap device so its recent dumps and actions can be captured on error."""
+    if not config.CAPTURE_ON_ERROR or isinstance(device, RecordingDevice):
+        return device
+    return RecordingDevice(device, FlightRecorder())
+
+
+def capture_error(device, reason, error=None):
+    """
+    Capture the recent history of a recorded device (possibly behind other
+    proxies such as metrics.InstrumentedDevice) in the background.
+    """
+    global _writer
+    recorder = getattr(device, 'recorder', None)
+    if not isinstance(recorder, FlightRecorder):
+        return False
+    with _writer_lock:
+        if _writer is None:
+            _writer = CaptureWriter()
+            atexit.register(_writer.close)  # Finish captures still queued
+    return _writer.submit(device, recorder, reason, error)
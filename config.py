@@ -1,21 +1,87 @@
 # Device Configuration
 DEVICE_SERIAL = None  # None for auto-detect, or specify serial number
+DEVICE_SERIALS = []  # Two or more serials scrape in parallel, one worker per device
+
+# Device session: reconnect on dropped agent/ADB links (see session.py)
+SESSION_WARM_UP = True  # Start the on-device agent before scraping
+SESSION_HEALTH_INTERVAL = 15  # Seconds of silence before the background probe checks the link (0 = off)
+SESSION_BACKOFF_MIN = 1.0  # First reconnect retry delay, doubled per failure...
+SESSION_BACKOFF_MAX = 60.0  # ...up to this
+SESSION_GIVE_UP_AFTER = None  # Seconds of downtime before the run aborts (None = keep trying)
 
 # Timeouts (in seconds)
 CLICK_TIMEOUT = 0.3
 PAGE_LOAD_TIMEOUT = 1.0
 SCROLL_WAIT = 0.01
 
+# Adaptive waits: poll for the expected screen instead of sleeping a fixed time
+WAIT_POLL_INTERVAL = 0.05  # Pause between polls (each poll is one dump)
+WAIT_PERCENTILE = 95  # Give up after this percentile of observed latency...
+WAIT_HEADROOM = 1.5  # ...times this factor
+WAIT_MIN_BUDGET = 0.5
+WAIT_MAX_BUDGET = 5.0  # Also the budget until enough samples are in
+WAIT_MIN_SAMPLES = 5
+WAIT_FIRST_POLL_PERCENTILE = 10  # First poll is delayed by half this percentile of observed latency
+WAIT_HISTORY = 200  # Samples kept per transition
+WAIT_TIMEOUT_GROWTH = 2  # Budget multiplier per consecutive timeout (still capped at WAIT_MAX_BUDGET)
+
 # Scraping Behavior
 MAX_ATTENDEES = None  # No limit - scrape all attendees
+REFRESH_MODE = False  # Re-open stored attendees whose list summary changed and update their fields
+END_OF_LIST_SWIPES = 2  # Consecutive swipes that leave the list unchanged before the run stops
+
+# Watchlist mode (watchlist.py): search the list for each target instead of walking all of it
+WATCHLIST_FILE = None  # Text file, one name or company per line; set it to scrape only those
+WATCHLIST_MAX_OPENS = 20  # Matches opened per target (a company can match many people)
+WATCHLIST_REPORT = "watchlist_report.json"  # Per-target matches and lookup time (None = log only)
+
+# Resume: fling back to where an interrupted run stopped, without clicking
+RESUME_FROM_CHECKPOINT = True
+LIST_SWIPE = (500, 1500, 500, 700)  # Normal list scroll (800px)
+FAST_FORWARD_SWIPE = (500, 1900, 500, 300)  # Long fling used to get back to the checkpoint
+FAST_FORWARD_DURATION = 0.1
+FAST_FORWARD_UNDERSHOOT = 0.9  # Stop short of the saved offset, the clicked set covers the overlap
 SAVE_SCREENSHOTS_ON_ERROR = True
 
+# Pipeline: detail dumps are parsed and saved by worker threads while the device moves on
+PIPELINE_WORKERS = 2  # 0 processes each attendee inline on the device thread
+PIPELINE_QUEUE_SIZE = 8  # Captured attendees waiting for a worker before the device blocks
+
 # Database
 DB_PATH = "attendees_v2.db"  # New database with job_title and company columns
+DB_BATCH_SIZE = 50  # Rows per background commit
+DB_FLUSH_INTERVAL = 1.0  # Seconds before a partial batch is committed anyway
+EXPORT_CHUNK_SIZE = 5000  # Rows fetched (and written) per step by export.py
+STATS_TOP_N = 10  # Values per breakdown shown by stats.py
+
+# Job scheduler (scheduler.py): many events across the device pool, one database per event
+JOBS_DB_PATH = "jobs.db"
+EVENTS_DIR = "events"  # Event databases: events/<event-name>.db
+JOB_MAX_ATTEMPTS = 3  # A failed job is requeued (resuming from its checkpoint) until this many tries
+JOB_POLL_INTERVAL = 5  # Seconds an idle device waits before looking for jobs again
+JOB_PROGRESS_INTERVAL = 10  # Seconds between progress/heartbeat updates of running jobs
+JOB_STALE_AFTER = 120  # A running job without a heartbeat for this long is requeued on the next run
+
+# Raw dump archive: keep every detail dump so rows can be re-extracted offline (reextract.py)
+ARCHIVE_DUMPS = False
+ARCHIVE_DIR = "dumps"
+ARCHIVE_COMPRESSION_LEVEL = 6  # zlib level; dumps shrink about 10x
 
 # Screenshots
 SCREENSHOT_DIR = "screenshots"
 
+# Error captures: recent dumps + actions (and a screenshot) written in the background on errors
+CAPTURE_ON_ERROR = True
+CAPTURE_RING_SIZE = 20  # Dumps and actions kept per device
+CAPTURE_MIN_INTERVAL = 10  # Seconds between captures, so an error loop can't flood the disk
+CAPTURE_MAX_FILES = 50  # Oldest captures are deleted past this count...
+CAPTURE_MAX_MB = 200  # ...or this much disk (screenshots included)
+
+# Metrics: per-phase counts and latency percentiles, exported as JSON + Prometheus text
+METRICS_DIR = "metrics"
+METRICS_INTERVAL = 30  # Seconds between snapshots
+METRICS_WINDOW = 1000  # Samples kept per phase for percentiles
+
 # ============================================
 # UI SELECTORS - DISCOVERED FROM hierarchy.xml
 # ============================================
@@ -32,6 +98,11 @@ LIST_CONTAINER_SELECTOR = {
     "className": "androidx.recyclerview.widget.RecyclerView"
 }
 
+# Attendee search field on the list page (watchlist mode)
+SEARCH_FIELD_SELECTOR = {
+    "className": "android.widget.EditText"
+}
+
 # Alternative scroll container (if RecyclerView doesn't work)
 SCROLL_VIEW_SELECTOR = {
     "className": "android.widget.ScrollView"
@@ -41,3 +112,45 @@ SCROLL_VIEW_SELECTOR = {
 FIELD_LABEL_INDUSTRY = "Industry"
 FIELD_LABEL_JOB_FUNCTION = "Job Function"
 FIELD_LABEL_OPERATES_IN = "Operates in"
+
+# Detail page extraction
+EARLY_STOP_EXTRACTION = True  # Stop as soon as every field label and its value has been seen
+DETAIL_MAX_SWIPES = 2  # Same worst case as the fixed three-dump extraction
+DETAIL_SWIPE_X = 500
+DETAIL_SWIPE_START_Y = 1400
+DETAIL_SWIPE_MIN = 150  # Smallest scroll (px) worth issuing
+DETAIL_SWIPE_MAX = 800  # Largest single scroll (px) when no label is visible yet
+DETAIL_SCROLL_TARGET_Y = 400  # Incomplete labels are scrolled up to about this height
+DETAIL_FOOTER_TEXTS = ["Chat", "Suggest meeting"]  # Sticky action bar at the bottom of the page
+
+# Detail page fields (rules.py): compiled once, applied in one pass over the page's texts.
+# anchor/after + offset pick a text relative to a label or another field, no anchor means the
+# first text passing the validators, multi collects values until the next label.
+# Validators: person_name, letters, min_length:N, max_words:N
+DETAIL_IGNORE_TEXTS = DETAIL_FOOTER_TEXTS  # Not part of the page flow, so never counted by an offset
+DETAIL_SKIP_TEXTS = ["Introduction", "Interests", "Navigate up"]  # Never values (field labels never are either)
+DETAIL_FIELD_RULES = [
+    {"field": "name", "validators": ["person_name"]},
+    {"field": "job_title", "after": "name", "offset": 1},
+    {"field": "company", "after": "name", "offset": 2},
+    {"field": "industry", "anchor": FIELD_LABEL_INDUSTRY, "offset": 1},
+    {"field": "job_function", "anchor": FIELD_LABEL_JOB_FUNCTION, "offset": 1},
+    {"field": "operates_in", "anchor": FIELD_LABEL_OPERATES_IN, "multi": True, "max_values": 5,
+     "validators": ["min_length:3", "letters"], "join": ", "},
+]
+
+# Page classifier (pages.py): first signature with a matching class or text wins
+MENU_ATTENDEES_TEXT = "attendees"  # Tab on the menu page that opens the list
+HOME_MENU_TEXT = "Menu"  # Button on the event home page that opens the menu
+EVENTS_PAGE_TEXT = "My events"  # Title of the event picker (scheduler.py enters events from there)
+HOME_EVENTS_TEXT = None  # Button on the event home that opens the picker (None = press back)
+EVENT_PICKER_SWIPES = 5  # Scrolls through the picker before an event counts as missing
+PAGE_SIGNATURES = [
+    ("events", {"texts": [EVENTS_PAGE_TEXT]}),
+    ("list", {"classes": [LIST_CONTAINER_SELECTOR["className"]]}),
+    ("detail", {"texts": DETAIL_FOOTER_TEXTS + [FIELD_LABEL_INDUSTRY, FIELD_LABEL_JOB_FUNCTION,
+                                                FIELD_LABEL_OPERATES_IN]}),
+    ("menu", {"texts": [MENU_ATTENDEES_TEXT]}),
+    ("home", {"texts": [HOME_MENU_TEXT]}),
+]
+NAV_MAX_STEPS = 4  # Taps/back presses tried before recovery gives up
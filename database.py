@@ -1,13 +1,21 @@
 import sqlite3
 import logging
+import queue
+import threading
+import time
 from datetime import datetime
+from collections import Counter
+from itertools import groupby
 import config
+from extractor import parse_list_summary
+from identity import attendee_identity, list_identity, row_identity
+from metrics import timer
 
 logger = logging.getLogger(__name__)
 
 
-def init_db():
-    conn = sqlite3.connect(config.DB_PATH)
+def init_db(db_path=None):
+    conn = sqlite3.connect(db_path or config.DB_PATH)
     cursor = conn.cursor()
 
     cursor.execute("""
@@ -23,6 +31,31 @@ def init_db():
         )
     """)
 
+    # Where an interrupted run stopped (single row) and every list item it opened
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS scrape_checkpoint (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            anchor TEXT,
+            scroll_offset INTEGER,
+            updated_at TIMESTAMP
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS clicked_items (
+            fingerprint TEXT PRIMARY KEY
+        )
+    """)
+
+    # Archived raw dumps (see archive.py) behind each opened list item, and the row they produced
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS dump_index (
+            fingerprint TEXT PRIMARY KEY,
+            name TEXT,
+            digests TEXT,
+            captured_at TIMESTAMP
+        )
+    """)
+
     # Add new columns to existing databases
     try:
         cursor.execute("ALTER TABLE attendees ADD COLUMN company TEXT")
@@ -34,9 +67,275 @@ def init_db():
         pass
 
     conn.commit()
+    migrate(conn)
     conn.close()
 
 
+# "A, B, C" -> rows of a json_each table, so SQL (and triggers) can split operates_in. json_quote
+# escapes the value (no escape contains ", "), then each separator closes one string and opens the next
+def _split_countries(column):
+    return f"""json_each('[' || replace(json_quote({column}), ', ', '","') || ']')"""
+
+
+# Breakdowns kept in attendee_stats: columns of attendees, plus 'country' off attendee_countries
+STAT_COLUMNS = ('industry', 'job_function', 'company')
+STAT_DIMENSIONS = STAT_COLUMNS + ('country',)
+PROGRESS_FIELDS = ('attendees', 'with_industry', 'with_job_function', 'with_company', 'with_countries',
+                   'last_scraped_at')
+
+
+# Trigger statements that move one attendee in or out of a breakdown (empty values are not counted)
+def _count_up(dimension, value):
+    return f"""
+        INSERT INTO attendee_stats (dimension, value, attendees) SELECT '{dimension}', {value}, 1 WHERE {value} != ''
+        ON CONFLICT (dimension, value) DO UPDATE SET attendees = attendees + 1;"""
+
+
+def _count_down(dimension, value):
+    return f"""
+        UPDATE attendee_stats SET attendees = attendees - 1 WHERE dimension = '{dimension}' AND value = {value};
+        DELETE FROM attendee_stats WHERE dimension = '{dimension}' AND value = {value} AND attendees <= 0;"""
+
+
+def _filled(value):
+    return f"(coalesce({value}, '') != '')"
+
+
+def _stats_triggers():
+    added = ''.join(_count_up(column, f'new.{column}') for column in STAT_COLUMNS)
+    removed = ''.join(_count_down(column, f'old.{column}') for column in STAT_COLUMNS)
+    filled = lambda row, sign: ', '.join(f"with_{column} = with_{column} {sign} {_filled(f'{row}.{column}')}"
+                                         for column in STAT_COLUMNS)
+    country = "(SELECT name FROM countries WHERE id = {}.country_id)"
+    updates = ''.join(f"""
+    CREATE TRIGGER IF NOT EXISTS attendees_stats_au_{column} AFTER UPDATE OF {column} ON attendees
+    WHEN old.{column} IS NOT new.{column} BEGIN{_count_down(column, f'old.{column}')}{_count_up(column, f'new.{column}')}
+        UPDATE attendee_progress SET with_{column} = with_{column} - {_filled(f'old.{column}')}
+                                                   + {_filled(f'new.{column}')};
+    END;""" for column in STAT_COLUMNS)
+    return f"""
+    CREATE TRIGGER IF NOT EXISTS attendees_stats_ai AFTER INSERT ON attendees BEGIN{added}
+        UPDATE attendee_progress SET attendees = attendees + 1, {filled('new', '+')},
+            last_scraped_at = coalesce(max(last_scraped_at, new.scraped_at), new.scraped_at, last_scraped_at);
+    END;
+    CREATE TRIGGER IF NOT EXISTS attendees_stats_ad AFTER DELETE ON attendees BEGIN{removed}
+        UPDATE attendee_progress SET attendees = attendees - 1, {filled('old', '-')};
+    END;{updates}
+    CREATE TRIGGER IF NOT EXISTS attendee_countries_stats_ai AFTER INSERT ON attendee_countries BEGIN{_count_up('country', country.format('new'))}
+        UPDATE attendee_progress SET with_countries = with_countries + 1
+        WHERE (SELECT COUNT(*) FROM attendee_countries WHERE attendee_id = new.attendee_id) = 1;
+    END;
+    CREATE TRIGGER IF NOT EXISTS attendee_countries_stats_ad AFTER DELETE ON attendee_countries BEGIN{_count_down('country', country.format('old'))}
+        UPDATE attendee_progress SET with_countries = with_countries - 1
+        WHERE NOT EXISTS (SELECT 1 FROM attendee_countries WHERE attendee_id = old.attendee_id);
+    END;
+    """
+
+
+# What the stats tables should hold, computed the slow way (rebuild and check)
+ACTUAL_STATS_SQL = " UNION ALL ".join(
+    [f"SELECT '{column}', {column}, COUNT(*) FROM attendees WHERE {column} != '' GROUP BY {column}"
+     for column in STAT_COLUMNS]
+    + ["SELECT 'country', c.name, COUNT(*) FROM attendee_countries ac JOIN countries c ON c.id = ac.country_id "
+       "GROUP BY c.id"])
+ACTUAL_PROGRESS_SQL = f"""
+    SELECT COUNT(*), {', '.join(f"COUNT(NULLIF({column}, ''))" for column in STAT_COLUMNS)},
+           (SELECT COUNT(DISTINCT attendee_id) FROM attendee_countries), MAX(scraped_at)
+    FROM attendees
+"""
+REBUILD_STATS_SQL = f"""
+    DELETE FROM attendee_stats;
+    INSERT INTO attendee_stats (dimension, value, attendees) {ACTUAL_STATS_SQL};
+    INSERT OR REPLACE INTO attendee_progress (id, {', '.join(PROGRESS_FIELDS)}) SELECT 1, * FROM ({ACTUAL_PROGRESS_SQL});
+"""
+
+
+# Lookup indexes (rowid order inside each key keeps ORDER BY id LIMIT n cheap)
+LOOKUP_INDEXES_SQL = """
+    CREATE INDEX IF NOT EXISTS idx_attendees_industry ON attendees(industry);
+    CREATE INDEX IF NOT EXISTS idx_attendees_job_function ON attendees(job_function);
+    CREATE INDEX IF NOT EXISTS idx_attendees_company ON attendees(company);
+"""
+
+COUNTRY_TRIGGERS_SQL = f"""
+    CREATE TRIGGER IF NOT EXISTS attendees_countries_ai AFTER INSERT ON attendees
+    WHEN new.operates_in IS NOT NULL AND new.operates_in != '' BEGIN
+        INSERT OR IGNORE INTO countries (name) SELECT value FROM {_split_countries('new.operates_in')};
+        INSERT OR IGNORE INTO attendee_countries (attendee_id, country_id)
+            SELECT new.id, c.id FROM {_split_countries('new.operates_in')} j JOIN countries c ON c.name = j.value;
+    END;
+    CREATE TRIGGER IF NOT EXISTS attendees_countries_au AFTER UPDATE OF operates_in ON attendees BEGIN
+        DELETE FROM attendee_countries WHERE attendee_id = old.id;
+        INSERT OR IGNORE INTO countries (name)
+            SELECT value FROM {_split_countries('new.operates_in')} WHERE new.operates_in != '';
+        INSERT OR IGNORE INTO attendee_countries (attendee_id, country_id)
+            SELECT new.id, c.id FROM {_split_countries('new.operates_in')} j JOIN countries c ON c.name = j.value
+            WHERE new.operates_in != '';
+    END;
+    CREATE TRIGGER IF NOT EXISTS attendees_countries_ad AFTER DELETE ON attendees BEGIN
+        DELETE FROM attendee_countries WHERE attendee_id = old.id;
+    END;
+"""
+
+FTS_TRIGGERS_SQL = """
+    CREATE TRIGGER IF NOT EXISTS attendees_fts_ai AFTER INSERT ON attendees BEGIN
+        INSERT INTO attendees_fts (rowid, name, job_title, company)
+            VALUES (new.id, new.name, new.job_title, new.company);
+    END;
+    CREATE TRIGGER IF NOT EXISTS attendees_fts_ad AFTER DELETE ON attendees BEGIN
+        INSERT INTO attendees_fts (attendees_fts, rowid, name, job_title, company)
+            VALUES ('delete', old.id, old.name, old.job_title, old.company);
+    END;
+    CREATE TRIGGER IF NOT EXISTS attendees_fts_au AFTER UPDATE OF name, job_title, company ON attendees BEGIN
+        INSERT INTO attendees_fts (attendees_fts, rowid, name, job_title, company)
+            VALUES ('delete', old.id, old.name, old.job_title, old.company);
+        INSERT INTO attendees_fts (rowid, name, job_title, company)
+            VALUES (new.id, new.name, new.job_title, new.company);
+    END;
+"""
+
+# Every column of attendees after migration 6, in table order (the rebuild copies them)
+ATTENDEE_COLUMNS = ('id', 'name', 'job_title', 'company', 'industry', 'job_function', 'operates_in',
+                    'scraped_at', 'list_summary', 'updated_at', 'identity')
+
+
+# Schema versions after the base tables, applied in order and recorded in PRAGMA user_version
+MIGRATIONS = [
+    # 1: lookup indexes
+    LOOKUP_INDEXES_SQL,
+
+    # 2: countries as rows, linked many-to-many and kept in sync with operates_in by triggers
+    f"""
+    CREATE TABLE IF NOT EXISTS countries (
+        id INTEGER PRIMARY KEY,
+        name TEXT UNIQUE NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS attendee_countries (
+        attendee_id INTEGER NOT NULL,
+        country_id INTEGER NOT NULL,
+        PRIMARY KEY (attendee_id, country_id)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_attendee_countries_country ON attendee_countries(country_id, attendee_id);
+    {COUNTRY_TRIGGERS_SQL}
+
+    INSERT OR IGNORE INTO countries (name)
+        SELECT DISTINCT j.value FROM attendees a, {_split_countries('a.operates_in')} j
+        WHERE a.operates_in != '';
+    INSERT OR IGNORE INTO attendee_countries (attendee_id, country_id)
+        SELECT a.id, c.id FROM attendees a, {_split_countries('a.operates_in')} j
+        JOIN countries c ON c.name = j.value
+        WHERE a.operates_in != '';
+    """,
+
+    # 3: full-text search over name, title and company (external content, synced by triggers)
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS attendees_fts USING fts5(
+        name, job_title, company, content='attendees', content_rowid='id'
+    );
+    {FTS_TRIGGERS_SQL}
+    INSERT INTO attendees_fts (attendees_fts) VALUES ('rebuild');
+    """,
+
+    # 4: refresh mode - the list summary a row was saved from, and a history of field changes
+    """
+    ALTER TABLE attendees ADD COLUMN list_summary TEXT;
+    ALTER TABLE attendees ADD COLUMN updated_at TIMESTAMP;
+    CREATE TABLE IF NOT EXISTS attendee_changes (
+        id INTEGER PRIMARY KEY,
+        attendee_id INTEGER NOT NULL,
+        field TEXT NOT NULL,
+        old_value TEXT,
+        new_value TEXT,
+        changed_at TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_attendee_changes_attendee ON attendee_changes(attendee_id, changed_at);
+    """,
+
+    # 5: breakdowns and progress counters, kept by triggers so dashboards never aggregate attendees
+    f"""
+    CREATE TABLE IF NOT EXISTS attendee_stats (
+        dimension TEXT NOT NULL,
+        value TEXT NOT NULL,
+        attendees INTEGER NOT NULL,
+        PRIMARY KEY (dimension, value)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_attendee_stats_top ON attendee_stats(dimension, attendees DESC);
+    CREATE TABLE IF NOT EXISTS attendee_progress (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        attendees INTEGER NOT NULL,
+        with_industry INTEGER NOT NULL,
+        with_job_function INTEGER NOT NULL,
+        with_company INTEGER NOT NULL,
+        with_countries INTEGER NOT NULL,
+        last_scraped_at TIMESTAMP
+    );
+    {_stats_triggers()}
+    {REBUILD_STATS_SQL}
+    """,
+
+    # 6: identity key (see identity.py) replaces UNIQUE(name), so namesakes at other companies are kept.
+    # SQLite cannot drop a constraint: attendees is rebuilt with the same ids, then its indexes and
+    # triggers are recreated. Rows that turn out to share a key keep the oldest. clicked_items holds keys.
+    f"""
+    CREATE TABLE attendees_rebuilt (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT,
+        job_title TEXT,
+        company TEXT,
+        industry TEXT,
+        job_function TEXT,
+        operates_in TEXT,
+        scraped_at TIMESTAMP,
+        list_summary TEXT,
+        updated_at TIMESTAMP,
+        identity INTEGER NOT NULL
+    );
+    CREATE UNIQUE INDEX idx_attendees_rebuilt_identity ON attendees_rebuilt(identity);
+    INSERT OR IGNORE INTO attendees_rebuilt ({', '.join(ATTENDEE_COLUMNS)})
+        SELECT {', '.join(ATTENDEE_COLUMNS[:-1])}, row_identity(name, job_title, company, list_summary)
+        FROM attendees ORDER BY id;
+    DROP TABLE attendees;
+    ALTER TABLE attendees_rebuilt RENAME TO attendees;
+    DROP INDEX idx_attendees_rebuilt_identity;
+    CREATE UNIQUE INDEX idx_attendees_identity ON attendees(identity);
+    CREATE INDEX idx_attendees_name ON attendees(name);
+    {LOOKUP_INDEXES_SQL}
+    {COUNTRY_TRIGGERS_SQL}
+    {FTS_TRIGGERS_SQL}
+    {_stats_triggers()}
+    DELETE FROM attendee_countries WHERE attendee_id NOT IN (SELECT id FROM attendees);
+    DELETE FROM attendee_changes WHERE attendee_id NOT IN (SELECT id FROM attendees);
+    INSERT INTO attendees_fts (attendees_fts) VALUES ('rebuild');
+    {REBUILD_STATS_SQL}
+
+    CREATE TABLE clicked_keys (identity INTEGER PRIMARY KEY);
+    INSERT OR IGNORE INTO clicked_keys (identity) SELECT list_identity(fingerprint) FROM clicked_items;
+    DROP TABLE clicked_items;
+    ALTER TABLE clicked_keys RENAME TO clicked_items;
+    """,
+
+    # 7: country triggers built with json_quote (backslashes and control characters in operates_in
+    # made the old ones raise "malformed JSON"); IF NOT EXISTS would keep the old ones, so drop first
+    f"""
+    DROP TRIGGER IF EXISTS attendees_countries_ai;
+    DROP TRIGGER IF EXISTS attendees_countries_au;
+    DROP TRIGGER IF EXISTS attendees_countries_ad;
+    {COUNTRY_TRIGGERS_SQL}
+    """,
+]
+
+
+def migrate(conn):
+    """Bring the schema up to len(MIGRATIONS). Each version commits atomically."""
+    # Key functions for migrations that compute identities (they only run here)
+    conn.create_function('row_identity', 4, row_identity, deterministic=True)
+    conn.create_function('list_identity', 1, list_identity, deterministic=True)
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for number, script in enumerate(MIGRATIONS[version:], start=version + 1):
+        logger.info(f"Migrating database to schema version {number}")
+        conn.executescript(f"BEGIN; {script} PRAGMA user_version = {number}; COMMIT;")
+
+
 def attendee_exists(name):
     conn = sqlite3.connect(config.DB_PATH)
     cursor = conn.cursor()
@@ -46,15 +345,78 @@ def attendee_exists(name):
     return result
 
 
+def get_attendee_identities(db_path=None):
+    """The identity key of every stored attendee, read straight off its index."""
+    conn = sqlite3.connect(db_path or config.DB_PATH)
+    keys = {key for (key,) in conn.execute("SELECT identity FROM attendees")}
+    conn.close()
+    return keys
+
+
+# Fields a refresh may change (name is not one: a new name is a new attendee)
+REFRESH_FIELDS = ('job_title', 'company', 'industry', 'job_function', 'operates_in')
+
+
+def get_attendee_rows(db_path=None):
+    """{identity: {'name', refresh fields..., 'list_summary'}} for every stored attendee."""
+    columns = ('name',) + REFRESH_FIELDS + ('list_summary',)
+    conn = sqlite3.connect(db_path or config.DB_PATH)
+    cursor = conn.execute(f"SELECT identity, {', '.join(columns)} FROM attendees")
+    rows = {row[0]: dict(zip(columns, row[1:])) for row in cursor}
+    conn.close()
+    return rows
+
+
+def get_attendee_changes(name):
+    """Field changes recorded for an attendee by refresh runs, oldest first."""
+    conn = sqlite3.connect(config.DB_PATH)
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute("""
+        SELECT c.field, c.old_value, c.new_value, c.changed_at
+        FROM attendee_changes c JOIN attendees a ON a.id = c.attendee_id
+        WHERE a.name = ? ORDER BY c.id
+    """, (name,)).fetchall()
+    conn.close()
+    return [dict(row) for row in rows]
+
+
+INSERT_ATTENDEE_SQL = """
+    INSERT INTO attendees (identity, name, job_title, company, industry, job_function, operates_in, scraped_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Queued inserts can race a key committed by another batch; drop those quietly
+QUEUED_INSERT_ATTENDEE_SQL = """
+    INSERT OR IGNORE INTO attendees (identity, name, job_title, company, industry, job_function, operates_in,
+                                     scraped_at, list_summary)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+RECORD_CHANGE_SQL = """
+    INSERT INTO attendee_changes (attendee_id, field, old_value, new_value, changed_at)
+    SELECT id, ?, ?, ?, ? FROM attendees WHERE identity = ?
+"""
+SET_LIST_SUMMARY_SQL = "UPDATE attendees SET list_summary = ?, identity = ? WHERE identity = ?"
+
+
+def with_identity(row):
+    """(name, job_title, company, ...) -> (identity, name, job_title, company, ...) for INSERT_ATTENDEE_SQL."""
+    return (attendee_identity(*row[:3]),) + tuple(row)
+
+
+def _update_fields_sql(fields):
+    # One statement per combination of changed fields; sqlite3 caches each
+    assignments = ', '.join(f"{field} = ?" for field in fields)
+    return (f"UPDATE attendees SET {assignments}, list_summary = ?, updated_at = ?, identity = ? "
+            f"WHERE identity = ?")
+
+
 def save_attendee(name, job_title, company, industry, job_function, operates_in):
     conn = sqlite3.connect(config.DB_PATH)
     cursor = conn.cursor()
 
     try:
-        cursor.execute("""
-            INSERT INTO attendees (name, job_title, company, industry, job_function, operates_in, scraped_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (name, job_title, company, industry, job_function, operates_in, datetime.now()))
+        cursor.execute(INSERT_ATTENDEE_SQL, with_identity(
+            (name, job_title, company, industry, job_function, operates_in, datetime.now())))
 
         conn.commit()
         return True
@@ -64,6 +426,320 @@ def save_attendee(name, job_title, company, industry, job_function, operates_in)
         conn.close()
 
 
+SAVE_CHECKPOINT_SQL = """
+    INSERT INTO scrape_checkpoint (id, anchor, scroll_offset, updated_at) VALUES (1, ?, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET anchor = excluded.anchor, scroll_offset = excluded.scroll_offset,
+                                  updated_at = excluded.updated_at
+"""
+MARK_CLICKED_SQL = "INSERT OR IGNORE INTO clicked_items (identity) VALUES (?)"
+CLEAR_CHECKPOINT_SQL = "DELETE FROM scrape_checkpoint"
+CLEAR_CLICKED_SQL = "DELETE FROM clicked_items"
+INDEX_DUMPS_SQL = """
+    INSERT INTO dump_index (fingerprint, name, digests, captured_at) VALUES (?, ?, ?, ?)
+    ON CONFLICT(fingerprint) DO UPDATE SET name = excluded.name, digests = excluded.digests,
+                                           captured_at = excluded.captured_at
+"""
+
+
+def load_checkpoint(db_path=None):
+    """
+    Return {'anchor', 'scroll_offset', 'clicked'} from the last interrupted
+    run, or None. clicked holds the identity keys of the list items it opened.
+    """
+    conn = sqlite3.connect(db_path or config.DB_PATH)
+    cursor = conn.cursor()
+    cursor.execute("SELECT anchor, scroll_offset FROM scrape_checkpoint WHERE id = 1")
+    row = cursor.fetchone()
+    clicked = {key for (key,) in cursor.execute("SELECT identity FROM clicked_items")}
+    conn.close()
+
+    if row is None and not clicked:
+        return None
+    anchor, scroll_offset = row if row else (None, 0)
+    return {'anchor': anchor, 'scroll_offset': scroll_offset or 0, 'clicked': clicked}
+
+
+def clear_checkpoint():
+    conn = sqlite3.connect(config.DB_PATH)
+    conn.execute(CLEAR_CHECKPOINT_SQL)
+    conn.execute(CLEAR_CLICKED_SQL)
+    conn.commit()
+    conn.close()
+
+
+def get_dump_index():
+    """Return [(fingerprint, name, digests)] for every archived capture."""
+    conn = sqlite3.connect(config.DB_PATH)
+    rows = conn.execute("SELECT fingerprint, name, digests FROM dump_index ORDER BY captured_at").fetchall()
+    conn.close()
+    return rows
+
+
+ATTENDEE_FIELDS = ('name', 'job_title', 'company', 'industry', 'job_function', 'operates_in')
+
+
+def _produced_row(existing, names, fingerprint, old_name):
+    # Key of the row a capture saved as old_name: the list item's key when the names agree,
+    # else the only row of that name
+    if old_name is None:
+        return None
+    key = row_identity(old_name, None, None, fingerprint)
+    if key in existing:
+        return key
+    keys = names.get(old_name, ())
+    return keys[0] if len(keys) == 1 else None
+
+
+def upsert_reextracted(results):
+    """
+    Write re-extracted rows. results is [(fingerprint, old_name, data)]:
+    the row the capture produced is updated in place (renamed if the name
+    rule now reads a different name), captures that never produced a row
+    are inserted. Returns a Counter of updated/unchanged/inserted/conflicts.
+    """
+    stats = Counter()
+    conn = _connect(config.DB_PATH)
+    conn.row_factory = sqlite3.Row
+    columns = ', '.join(ATTENDEE_FIELDS)
+    existing = {row[0]: tuple(row)[1:] for row in conn.execute(f"SELECT identity, {columns} FROM attendees")}
+    names = {}
+    for key, row in existing.items():
+        names.setdefault(row[0], []).append(key)
+
+    try:
+        for fingerprint, old_name, data in results:
+            new = tuple(data[field] for field in ATTENDEE_FIELDS)
+            if not data['name']:
+                stats['no_name'] += 1
+                continue
+            key = row_identity(data['name'], data['job_title'], data['company'], fingerprint)
+            old_key = _produced_row(existing, names, fingerprint, old_name)
+
+            try:
+                if old_key is not None:
+                    if existing[old_key] == new and old_key == key:
+                        stats['unchanged'] += 1
+                        continue
+                    conn.execute("""
+                        UPDATE attendees SET identity = ?, name = ?, job_title = ?, company = ?, industry = ?,
+                                             job_function = ?, operates_in = ?
+                        WHERE identity = ?
+                    """, (key,) + new + (old_key,))
+                    stats['updated'] += 1
+                    del existing[old_key]
+                    names[old_name].remove(old_key)
+                elif key in existing:
+                    stats['unchanged'] += 1
+                    continue
+                else:
+                    conn.execute(INSERT_ATTENDEE_SQL, (key,) + new + (datetime.now(),))
+                    stats['inserted'] += 1
+            except sqlite3.IntegrityError:
+                # The new key belongs to another row already
+                stats['conflicts'] += 1
+                continue
+
+            existing[key] = new
+            names.setdefault(data['name'], []).append(key)
+            conn.execute("UPDATE dump_index SET name = ? WHERE fingerprint = ?", (data['name'], fingerprint))
+        conn.commit()
+    finally:
+        conn.close()
+    return stats
+
+
+EXPORT_COLUMNS = ('id', 'name', 'job_title', 'company', 'industry', 'job_function', 'operates_in', 'scraped_at')
+
+
+def attendee_filter(industry=None, company=None, country=None, since=None, until=None):
+    """
+    WHERE clause and params for the export/query filters: industry is an
+    exact match, company a substring, country one of the operates_in
+    entries, since/until bound scraped_at ("YYYY-MM-DD[ HH:MM[:SS]]").
+    """
+    clauses, params = [], []
+    if industry:
+        clauses.append("industry = ?")
+        params.append(industry)
+    if company:
+        clauses.append("company LIKE ?")
+        params.append(f"%{company}%")
+    if country:
+        clauses.append("id IN (SELECT attendee_id FROM attendee_countries"
+                       " WHERE country_id = (SELECT id FROM countries WHERE name = ?))")
+        params.append(country)
+    if since:
+        clauses.append("scraped_at >= ?")
+        params.append(since.replace('T', ' '))
+    if until:
+        clauses.append("scraped_at < ?")
+        params.append(until.replace('T', ' '))
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+    return where, params
+
+
+def iter_attendee_chunks(chunk_size=None, db_path=None, **filters):
+    """
+    Yield matching attendees as lists of EXPORT_COLUMNS tuples, chunk_size
+    rows at a time, straight off the cursor: memory stays flat however
+    large the table is.
+    """
+    where, params = attendee_filter(**filters)
+    conn = sqlite3.connect(db_path or config.DB_PATH)
+    try:
+        cursor = conn.execute(f"SELECT {', '.join(EXPORT_COLUMNS)} FROM attendees{where} ORDER BY id", params)
+        while True:
+            rows = cursor.fetchmany(chunk_size or config.EXPORT_CHUNK_SIZE)
+            if not rows:
+                break
+            yield rows
+    finally:
+        conn.close()
+
+
+def iter_attendees(**filters):
+    """Matching attendees one dict at a time (see iter_attendee_chunks)."""
+    for rows in iter_attendee_chunks(**filters):
+        for row in rows:
+            yield dict(zip(EXPORT_COLUMNS, row))
+
+
+_SELECT_ATTENDEES = f"SELECT {', '.join(f'a.{c}' for c in EXPORT_COLUMNS)} FROM attendees a"
+
+
+def _query(sql, params, conn=None):
+    # Callers doing many lookups pass their own connection; opening one costs more than the query
+    if conn is not None:
+        return [dict(zip(EXPORT_COLUMNS, row)) for row in conn.execute(sql, params)]
+    conn = sqlite3.connect(config.DB_PATH)
+    try:
+        return [dict(zip(EXPORT_COLUMNS, row)) for row in conn.execute(sql, params)]
+    finally:
+        conn.close()
+
+
+def find_by_country(country, limit=100, conn=None):
+    """Attendees operating in country (exact name), oldest first."""
+    return _query(f"""
+        {_SELECT_ATTENDEES}
+        JOIN attendee_countries ac ON ac.attendee_id = a.id
+        WHERE ac.country_id = (SELECT id FROM countries WHERE name = ?)
+        ORDER BY ac.attendee_id LIMIT ?
+    """, (country, limit), conn)
+
+
+def find_by_industry(industry, limit=100, conn=None):
+    return _query(f"{_SELECT_ATTENDEES} WHERE a.industry = ? ORDER BY a.id LIMIT ?", (industry, limit), conn)
+
+
+def find_by_job_function(job_function, limit=100, conn=None):
+    return _query(f"{_SELECT_ATTENDEES} WHERE a.job_function = ? ORDER BY a.id LIMIT ?",
+                  (job_function, limit), conn)
+
+
+def find_by_company(company, limit=100, conn=None):
+    return _query(f"{_SELECT_ATTENDEES} WHERE a.company = ? ORDER BY a.id LIMIT ?", (company, limit), conn)
+
+
+def search_attendees(query, limit=50, conn=None, ranked=True):
+    """
+    Full-text search over name, job title and company, best match first.
+    query uses FTS5 syntax: words are ANDed, "quoted phrases", prefix*.
+    Ranking scores every match; with ranked=False the first matches in
+    table order come back, which stays fast for very common words.
+    """
+    order = "f.rank" if ranked else "f.rowid"
+    return _query(f"""
+        {_SELECT_ATTENDEES}
+        JOIN attendees_fts f ON f.rowid = a.id
+        WHERE attendees_fts MATCH ?
+        ORDER BY {order} LIMIT ?
+    """, (query, limit), conn)
+
+
+def get_countries():
+    """[(country, attendee count)], most common first."""
+    return get_top('country', limit=None)
+
+
+TOP_SQL = "SELECT value, attendees FROM attendee_stats WHERE dimension = ? ORDER BY attendees DESC LIMIT ?"
+PROGRESS_SQL = f"SELECT {', '.join(PROGRESS_FIELDS)} FROM attendee_progress WHERE id = 1"
+
+
+def _read(sql, params, conn, db_path):
+    if conn is not None:
+        return conn.execute(sql, params).fetchall()
+    conn = sqlite3.connect(db_path or config.DB_PATH)
+    try:
+        return conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+
+
+def get_top(dimension, limit=10, conn=None, db_path=None):
+    """
+    [(value, attendee count)] of the most common values of dimension
+    (one of STAT_DIMENSIONS), read from attendee_stats: an index range
+    read, however many attendees there are. limit=None returns them all.
+    """
+    if dimension not in STAT_DIMENSIONS:
+        raise ValueError(f"Unknown breakdown '{dimension}' (use one of {', '.join(STAT_DIMENSIONS)})")
+    return _read(TOP_SQL, (dimension, -1 if limit is None else limit), conn, db_path)
+
+
+def get_breakdowns(limit=10, conn=None, db_path=None):
+    """{dimension: get_top(dimension, limit)} for every breakdown."""
+    if conn is None:
+        conn = sqlite3.connect(db_path or config.DB_PATH)
+        try:
+            return get_breakdowns(limit, conn)
+        finally:
+            conn.close()
+    return {dimension: get_top(dimension, limit, conn) for dimension in STAT_DIMENSIONS}
+
+
+def get_progress(conn=None, db_path=None):
+    """
+    Live counters from attendee_progress: attendees, how many have an
+    industry, job function, company and countries, and the last scraped_at.
+    One row read, cheap enough to poll while a scrape is writing.
+    """
+    row = _read(PROGRESS_SQL, (), conn, db_path)
+    return dict(zip(PROGRESS_FIELDS, row[0] if row else (0,) * (len(PROGRESS_FIELDS) - 1) + (None,)))
+
+
+def check_stats(db_path=None):
+    """
+    Compare attendee_stats and attendee_progress with a full recount.
+    Returns [(dimension, value, stored, actual)] for every difference,
+    dimension 'progress' for the counters; empty when they agree.
+    """
+    conn = sqlite3.connect(db_path or config.DB_PATH)
+    try:
+        stored = {(d, v): n for d, v, n in conn.execute("SELECT dimension, value, attendees FROM attendee_stats")}
+        actual = {(d, v): n for d, v, n in conn.execute(ACTUAL_STATS_SQL)}
+        stored_progress = get_progress(conn)
+        actual_progress = dict(zip(PROGRESS_FIELDS, conn.execute(ACTUAL_PROGRESS_SQL).fetchone()))
+    finally:
+        conn.close()
+
+    diffs = [key + (stored.get(key, 0), actual.get(key, 0)) for key in sorted(stored.keys() | actual.keys())
+             if stored.get(key, 0) != actual.get(key, 0)]
+    # last_scraped_at only moves forward (deletes keep it), so it is not a drift
+    diffs += [('progress', field, stored_progress[field], actual_progress[field]) for field in PROGRESS_FIELDS[:-1]
+              if stored_progress[field] != actual_progress[field]]
+    return diffs
+
+
+def rebuild_stats(db_path=None):
+    """Recount attendee_stats and attendee_progress from the attendees in one transaction."""
+    conn = sqlite3.connect(db_path or config.DB_PATH)
+    try:
+        conn.executescript(f"BEGIN IMMEDIATE; {REBUILD_STATS_SQL} COMMIT;")
+    finally:
+        conn.close()
+
+
 def get_all_attendees():
     conn = sqlite3.connect(config.DB_PATH)
     conn.row_factory = sqlite3.Row
@@ -76,10 +752,281 @@ def get_all_attendees():
     return [dict(row) for row in rows]
 
 
-def get_attendee_count():
-    conn = sqlite3.connect(config.DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) FROM attendees")
-    count = cursor.fetchone()[0]
-    conn.close()
-    return count
+def get_attendee_count(db_path=None):
+    return get_progress(db_path=db_path)['attendees']
+
+
+def _connect(db_path):
+    conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def _ticket(list_summary):
+    summary = parse_list_summary(list_summary) if list_summary else None
+    return summary['ticket'] if summary else None
+
+
+_STOP = object()
+_FLUSH_DUE = object()
+
+
+class AttendeeStore:
+    """
+    Long-lived store for the scrape path.
+
+    Reads share one WAL connection. Writes are queued and committed in
+    batches with executemany by a background thread, flushed when the batch
+    is full or DB_FLUSH_INTERVAL has passed, so callers never wait on fsync.
+    All SQL lives in module constants so sqlite3's statement cache reuses
+    the prepared statements.
+    """
+
+    def __init__(self, db_path=None, batch_size=None, flush_interval=None, refresh=False):
+        self.db_path = db_path or config.DB_PATH
+        self.batch_size = batch_size or config.DB_BATCH_SIZE
+        self.flush_interval = flush_interval if flush_interval is not None else config.DB_FLUSH_INTERVAL
+        self.refresh_mode = refresh
+
+        self._read_conn = _connect(self.db_path)
+        self._read_lock = threading.Lock()
+
+        # Every stored identity key, so dedup checks before a click never touch disk.
+        # Refresh mode keeps the stored fields too, to compare list summaries and detail pages,
+        # and the keys under each name stored before the run, to follow an attendee whose title or
+        # company changed
+        self._rows = get_attendee_rows(self.db_path) if refresh else {}
+        self._known = set(self._rows) if refresh else get_attendee_identities(self.db_path)
+        self._names = {}
+        for key, row in self._rows.items():
+            self._names.setdefault(row['name'], set()).add(key)
+        self._known_lock = threading.Lock()
+        self.updated = 0  # Attendees refresh() changed since the store was opened
+
+        self._queue = queue.Queue()
+        self._pending = set()  # Keys queued but not committed yet
+        self._pending_lock = threading.Lock()
+        self.saved = 0  # Attendees accepted by save() since the store was opened
+
+        self._writer = threading.Thread(target=self._write_loop, name="db-writer", daemon=True)
+        self._writer.start()
+
+    # -- reads --------------------------------------------------------------
+
+    def exists(self, identity):
+        with self._known_lock:
+            return identity in self._known
+
+    def stored_row(self, identity):
+        """Stored name, fields and list summary of a key (refresh mode only), or None."""
+        with self._known_lock:
+            row = self._rows.get(identity)
+            return dict(row) if row is not None else None
+
+    def _moved(self, name, identity, list_summary):
+        # Refresh mode: the stored key of an attendee now listed under another key. A name alone is
+        # no evidence (a namesake at another company is a new attendee): the stored list summary must
+        # show the same ticket too, and only one stored row may match
+        ticket = _ticket(list_summary)
+        keys = self._names.get(name, ())
+        if not ticket or identity in keys:
+            return None
+        matches = [key for key in keys if _ticket(self._rows[key]['list_summary']) == ticket]
+        return matches[0] if len(matches) == 1 else None
+
+    @property
+    def known_count(self):
+        with self._known_lock:
+            return len(self._known)
+
+    def count(self):
+        with self._read_lock:
+            committed = self._read_conn.execute("SELECT attendees FROM attendee_progress").fetchone()[0]
+        with self._pending_lock:
+            return committed + len(self._pending)
+
+    # -- writes -------------------------------------------------------------
+
+    def save(self, name, job_title, company, industry, job_function, operates_in, list_summary=None):
+        """
+        Queue a new attendee, keyed by identity.row_identity. Returns False if
+        the key is already stored or queued (in refresh mode, also when the
+        attendee is stored under an older key with the same name and ticket:
+        refresh() moves that row). A namesake under another key is saved.
+        """
+        key = row_identity(name, job_title, company, list_summary)
+        with self._known_lock:
+            if key in self._known:
+                return False
+            if self.refresh_mode:
+                if self._moved(name, key, list_summary) is not None:
+                    return False
+                # Not added to _names: an attendee first seen this run is never the one who moved
+                self._rows[key] = dict(name=name, job_title=job_title, company=company, industry=industry,
+                                       job_function=job_function, operates_in=operates_in,
+                                       list_summary=list_summary)
+            self._known.add(key)
+            self.saved += 1
+        with self._pending_lock:
+            self._pending.add(key)
+
+        params = (key, name, job_title, company, industry, job_function, operates_in, datetime.now(),
+                  list_summary)
+        self._queue.put((QUEUED_INSERT_ATTENDEE_SQL, params, key))
+        return True
+
+    def refresh(self, data, list_summary=None):
+        """
+        Queue an update of the fields of a stored attendee that differ from
+        data, with one attendee_changes row per field. A field the detail
+        page did not show (None) keeps its stored value. Returns the list of
+        (field, old, new) changes.
+        """
+        name = data['name']
+        key = row_identity(name, data['job_title'], data['company'], list_summary)
+        now = datetime.now()
+        with self._known_lock:
+            old_key = key if key in self._rows else self._moved(name, key, list_summary)
+            row = self._rows.get(old_key)
+            if row is None:
+                return []
+            changes = [(field, row[field], data[field]) for field in REFRESH_FIELDS
+                       if data[field] is not None and data[field] != row[field]]
+            for field, _, new in changes:
+                row[field] = new
+            summary_moved = list_summary is not None and list_summary != row['list_summary']
+            if summary_moved:
+                row['list_summary'] = list_summary
+            if old_key != key:
+                # Listed under a new title or company: the row takes the new key
+                self._rows[key] = self._rows.pop(old_key)
+                self._known.discard(old_key)
+                self._known.add(key)
+                self._names[name].discard(old_key)
+                self._names[name].add(key)
+            if changes:
+                self.updated += 1
+
+        if changes:
+            fields = [field for field, _, _ in changes]
+            params = tuple(new for _, _, new in changes) + (list_summary or row['list_summary'], now, key, old_key)
+            self.execute_later(_update_fields_sql(fields), params)
+            for field, old, new in changes:
+                self.execute_later(RECORD_CHANGE_SQL, (field, old, new, now, key))
+        elif summary_moved or old_key != key:
+            # Same fields behind a new summary: remember it so the next refresh skips this row
+            self.execute_later(SET_LIST_SUMMARY_SQL, (row['list_summary'], key, old_key))
+        return changes
+
+    def save_checkpoint(self, anchor, scroll_offset):
+        self.execute_later(SAVE_CHECKPOINT_SQL, (anchor, scroll_offset, datetime.now()))
+
+    def clear_checkpoint(self):
+        self.execute_later(CLEAR_CHECKPOINT_SQL, ())
+        self.execute_later(CLEAR_CLICKED_SQL, ())
+
+    def mark_clicked(self, identity):
+        self.execute_later(MARK_CLICKED_SQL, (identity,))
+
+    def index_dumps(self, fingerprint, name, digests):
+        self.execute_later(INDEX_DUMPS_SQL, (fingerprint, name, digests, datetime.now()))
+
+    def execute_later(self, sql, params):
+        """Queue any other write so it is batched with the attendee inserts."""
+        self._queue.put((sql, params, None))
+
+    def flush(self, timeout=None):
+        """Block until everything queued so far is committed."""
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        self._queue.put(_STOP)
+        self._writer.join()
+        with self._read_lock:
+            self._read_conn.close()
+
+    # -- writer thread ------------------------------------------------------
+
+    def _write_loop(self):
+        conn = _connect(self.db_path)
+        batch = []
+        deadline = None
+
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = _FLUSH_DUE
+
+            if item is _STOP:
+                self._commit(conn, batch)
+                break
+            if item is _FLUSH_DUE or isinstance(item, threading.Event):
+                self._commit(conn, batch)
+                batch, deadline = [], None
+                if item is not _FLUSH_DUE:
+                    item.set()
+                continue
+
+            batch.append(item)
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+            if len(batch) >= self.batch_size:
+                self._commit(conn, batch)
+                batch, deadline = [], None
+
+        conn.close()
+
+    def _commit(self, conn, batch):
+        if not batch:
+            return
+        try:
+            with timer('db_write'):
+                # Consecutive writes with the same statement go out as one executemany
+                for sql, group in groupby(batch, key=lambda item: item[0]):
+                    conn.executemany(sql, [params for _, params, _ in group])
+                conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.warning(f"Batch write of {len(batch)} rows failed ({e}), retrying row by row")
+            self._commit_rows(conn, batch)
+        finally:
+            with self._pending_lock:
+                for _, _, key in batch:
+                    self._pending.discard(key)
+
+    def _commit_rows(self, conn, batch):
+        # A failed statement only undoes itself, so the rest of the batch still commits. A dropped
+        # attendee is forgotten again, so a later sighting (or run) saves it anew
+        for sql, params, key in batch:
+            try:
+                conn.execute(sql, params)
+            except sqlite3.Error as e:
+                logger.error(f"Write dropped ({e}): {params}")
+                if key is not None:
+                    self._forget(key)
+        try:
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.error(f"Batch write of {len(batch)} rows failed: {e}")
+            for _, _, key in batch:
+                if key is not None:
+                    self._forget(key)
+
+    def _forget(self, key):
+        with self._known_lock:
+            if key in self._known:
+                self._known.discard(key)
+                self.saved -= 1
+            row = self._rows.pop(key, None)
+            if row is not None:
+                self._names.get(row['name'], set()).discard(key)
+
+
+def open_store(db_path=None):
+    return AttendeeStore(db_path or config.DB_PATH, refresh=config.REFRESH_MODE)
@@ -0,0 +1,108 @@
+"""
+Streaming export
+
+Writes attendees to CSV, JSONL or Parquet chunk by chunk from an SQLite
+cursor, so memory stays flat whether the table has 1k or 1M rows.
+Parquet needs pyarrow (optional, see requirements.txt).
+
+Usage:
+    python export.py attendees.csv
+    python export.py attendees.jsonl --industry "Real Estate / PropTech"
+    python export.py attendees.parquet --country India --since 2025-01-01
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+import time
+
+import config
+from database import EXPORT_COLUMNS, iter_attendee_chunks
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ('csv', 'jsonl', 'parquet')
+
+
+def _write_csv(chunks, path):
+    rows = 0
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(EXPORT_COLUMNS)
+        for chunk in chunks:
+            writer.writerows(chunk)
+            rows += len(chunk)
+    return rows
+
+
+def _write_jsonl(chunks, path):
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+    rows = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for chunk in chunks:
+            f.write(''.join(encode(dict(zip(EXPORT_COLUMNS, row))) + '\n' for row in chunk))
+            rows += len(chunk)
+    return rows
+
+
+def _write_parquet(chunks, path):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export needs pyarrow: pip install pyarrow")
+
+    schema = pa.schema([('id', pa.int64())] + [(column, pa.string()) for column in EXPORT_COLUMNS[1:]])
+    rows = 0
+    # One row group per chunk
+    with pq.ParquetWriter(path, schema) as writer:
+        for chunk in chunks:
+            columns = list(zip(*chunk))
+            arrays = [pa.array(values, type=field.type) for values, field in zip(columns, schema)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            rows += len(chunk)
+    return rows
+
+
+WRITERS = {'csv': _write_csv, 'jsonl': _write_jsonl, 'parquet': _write_parquet}
+
+
+def export(path, fmt=None, chunk_size=None, db_path=None, **filters):
+    """Export matching attendees to path. fmt defaults to the file extension. Returns rows written."""
+    fmt = fmt or os.path.splitext(path)[1].lstrip('.').lower()
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown export format '{fmt}' (use one of {', '.join(FORMATS)})")
+    chunks = iter_attendee_chunks(chunk_size=chunk_size, db_path=db_path, **filters)
+    return WRITERS[fmt](chunks, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export attendees without loading them all into memory")
+    parser.add_argument('output', help="Output file (.csv, .jsonl or .parquet)")
+    parser.add_argument('--format', choices=FORMATS, help="Defaults to the output extension")
+    parser.add_argument('--industry', help="Exact industry")
+    parser.add_argument('--company', help="Company contains")
+    parser.add_argument('--country', help="One of the 'Operates in' countries")
+    parser.add_argument('--since', help="Scraped at or after (YYYY-MM-DD[ HH:MM])")
+    parser.add_argument('--until', help="Scraped before (YYYY-MM-DD[ HH:MM])")
+    parser.add_argument('--chunk-size', type=int, default=config.EXPORT_CHUNK_SIZE)
+    parser.add_argument('--db', default=config.DB_PATH)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+
+    start = time.perf_counter()
+    try:
+        rows = export(args.output, fmt=args.format, chunk_size=args.chunk_size, db_path=args.db,
+                      industry=args.industry, company=args.company, country=args.country,
+                      since=args.since, until=args.until)
+    except (ValueError, RuntimeError) as e:
+        logger.error(str(e))
+        sys.exit(1)
+    logger.info(f"Exported {rows} attendees to {args.output} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
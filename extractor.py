@@ -1,130 +1,307 @@
-import xml.etree.ElementTree as ET
 import logging
 import time
 import config
+import hierarchy
+from hierarchy import parse_bounds
+from rules import detail_rules
+from waits import changed_and_settled, wait_for
 
 logger = logging.getLogger(__name__)
 
 
-def extract_from_detail_page(device):
-    time.sleep(config.PAGE_LOAD_TIMEOUT)
+def text_nodes(xml):
+    """Return (text, top, bottom) for every non-empty app TextView, in dump order."""
+    nodes = []
+    for node in hierarchy.parse(xml):
+        if node.cls == 'android.widget.TextView':
+            text = node.text.strip()
+            if text:
+                nodes.append((text, node.bounds[1], node.bounds[3]))
+    return nodes
+
+
+def _field_labels():
+    return [config.FIELD_LABEL_INDUSTRY, config.FIELD_LABEL_JOB_FUNCTION,
+            config.FIELD_LABEL_OPERATES_IN]
+
+
+def _scan_fields(nodes):
+    """
+    Check which field labels have their value fully on screen.
+    Returns (complete_labels, top of the highest incomplete label or None).
+    """
+    labels = set(_field_labels())
+    footer = set(config.DETAIL_FOOTER_TEXTS)
+
+    # Anything below the sticky footer is hidden behind it
+    fold = max((bottom for _, _, bottom in nodes), default=0)
+    for text, top, _ in nodes:
+        if text in footer:
+            fold = min(fold, top)
+
+    complete = set()
+    incomplete_top = None
+    for i, (text, top, _) in enumerate(nodes):
+        if text not in labels:
+            continue
+
+        values = []
+        ended_by_label = False
+        for value, value_top, value_bottom in nodes[i + 1:]:
+            if value in labels:
+                ended_by_label = True
+                break
+            if value in footer:
+                break
+            values.append((value_top, value_bottom))
+            if text != config.FIELD_LABEL_OPERATES_IN:
+                break  # Single value fields
+
+        if values:
+            last_top, last_bottom = values[-1]
+            line_height = last_bottom - last_top
+            if text != config.FIELD_LABEL_OPERATES_IN:
+                done = last_bottom <= fold
+            else:
+                # Countries wrap over several rows, so only trust the list once
+                # the next label or a full empty row below it is visible
+                done = ended_by_label or last_bottom + line_height <= fold
+            if done:
+                complete.add(text)
+                continue
+
+        if incomplete_top is None or top < incomplete_top:
+            incomplete_top = top
+
+    return complete, incomplete_top
+
+
+def is_detail_page(xml):
+    markers = set(config.DETAIL_FOOTER_TEXTS) | set(_field_labels())
+    return any(text in markers for text, _, _ in text_nodes(xml))
+
+
+def is_list_page(xml):
+    return bool(extract_list_items(xml))
+
+
+def list_fingerprint(xml):
+    items = extract_list_items(xml)
+    return tuple(item['content_desc'] for item in items) if items else ()
+
+
+def detail_fingerprint(xml):
+    return tuple(text_nodes(xml))
+
+
+def _capture_fixed(device, stats, xml):
+    # Top of the page first (name, job title, company)
+    if xml is None:
+        xml = device.dump_hierarchy()
+    stats['dumps'] += 1
+    dumps = [xml]
+
+    for _ in range(2):
+        # Gentle scroll to see Industry/Job Function/Operates in (don't scroll too much!)
+        device.swipe(500, 1400, 500, 1000, duration=0.3)  # Small scroll (400px)
+        stats['swipes'] += 1
+        time.sleep(0.3)
+
+        dumps.append(device.dump_hierarchy())
+        stats['dumps'] += 1
+
+    return dumps
+
+
+def _capture_early_stop(device, stats, xml):
+    dumps = []
+    seen = set()
+    complete = set()
+    labels = set(_field_labels())
+
+    if xml is None:
+        xml = device.dump_hierarchy()
+
+    swipes = 0
+    while True:
+        nodes = text_nodes(xml)
+        dumps.append(xml)
+        stats['dumps'] += 1
+
+        new_texts = 0
+        for text, _, _ in nodes:
+            if text not in seen:
+                seen.add(text)
+                new_texts += 1
 
-    # Extract texts from top first (to get name, job title, company)
-    xml = device.dump_hierarchy()
-    root = ET.fromstring(xml)
+        done, incomplete_top = _scan_fields(nodes)
+        complete |= done
+        if complete >= labels:
+            stats['complete'] = True
+            break
+
+        # Scrolling revealed nothing new: bottom of the page, some fields are missing
+        if swipes and not new_texts:
+            break
+        if swipes >= config.DETAIL_MAX_SWIPES:
+            break
+
+        if incomplete_top is not None:
+            # Bring the incomplete label up just far enough for its value to show
+            distance = incomplete_top - config.DETAIL_SCROLL_TARGET_Y
+        else:
+            distance = config.DETAIL_SWIPE_MAX
+        distance = max(config.DETAIL_SWIPE_MIN, min(config.DETAIL_SWIPE_MAX, distance))
+
+        start_y = config.DETAIL_SWIPE_START_Y
+        device.swipe(config.DETAIL_SWIPE_X, start_y,
+                     config.DETAIL_SWIPE_X, start_y - distance, duration=0.3)
+        stats['swipes'] += 1
+        swipes += 1
+
+        # The page follows the finger, so the first dump after the swipe shows whether it moved.
+        # Waiting for a change that never comes would spend the whole budget on every short page
+        moved = device.dump_hierarchy()
+        if detail_fingerprint(moved) == tuple(nodes):
+            break  # Page did not move: we are at the bottom
+
+        # The dump that shows the scroll has settled is the next one we read
+        settled = changed_and_settled(detail_fingerprint, tuple(nodes))
+        settled(moved)
+        xml = wait_for(device, 'detail_scroll', settled)
+        if xml is None:
+            xml = moved  # Still moving when the budget ran out: read what it showed
 
+    return dumps
+
+
+def capture_detail_page(device, stats=None, xml=None):
+    """
+    Scroll through the open detail page and return the raw dumps needed
+    to read every field, top of the page first. Only the device work
+    happens here; extract_from_dumps turns the dumps into fields.
+    Pass the dump that showed the page had loaded as xml to reuse it.
+    If a stats dict is passed it is filled with the number of dumps and
+    swipes this attendee cost and whether every field label was found.
+    """
+    if stats is None:
+        stats = {}
+    stats.update(dumps=0, swipes=0, complete=False)
+
+    if xml is None:
+        time.sleep(config.PAGE_LOAD_TIMEOUT)
+
+    if config.EARLY_STOP_EXTRACTION:
+        return _capture_early_stop(device, stats, xml)
+    return _capture_fixed(device, stats, xml)
+
+
+def detail_texts(dumps):
+    """Unique texts of a scrolled detail page, in reading order."""
     all_texts = []
-    for elem in root.iter():
-        if elem.get('class') == 'android.widget.TextView':
-            text = elem.get('text', '').strip()
-            if text:
+    seen = set()
+    for xml in dumps:
+        for text, _, _ in text_nodes(xml):
+            if text not in seen:
+                seen.add(text)
                 all_texts.append(text)
+    return all_texts
 
-    logger.debug(f"Texts before scroll (first 15): {all_texts[:15]}")
 
-    # Gentle scroll to see Industry/Job Function/Operates in (don't scroll too much!)
-    device.swipe(500, 1400, 500, 1000, duration=0.3)  # Small scroll (400px)
-    time.sleep(0.3)
+def detail_name(xml):
+    """Attendee name from the top of a detail page dump, or None."""
+    return parse_detail_texts([text for text, _, _ in text_nodes(xml)])['name']
 
-    # Extract after scroll
-    xml = device.dump_hierarchy()
-    root = ET.fromstring(xml)
 
-    for elem in root.iter():
-        if elem.get('class') == 'android.widget.TextView':
-            text = elem.get('text', '').strip()
-            if text and text not in all_texts:
-                all_texts.append(text)
+def extract_from_dumps(dumps):
+    all_texts = detail_texts(dumps)
+    logger.debug(f"Total texts collected: {len(all_texts)} from {len(dumps)} dumps")
+    return parse_detail_texts(all_texts)
 
-    # Second small scroll
-    device.swipe(500, 1400, 500, 1000, duration=0.3)  # Small scroll (400px)
-    time.sleep(0.3)
 
-    # Extract again after second scroll
-    xml = device.dump_hierarchy()
-    root = ET.fromstring(xml)
+def extract_from_detail_page(device, stats=None, xml=None):
+    """Extract attendee fields from the open detail page (capture + extract in one go)."""
+    return extract_from_dumps(capture_detail_page(device, stats, xml))
 
-    for elem in root.iter():
-        if elem.get('class') == 'android.widget.TextView':
-            text = elem.get('text', '').strip()
-            if text and text not in all_texts:
-                all_texts.append(text)
 
-    logger.debug(f"Total texts collected: {len(all_texts)}")
-    
-    # Initialize data
-    data = {
-        'name': None,
-        'job_title': None,
-        'company': None,
-        'industry': None,
-        'job_function': None,
-        'operates_in': None
+def parse_detail_texts(all_texts):
+    """Apply the compiled config.DETAIL_FIELD_RULES to a detail page's ordered texts."""
+    return detail_rules().apply(all_texts)
+
+
+def extract_list_items(xml):
+    """
+    Parse the attendee list from one hierarchy dump.
+    Returns a list of {'index', 'content_desc', 'bounds', 'center'} for every
+    list button whose center is on screen, or None if there is no list.
+    """
+    nodes = hierarchy.parse(xml)
+    container_class = config.LIST_CONTAINER_SELECTOR['className']
+    item_class = config.LIST_ITEM_SELECTOR['className']
+
+    containers = [i for i, node in enumerate(nodes) if node.cls == container_class]
+    if not containers:
+        return None
+
+    items = []
+    for container in containers:
+        _, list_top, _, list_bottom = nodes[container].bounds
+        for node in hierarchy.descendants(nodes, container):
+            if node.cls != item_class or not node.clickable:
+                continue
+            center = node.center
+            if not list_top <= center[1] < list_bottom:
+                continue  # Mostly scrolled off, a tap could hit the toolbar
+            items.append({
+                'index': len(items),
+                'content_desc': node.desc,
+                'bounds': node.bounds,
+                'center': center,
+            })
+    return items
+
+
+def parse_list_content_desc(content_desc):
+    """Name from a list button content-desc ("TITLE, NAME, ROLE\nCOMPANY"), or None."""
+    if content_desc:
+        # Split by comma to get parts
+        parts = content_desc.split(',')
+        if len(parts) >= 2:
+            # Second part is the name (before any newline)
+            return parts[1].strip().split('\n')[0].strip() or None
+    return None
+
+
+def parse_list_summary(content_desc):
+    """
+    Split a list button content-desc ("TITLE, NAME, ROLE\nCOMPANY") into
+    {'ticket', 'name', 'role', 'company'}, or None if it has no name.
+    """
+    name = parse_list_content_desc(content_desc)
+    if not name:
+        return None
+    head, _, company = content_desc.partition('\n')
+    parts = head.split(',')
+    return {
+        'ticket': parts[0].strip(),
+        'name': name,
+        'role': ','.join(parts[2:]).strip() or None,
+        'company': company.strip() or None,
     }
 
-    # Find name - look for proper name (2-4 words, letters and spaces)
-    skip_texts = ['Introduction', 'Interests', 'Chat', 'Suggest meeting',
-                  'Navigate up', 'Operates in', 'Industry', 'Job Function']
-
-    name_index = None
-    for i, text in enumerate(all_texts):
-        if (text not in skip_texts and
-            len(text) > 5 and
-            2 <= len(text.split()) <= 4 and
-            all(c.isalpha() or c.isspace() for c in text) and
-            data['name'] is None):
-            data['name'] = text
-            name_index = i
-            break
 
-    # Job title and Company come AFTER the name as separate TextViews
-    if name_index is not None:
-        # Job title is the next TextView after name
-        if name_index + 1 < len(all_texts):
-            job_title_candidate = all_texts[name_index + 1].strip()
-            # Make sure it's not a label or skip text
-            if job_title_candidate not in skip_texts and len(job_title_candidate) > 0:
-                data['job_title'] = job_title_candidate
-
-        # Company is the TextView after job title
-        if name_index + 2 < len(all_texts):
-            company_candidate = all_texts[name_index + 2].strip()
-            # Make sure it's not a label or skip text
-            if company_candidate not in skip_texts and len(company_candidate) > 0:
-                data['company'] = company_candidate
-
-
-    # Parse labeled fields
-    for i, text in enumerate(all_texts):
-        if text == config.FIELD_LABEL_INDUSTRY and i + 1 < len(all_texts):
-            next_text = all_texts[i + 1]
-            if next_text not in skip_texts:
-                data['industry'] = next_text
-
-        elif text == config.FIELD_LABEL_JOB_FUNCTION and i + 1 < len(all_texts):
-            next_text = all_texts[i + 1]
-            if next_text not in skip_texts:
-                data['job_function'] = next_text
-
-        elif text == config.FIELD_LABEL_OPERATES_IN and i + 1 < len(all_texts):
-            countries = []
-            j = i + 1
-            while j < len(all_texts):
-                next_text = all_texts[j]
-                if next_text in [config.FIELD_LABEL_INDUSTRY, config.FIELD_LABEL_JOB_FUNCTION]:
-                    break
-                if (next_text not in skip_texts and
-                    len(next_text) > 2 and
-                    all(c.isalpha() or c.isspace() for c in next_text)):
-                    countries.append(next_text)
-                j += 1
-                if len(countries) >= 5:
-                    break
-
-            if countries:
-                data['operates_in'] = ', '.join(countries)
-
-    return data
+def list_summary_changed(row, content_desc):
+    """
+    Whether a stored attendee row looks out of date next to its list
+    summary. Rows saved with their summary compare it verbatim; older rows
+    compare the role and company the list shows with the stored ones.
+    """
+    if row.get('list_summary'):
+        return row['list_summary'] != content_desc
+    summary = parse_list_summary(content_desc)
+    if summary is None:
+        return False
+    return (summary['role'], summary['company']) != (row.get('job_title'), row.get('company'))
 
 
 def extract_name_from_list(device, index):
@@ -143,14 +320,10 @@ def extract_name_from_list(device, index):
         
         logger.debug(f"Button {index} content-desc: {content_desc}")
         
-        if content_desc:
-            # Split by comma to get parts
-            parts = content_desc.split(',')
-            if len(parts) >= 2:
-                # Second part is the name (before any newline)
-                name = parts[1].strip().split('\n')[0].strip()
-                logger.debug(f"Parsed name from content-desc: {name}")
-                return name
+        name = parse_list_content_desc(content_desc)
+        if name:
+            logger.debug(f"Parsed name from content-desc: {name}")
+            return name
         
         # Fallback: try TextViews
         try:
@@ -0,0 +1,119 @@
+"""
+Fast parser for uiautomator hierarchy dumps.
+
+Instead of building a full ElementTree, the dump is scanned tag by tag
+and only nodes from config.APP_PACKAGE become records; the systemui
+status bar and navigation bar nodes are skipped without parsing their
+attributes. Shared by the detail extractor, the list harvester and page
+detection.
+
+Relies on the serializer escaping '>' inside attribute values, which
+uiautomator does.
+"""
+
+import html
+import re
+from functools import lru_cache
+import config
+from metrics import timer
+
+_TAG = re.compile(r'<(/?)node\b([^>]*)>')
+
+
+class Node:
+    """One app node. parent is the index of the nearest app ancestor, or -1."""
+
+    __slots__ = ('cls', 'text', 'desc', 'bounds', 'clickable', 'depth', 'parent')
+
+    def __init__(self, cls, text, desc, bounds, clickable, depth, parent):
+        self.cls = cls
+        self.text = text
+        self.desc = desc
+        self.bounds = bounds
+        self.clickable = clickable
+        self.depth = depth
+        self.parent = parent
+
+    @property
+    def center(self):
+        left, top, right, bottom = self.bounds
+        return ((left + right) // 2, (top + bottom) // 2)
+
+    def __repr__(self):
+        return f"Node({self.cls!r}, text={self.text!r}, desc={self.desc!r}, bounds={self.bounds})"
+
+
+def parse_bounds(bounds):
+    # "[left,top][right,bottom]" -> (left, top, right, bottom)
+    nums = bounds.replace('][', ',').strip('[]').split(',')
+    return tuple(int(n) for n in nums)
+
+
+def _attr(attrs, key):
+    start = attrs.find(key)
+    if start < 0:
+        return ''
+    start += len(key)
+    value = attrs[start:attrs.find('"', start)]
+    return html.unescape(value) if '&' in value else value
+
+
+@lru_cache(maxsize=16)
+def parse(xml, package=None):
+    """
+    Return the app's nodes in document order. The same dump is often read
+    twice (a wait condition, then the extractor), so results are cached:
+    treat the returned list as read-only.
+    """
+    with timer('parse'):
+        return _parse(xml, package)
+
+
+def _parse(xml, package):
+    marker = f'package="{package or config.APP_PACKAGE}"'
+    nodes = []
+    stack = []
+    parent = -1
+
+    for match in _TAG.finditer(xml):
+        if match.group(1):
+            parent = stack.pop()
+            continue
+
+        attrs = match.group(2)
+        index = parent
+        if marker in attrs:
+            bounds = _attr(attrs, ' bounds="')
+            nodes.append(Node(
+                _attr(attrs, ' class="'),
+                _attr(attrs, ' text="'),
+                _attr(attrs, ' content-desc="'),
+                parse_bounds(bounds) if bounds else (0, 0, 0, 0),
+                ' clickable="true"' in attrs,
+                len(stack),
+                parent,
+            ))
+            index = len(nodes) - 1
+
+        if not attrs.endswith('/'):
+            stack.append(parent)
+            parent = index
+
+    return tuple(nodes)
+
+
+def descendants(nodes, index):
+    """Nodes below nodes[index] (document order makes them a contiguous run)."""
+    inside = {index}
+    result = []
+    for i in range(index + 1, len(nodes)):
+        if nodes[i].parent not in inside:
+            break
+        inside.add(i)
+        result.append(nodes[i])
+    return result
+
+
+def texts(nodes, cls='android.widget.TextView'):
+    """Non-empty, stripped text of every node of class cls."""
+    return [node.text.strip() for node in nodes if node.cls == cls and node.text.strip()]
@@ -0,0 +1,50 @@
+"""
+Attendee identity
+
+A 64-bit key per attendee, hashed from their normalised name, job title
+and company as the list shows them ("TICKET, NAME, ROLE\nCOMPANY"). The
+ticket is left out, so a ticket change does not make a new attendee,
+while two people with the same name at different companies get
+different keys. The database makes the key unique (instead of the name),
+and runs keep sets of keys rather than content-desc strings.
+"""
+
+import hashlib
+import re
+import unicodedata
+from extractor import parse_list_summary
+
+_SPACES = re.compile(r'\s+')
+
+
+def normalize(value):
+    """Case, width and spacing differences do not make a different attendee."""
+    if not value:
+        return ''
+    return _SPACES.sub(' ', unicodedata.normalize('NFKC', value)).strip().casefold()
+
+
+def attendee_identity(name, job_title=None, company=None):
+    """Signed 64-bit key (an SQLite INTEGER) of name, job title and company."""
+    key = '\x1f'.join(normalize(value) for value in (name, job_title, company))
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'big', signed=True)
+
+
+def list_identity(content_desc):
+    """Key of a list item. Items without a name are keyed on their whole content-desc."""
+    summary = parse_list_summary(content_desc)
+    if summary is None:
+        return attendee_identity(content_desc)
+    return attendee_identity(summary['name'], summary['role'], summary['company'])
+
+
+def row_identity(name, job_title, company, list_summary=None):
+    """
+    Key of a row about to be saved. The list item it was opened from wins
+    over the detail page fields when its name agrees, so a title the list
+    shortens still matches the key the list is probed with next run.
+    """
+    summary = parse_list_summary(list_summary) if list_summary else None
+    if summary is not None and summary['name'] == name:
+        return attendee_identity(name, summary['role'], summary['company'])
+    return attendee_identity(name, job_title, company)
@@ -2,9 +2,12 @@ import os
 import sys
 import logging
 from utils import setup_logging
-from device import connect_device
+from session import open_session
 from database import init_db, get_attendee_count
 from scraper import run_scraper
+from parallel import run_parallel
+from watchlist import load_watchlist, run_watchlist
+from metrics import start_exporter
 import config
 
 logger = None
@@ -16,6 +19,7 @@ def main():
     # Setup logging with minimal output
     logger = setup_logging()
     logger.info("Scraper started")
+    exporter = start_exporter()
     
     try:
         # Create screenshot directory
@@ -24,12 +28,31 @@ def main():
         # Initialize database
         init_db()
         
-        # Connect to device and init
-        device = connect_device(config.DEVICE_SERIAL)
         initial_count = get_attendee_count()
-        
-        # Run scraper
-        scraped_count = run_scraper(device)
+
+        if config.WATCHLIST_FILE:
+            # Only the watchlist: one search per target instead of walking the whole list
+            targets = load_watchlist(config.WATCHLIST_FILE)
+            logger.info(f"Watchlist mode: {len(targets)} targets from {config.WATCHLIST_FILE}")
+            device = open_session(config.DEVICE_SERIAL)
+            try:
+                run_watchlist(device, targets)
+            finally:
+                device.close()
+            scraped_count = get_attendee_count() - initial_count
+        elif len(config.DEVICE_SERIALS) > 1:
+            # One worker per emulator, shared claims and a single DB writer
+            logger.info(f"Parallel mode: {len(config.DEVICE_SERIALS)} devices")
+            scraped_count = run_parallel(config.DEVICE_SERIALS)
+        else:
+            # Connect to device (reconnects on its own if the link drops) and init
+            device = open_session(config.DEVICE_SERIAL)
+
+            # Run scraper
+            try:
+                scraped_count = run_scraper(device)
+            finally:
+                device.close()
         
         # Final summary
         final_count = get_attendee_count()
@@ -42,6 +65,8 @@ def main():
     except Exception as e:
         logger.error(f"Fatal error: {e}", exc_info=True)
         sys.exit(1)
+    finally:
+        exporter.stop()
 
 
 if __name__ == "__main__":
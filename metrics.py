@@ -0,0 +1,185 @@
+"""
+Hot-path instrumentation
+
+Counts and latency percentiles per scrape phase (click, page_load, dump,
+parse, capture, extract, swipe, back, db_lookup, db_write), written periodically as JSON
+and Prometheus text by a background thread.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+import config
+from utils import LatencyWindow
+
+logger = logging.getLogger(__name__)
+
+
+class Metrics:
+    def __init__(self):
+        self._windows = {}
+        self._totals = Counter()
+        self._counters = Counter()
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def observe(self, phase, seconds):
+        with self._lock:
+            window = self._windows.get(phase)
+            if window is None:
+                window = self._windows[phase] = LatencyWindow(config.METRICS_WINDOW)
+            self._totals[phase] += seconds
+        window.add(seconds)
+
+    def incr(self, name, n=1):
+        with self._lock:
+            self._counters[name] += n
+
+    @contextmanager
+    def timer(self, phase):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(phase, time.perf_counter() - start)
+
+    def reset(self):
+        with self._lock:
+            self._windows.clear()
+            self._totals.clear()
+            self._counters.clear()
+            self.started_at = time.time()
+
+    def snapshot(self):
+        with self._lock:
+            windows = list(self._windows.items())
+            totals = dict(self._totals)
+            counters = dict(self._counters)
+        phases = {}
+        for phase, window in sorted(windows):
+            phases[phase] = {
+                'count': window.count,
+                'total_seconds': totals[phase],
+                'p50': window.percentile(50),
+                'p90': window.percentile(90),
+                'p99': window.percentile(99),
+            }
+        return {
+            'timestamp': time.time(),
+            'uptime_seconds': time.time() - self.started_at,
+            'phases': phases,
+            'counters': counters,
+        }
+
+    def to_prometheus(self, snapshot=None):
+        snapshot = snapshot or self.snapshot()
+        lines = ['# TYPE scraper_phase_seconds summary']
+        for phase, s in snapshot['phases'].items():
+            for key, quantile in (('p50', '0.5'), ('p90', '0.9'), ('p99', '0.99')):
+                lines.append(f'scraper_phase_seconds{{phase="{phase}",quantile="{quantile}"}} {s[key]:.6f}')
+            lines.append(f'scraper_phase_seconds_sum{{phase="{phase}"}} {s["total_seconds"]:.6f}')
+            lines.append(f'scraper_phase_seconds_count{{phase="{phase}"}} {s["count"]}')
+        lines.append('# TYPE scraper_events_total counter')
+        for name, value in sorted(snapshot['counters'].items()):
+            lines.append(f'scraper_events_total{{event="{name}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def write_snapshot(self, directory=None):
+        directory = directory or config.METRICS_DIR
+        os.makedirs(directory, exist_ok=True)
+        snapshot = self.snapshot()
+        _write_atomic(os.path.join(directory, 'metrics.json'), json.dumps(snapshot, indent=2))
+        _write_atomic(os.path.join(directory, 'metrics.prom'), self.to_prometheus(snapshot))
+        return snapshot
+
+
+def _write_atomic(path, text):
+    # Readers (dashboards, node_exporter textfile collector) never see half a file
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+class SnapshotExporter:
+    """Writes a metrics snapshot every METRICS_INTERVAL seconds from a background thread."""
+
+    def __init__(self, metrics, interval=None, directory=None):
+        self.metrics = metrics
+        self.interval = interval or config.METRICS_INTERVAL
+        self.directory = directory or config.METRICS_DIR
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-exporter", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.metrics.write_snapshot(self.directory)
+            except OSError as e:
+                logger.warning(f"Could not write metrics snapshot: {e}")
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.metrics.write_snapshot(self.directory)  # Final numbers
+
+
+class InstrumentedDevice:
+    """Device proxy that times every RPC the scraper makes."""
+
+    def __init__(self, device, metrics):
+        self._device = device
+        self._metrics = metrics
+
+    def dump_hierarchy(self, *args, **kwargs):
+        with self._metrics.timer('dump'):
+            return self._device.dump_hierarchy(*args, **kwargs)
+
+    def click(self, *args, **kwargs):
+        with self._metrics.timer('click'):
+            return self._device.click(*args, **kwargs)
+
+    def swipe(self, *args, **kwargs):
+        with self._metrics.timer('swipe'):
+            return self._device.swipe(*args, **kwargs)
+
+    def press(self, key, *args, **kwargs):
+        with self._metrics.timer('press'):
+            return self._device.press(key, *args, **kwargs)
+
+    def __call__(self, **selector):
+        self._metrics.incr('selector_queries')
+        return self._device(**selector)
+
+    def __getattr__(self, name):
+        return getattr(self._device, name)
+
+
+# Process-wide registry shared by every worker
+registry = Metrics()
+
+
+def timer(phase):
+    return registry.timer(phase)
+
+
+def incr(name, n=1):
+    registry.incr(name, n)
+
+
+def instrument(device):
+    if isinstance(device, InstrumentedDevice):
+        return device
+    return InstrumentedDevice(device, registry)
+
+
+def start_exporter():
+    return SnapshotExporter(registry).start()
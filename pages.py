@@ -0,0 +1,165 @@
+"""
+Page classifier and navigation back to the attendee list
+
+classify() labels a screen (events, list, detail, menu, home, unknown)
+from a single hierarchy dump using config.PAGE_SIGNATURES.
+recover_to_list() walks the NAVIGATION table from whatever page is
+showing: one tap or back press per step, each followed by a measured wait
+whose dump is classified for the next step, so no selector probes are
+needed. open_event() backs out to the event picker first and enters
+another event's attendee list from there.
+"""
+
+import logging
+import config
+import hierarchy
+from metrics import incr
+from waits import changed_and_settled, wait_for
+
+logger = logging.getLogger(__name__)
+
+LIST = 'list'
+DETAIL = 'detail'
+MENU = 'menu'
+HOME = 'home'
+EVENTS = 'events'
+UNKNOWN = 'unknown'
+
+# page -> (action, tap text, wait transition) that moves one step closer to the list
+NAVIGATION = {
+    DETAIL: ('back', None, 'back_to_list'),
+    MENU: ('tap', 'MENU_ATTENDEES_TEXT', 'navigate_list'),
+    HOME: ('tap', 'HOME_MENU_TEXT', 'navigate_menu'),
+}
+
+
+def _matches(nodes, rule):
+    classes = set(rule.get('classes', ()))
+    texts = set(rule.get('texts', ()))
+    return any(node.cls in classes or node.text.strip() in texts for node in nodes)
+
+
+def classify(xml):
+    """Label the screen in xml; the first matching signature wins."""
+    if not xml:
+        return UNKNOWN
+    nodes = hierarchy.parse(xml)
+    for page, rule in config.PAGE_SIGNATURES:
+        if _matches(nodes, rule):
+            return page
+    return UNKNOWN
+
+
+def _find_tap_target(xml, text):
+    for node in hierarchy.parse(xml):
+        if node.text.strip() == text and node.clickable:
+            return node.center
+    return None
+
+
+def recover_to_list(device, xml=None):
+    """
+    Navigate to the attendee list from the current screen. Pass the last
+    dump as xml if it is still current to skip the first dump. Returns
+    the list dump, or None if the page is unknown or a step failed.
+    """
+    if xml is None:
+        xml = device.dump_hierarchy()
+    page = classify(xml)
+
+    for _ in range(config.NAV_MAX_STEPS):
+        if page == LIST:
+            return xml
+        if page not in NAVIGATION:
+            logger.error("Unknown page state - cannot navigate to the attendee list")
+            return None
+
+        action, text_key, transition = NAVIGATION[page]
+        if action == 'back':
+            logger.info(f"On {page} page, pressing back...")
+            device.press("back")
+        else:
+            text = getattr(config, text_key)
+            target = _find_tap_target(xml, text)
+            if target is None:
+                logger.error(f"On {page} page but '{text}' is not tappable")
+                return None
+            logger.info(f"On {page} page, tapping '{text}'...")
+            device.click(*target)
+        incr('nav_steps')
+
+        next_xml = wait_for(device, transition, lambda dump: classify(dump) != page)
+        if next_xml is None:
+            logger.warning(f"Still on {page} page after {action}")
+            return None
+        xml, page = next_xml, classify(next_xml)
+
+    return xml if page == LIST else None
+
+
+def _labels(xml):
+    return tuple(node.text or node.desc for node in hierarchy.parse(xml))
+
+
+def _find_event(xml, event):
+    for node in hierarchy.parse(xml):
+        if node.text.strip() == event or node.desc.strip() == event:
+            return node.center
+    return None
+
+
+def _back_to_events(device, xml):
+    page = classify(xml)
+    for _ in range(config.NAV_MAX_STEPS + 1):
+        if page == EVENTS:
+            return xml
+        if page == UNKNOWN:
+            logger.error("Unknown page state - cannot navigate to the event picker")
+            return None
+        # Back press everywhere, unless the event home has its own way to the picker
+        target = None
+        if page == HOME and config.HOME_EVENTS_TEXT:
+            target = _find_tap_target(xml, config.HOME_EVENTS_TEXT)
+        if target is not None:
+            device.click(*target)
+        else:
+            device.press("back")
+        incr('nav_steps')
+        next_xml = wait_for(device, 'navigate_events', lambda dump: classify(dump) != page)
+        if next_xml is None:
+            logger.warning(f"Still on {page} page on the way to the event picker")
+            return None
+        xml, page = next_xml, classify(next_xml)
+    return xml if page == EVENTS else None
+
+
+def open_event(device, event):
+    """
+    Navigate from any page to the attendee list of event, as named in
+    the app's event picker. Returns the list dump, or None.
+    """
+    xml = _back_to_events(device, device.dump_hierarchy())
+    if xml is None:
+        return None
+
+    target = _find_event(xml, event)
+    for _ in range(config.EVENT_PICKER_SWIPES):
+        if target is not None:
+            break
+        device.swipe(*config.LIST_SWIPE, duration=0.3)
+        xml = wait_for(device, 'events_scroll', changed_and_settled(_labels, _labels(xml)))
+        if xml is None:
+            break  # Bottom of the picker
+        target = _find_event(xml, event)
+    if target is None:
+        logger.error(f"Event '{event}' is not in the event picker")
+        return None
+
+    logger.info(f"Opening event '{event}'...")
+    device.click(*target)
+    incr('nav_steps')
+    xml = wait_for(device, 'open_event', lambda dump: classify(dump) not in (EVENTS, UNKNOWN))
+    if xml is None:
+        logger.warning(f"Event '{event}' did not open")
+        return None
+    return recover_to_list(device, xml)
@@ -0,0 +1,84 @@
+import logging
+import threading
+from database import open_store
+from session import open_session
+from scraper import run_scraper
+
+logger = logging.getLogger(__name__)
+
+
+class WorkQueue:
+    """
+    Attendee claims shared by all workers. Every worker walks the list,
+    but only the one that claims a list item opens its detail page, so
+    workers on the same screen split its items between them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._claimed = set()
+        self._done = set()
+
+    def claim(self, key):
+        with self._lock:
+            if key in self._claimed:
+                return False
+            self._claimed.add(key)
+            return True
+
+    def release(self, key):
+        # Give the item back so another worker can retry it
+        with self._lock:
+            if key not in self._done:
+                self._claimed.discard(key)
+
+    def done(self, key):
+        with self._lock:
+            self._done.add(key)
+
+    def done_keys(self):
+        with self._lock:
+            return set(self._done)
+
+    @property
+    def done_count(self):
+        with self._lock:
+            return len(self._done)
+
+
+def _worker(serial, store, work_queue, results):
+    device = None
+    try:
+        device = open_session(serial)
+        logger.info(f"[{serial}] Connected, starting scrape")
+        results[serial] = run_scraper(device, store=store, work_queue=work_queue)
+    except Exception as e:
+        logger.error(f"[{serial}] Worker stopped: {e}")
+    finally:
+        if device is not None:
+            device.close()
+
+
+def run_parallel(serials):
+    """Scrape with one worker thread per device serial. Returns new attendees saved."""
+    work_queue = WorkQueue()
+    store = open_store()  # One background writer shared by every worker
+    results = {}
+
+    workers = [threading.Thread(target=_worker, args=(serial, store, work_queue, results),
+                                name=f"worker-{serial}", daemon=True)
+               for serial in serials]
+    for worker in workers:
+        worker.start()
+
+    try:
+        # Join with a timeout so Ctrl-C still reaches the main thread
+        for worker in workers:
+            while worker.is_alive():
+                worker.join(timeout=1.0)
+    finally:
+        store.close()
+
+    for serial in serials:
+        logger.info(f"[{serial}] saved {results.get(serial, 0)}")
+    return store.saved
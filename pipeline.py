@@ -0,0 +1,134 @@
+"""
+Detail page processing off the device thread
+
+The scrape loop only drives the device: it captures the raw detail page
+dumps and moves on to the back press and the next click. Turning the
+dumps into fields, saving the row and logging it happens on a small
+worker pool fed through a bounded queue, so the device never waits on
+parsing or the database. With an archive the workers also store the
+raw dumps (see archive.py) so the rows can be re-extracted later.
+"""
+
+import logging
+import queue
+import threading
+from archive import join_digests
+from extractor import extract_from_dumps
+from metrics import incr, timer
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class DetailPipeline:
+    def __init__(self, store, workers, queue_size, archive=None):
+        self.store = store
+        self.archive = archive
+        self.saved = 0  # Rows this pipeline got the store to accept
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._idle = threading.Condition(self._lock)
+        # workers=0 processes inline on the caller's thread (handy when debugging)
+        self._queue = queue.Queue(maxsize=queue_size) if workers else None
+        self._workers = [threading.Thread(target=self._work_loop, name=f"detail-worker-{n}", daemon=True)
+                         for n in range(workers)]
+        for worker in self._workers:
+            worker.start()
+
+    @property
+    def pending(self):
+        """Captures submitted but not processed yet."""
+        with self._lock:
+            return self._pending
+
+    def submit(self, dumps, stats, fingerprint=None):
+        """Hand over one attendee's dumps. Blocks only when the queue is full."""
+        if self._queue is None:
+            self._process(dumps, stats, fingerprint)
+            return
+        with self._lock:
+            self._pending += 1
+        self._queue.put((dumps, stats, fingerprint))
+
+    def join(self):
+        """Wait until every submitted capture has been processed."""
+        with self._idle:
+            while self._pending:
+                self._idle.wait()
+
+    def close(self):
+        for _ in self._workers:
+            self._queue.put(_STOP)
+        for worker in self._workers:
+            worker.join()
+
+    def _work_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            try:
+                self._process(*item)
+            finally:
+                with self._idle:
+                    self._pending -= 1
+                    self._idle.notify_all()
+
+    def _process(self, dumps, stats, fingerprint):
+        try:
+            digests = None
+            if self.archive is not None:
+                with timer('archive'):
+                    digests = [self.archive.put(xml) for xml in dumps]
+
+            with timer('extract'):
+                data = extract_from_dumps(dumps)
+
+            if digests is not None and fingerprint:
+                # Indexed even without a name: a better extractor may find one later
+                self.store.index_dumps(fingerprint, data['name'], join_digests(digests))
+
+            # Check if we got valid data
+            if not data['name']:
+                logger.warning("No name found")
+                return
+
+            # Queue new attendee (written in the background)
+            saved = self.store.save(
+                data['name'],
+                data['job_title'],
+                data['company'],
+                data['industry'],
+                data['job_function'],
+                data['operates_in'],
+                list_summary=fingerprint
+            )
+            if not saved and self.store.refresh_mode:
+                changes = self.store.refresh(data, list_summary=fingerprint)
+                if changes:
+                    incr('updated')
+                    described = ', '.join(f"{field}: {old!r} -> {new!r}" for field, old, new in changes)
+                    logger.info(f"UPDATED: {data['name']} | {described}")
+                else:
+                    logger.info(f"UNCHANGED: {data['name']}")
+                return
+            if not saved:
+                logger.info(f"SKIP: {data['name']} (in DB)")
+                return
+
+            with self._lock:
+                self.saved += 1
+                count = self.saved
+            incr('saved')
+            fields = []
+            if data['job_title']: fields.append(f"title={data['job_title']}")
+            if data['company']: fields.append(f"company={data['company']}")
+            if data['industry']: fields.append(f"industry={data['industry']}")
+            if data['job_function']: fields.append(f"job={data['job_function']}")
+            if data['operates_in']: fields.append(f"location={data['operates_in']}")
+            logger.info(f"SAVED #{count}: {data['name']} | {', '.join(fields)} "
+                        f"| dumps={stats['dumps']} swipes={stats['swipes']}")
+        except Exception as e:
+            logger.error(f"Processing detail page failed: {e}")
+            incr('errors')
@@ -0,0 +1,88 @@
+"""
+Offline re-extraction
+
+Re-runs the current extractor over the raw dump archive (ARCHIVE_DUMPS)
+on every CPU core and writes the results back, so a fix to DETAIL_FIELD_RULES
+reaches existing rows without scraping the event again.
+
+Usage:
+    python reextract.py              # update the database
+    python reextract.py --dry-run    # only report what would change
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import config
+from archive import DumpArchive, split_digests
+from database import get_dump_index, init_db, upsert_reextracted
+from extractor import extract_from_dumps
+
+logger = logging.getLogger(__name__)
+
+
+def _reextract(job):
+    fingerprint, digests, root = job
+    archive = DumpArchive(root)
+    try:
+        dumps = [archive.get(digest) for digest in split_digests(digests)]
+    except OSError:
+        return fingerprint, None  # Archive pruned or moved
+    return fingerprint, extract_from_dumps(dumps)
+
+
+def reextract(workers=None, chunksize=32, dry_run=False):
+    """Re-extract every archived capture. Returns (results, upsert stats or None)."""
+    index = get_dump_index()
+    old_names = {fingerprint: name for fingerprint, name, _ in index}
+    jobs = [(fingerprint, digests, config.ARCHIVE_DIR) for fingerprint, _, digests in index]
+
+    results = []
+    missing = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for fingerprint, data in pool.map(_reextract, jobs, chunksize=chunksize):
+            if data is None:
+                missing += 1
+                continue
+            results.append((fingerprint, old_names[fingerprint], data))
+    if missing:
+        logger.warning(f"{missing} captures have dumps missing from {config.ARCHIVE_DIR}")
+
+    if dry_run:
+        return results, None
+    return results, upsert_reextracted(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-run the extractor over archived dumps")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Extractor processes")
+    parser.add_argument('--dry-run', action='store_true', help="Report renames, do not write")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+
+    if not os.path.isdir(config.ARCHIVE_DIR):
+        logger.error(f"No dump archive at {config.ARCHIVE_DIR} (set ARCHIVE_DUMPS = True and scrape first)")
+        sys.exit(1)
+
+    init_db()
+    start = time.perf_counter()
+    results, stats = reextract(workers=args.workers, dry_run=args.dry_run)
+    elapsed = time.perf_counter() - start
+
+    if stats is None:
+        for fingerprint, old_name, data in results:
+            if data['name'] != old_name:
+                logger.info(f"{old_name!r} -> {data['name']!r}")
+        logger.info(f"Dry run: {len(results)} captures re-extracted in {elapsed:.1f}s")
+        return
+
+    summary = ', '.join(f"{key}={value}" for key, value in sorted(stats.items()))
+    logger.info(f"Re-extracted {len(results)} captures in {elapsed:.1f}s: {summary}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,695 @@
+"""
+Offline replay device
+
+Stands in for a uiautomator2 device so the scraper can run without an
+emulator. It implements the subset of the u2 API the scraper uses
+(dump_hierarchy, selector exists/count/info/click/child/set_text, swipe,
+press) over a synthetic attendee list, and serves recorded detail dumps such as
+hierarchy.xml verbatim. Every call costs time from a latency model, spent
+on a real or simulated clock.
+"""
+
+import os
+import random
+import xml.etree.ElementTree as ET
+from collections import Counter, defaultdict
+from xml.sax.saxutils import quoteattr
+import time
+import config
+from extractor import parse_bounds, parse_detail_texts, text_nodes
+
+SCREEN_WIDTH = 1080
+SCREEN_HEIGHT = 2220
+TOOLBAR_BOTTOM = 220
+LIST_ITEM_HEIGHT = 240
+DETAIL_FOOTER_TOP = 2033
+
+# Seconds per call, roughly what u2 costs against a local emulator
+DEFAULT_LATENCY = {
+    'dump_hierarchy': 0.25,
+    'click': 0.08,
+    'swipe': 0.05,  # On top of the swipe duration itself
+    'press': 0.08,
+    'exists': 0.04,
+    'count': 0.04,
+    'info': 0.04,
+    'get_text': 0.04,
+    'set_text': 0.1,
+    'screenshot': 0.3,
+    # Time until the screen reflects an action; dumps before that show the old screen
+    'render_screen': 0.6,
+    'render_scroll': 0.35,
+}
+
+FIRST_NAMES = ['Anna', 'Ahmed', 'Bruno', 'Carla', 'Chen', 'David', 'Elena', 'Fatima',
+               'Felix', 'Grace', 'Hugo', 'Ines', 'Ivan', 'Julia', 'Kenji', 'Laura',
+               'Lucas', 'Maria', 'Mateo', 'Nadia', 'Omar', 'Priya', 'Rafael', 'Sara',
+               'Sofia', 'Tomas', 'Uma', 'Victor', 'Wei', 'Yara', 'Zoe', 'Palash',
+               'Amir', 'Beatriz', 'Daniel', 'Emma', 'Jonas', 'Leila', 'Marco', 'Nina']
+MIDDLE_NAMES = ['', 'Lee', 'Marie', 'Jose', 'Ann', 'Kai', 'Noor', 'Jan', 'Rose', 'Luis',
+                'Mae', 'Ali', 'Eve', 'Ray', 'Joy', 'Max', 'Paul', 'Lynn', 'Omar', 'Sun',
+                'Beth', 'Dean', 'Fay', 'Gil', 'Hope', 'Ian', 'June', 'Kim', 'Lou', 'Mia',
+                'Ned', 'Ole', 'Pia', 'Quinn', 'Ren', 'Sol', 'Tess', 'Val', 'Wren', 'Yves']
+LAST_NAMES = ['Silva', 'Santos', 'Smith', 'Garcia', 'Muller', 'Rossi', 'Khan', 'Wang',
+              'Kim', 'Nguyen', 'Costa', 'Novak', 'Ferreira', 'Tanaka', 'Haddad',
+              'Johansson', 'Kowalski', 'Patel', 'Asarsa', 'Dubois', 'Martins',
+              'Okafor', 'Jensen', 'Moreau', 'Alves', 'Schmidt', 'Lopez', 'Ivanova',
+              'Brown', 'Cohen', 'Eriksen', 'Fischer', 'Gomez', 'Horvat', 'Ito', 'Larsen',
+              'Mendes', 'Oliveira', 'Petrov', 'Weber']
+TICKETS = ['FOUNDER / CEO (VISIONARY FOUNDERS)', 'INVESTOR', 'STARTUP', 'PARTNER',
+           'ATTENDEE', 'MEDIA']
+ROLES = ['Founder', 'CEO', 'CTO', 'Partner', 'Head of Growth', 'Product Manager',
+         'Investment Analyst', 'Software Engineer', 'Journalist', 'Director']
+COMPANIES = ['Estech AI / Workshift.AI', 'Nordic Ventures', 'Lisbon Labs', 'Acme Robotics',
+             'Blue Harbor Capital', 'Greenfield Energy', 'Atlas Health', 'Quanta Pay',
+             'Orbit Logistics', 'Helios Media', 'Kite Security', 'Marble Foods']
+COUNTRIES = ['India', 'United Arab Emirates', 'Portugal', 'Spain', 'Germany', 'France',
+             'United Kingdom', 'United States', 'Brazil', 'Japan', 'Singapore', 'Kenya']
+INDUSTRIES = ['Real Estate / PropTech', 'FinTech', 'HealthTech', 'Artificial Intelligence',
+              'Energy / CleanTech', 'Media & Entertainment', 'Logistics', 'Cybersecurity']
+JOB_FUNCTIONS = ['Executive Leadership (C-Suite, GM, VP Strategy)', 'Engineering',
+                 'Sales & Business Development', 'Investment', 'Marketing', 'Product']
+
+
+class UiObjectNotFoundError(Exception):
+    pass
+
+
+class ReplayStop(BaseException):
+    """Raised when the replayed list is exhausted, like an operator Ctrl-C."""
+
+
+class SimClock:
+    """Simulated clock: sleeping advances time instantly."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.slept = 0.0
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+    def perf_counter(self):
+        return self.now
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self.now += seconds
+            self.slept += seconds
+
+    def advance(self, seconds):
+        if seconds > 0:
+            self.now += seconds
+
+
+class ScaledClock:
+    """Real clock running `speed` times faster, for threaded runs that can't share one SimClock."""
+
+    def __init__(self, speed):
+        self.speed = speed
+
+    def time(self):
+        return time.monotonic() * self.speed
+
+    def monotonic(self):
+        return self.time()
+
+    def perf_counter(self):
+        return self.time()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds / self.speed)
+
+
+class LatencyModel:
+    """Per-call latency with optional multiplicative jitter."""
+
+    def __init__(self, latencies=None, jitter=0.0, seed=0):
+        self.latencies = dict(DEFAULT_LATENCY)
+        if latencies:
+            self.latencies.update(latencies)
+        self.jitter = jitter
+        self._random = random.Random(seed)
+
+    def sample(self, call):
+        base = self.latencies.get(call, 0.0)
+        if self.jitter:
+            base *= 1 + self._random.uniform(-self.jitter, self.jitter)
+        return max(0.0, base)
+
+
+def synthetic_attendees(count, seed=0):
+    """Build `count` attendees with unique names the extractor accepts."""
+    rng = random.Random(seed)
+    combos = len(FIRST_NAMES) * len(MIDDLE_NAMES) * len(LAST_NAMES)
+    if count > combos:
+        raise ValueError(f"At most {combos} unique synthetic names")
+
+    attendees = []
+    for i in rng.sample(range(combos), count):
+        first = FIRST_NAMES[i % len(FIRST_NAMES)]
+        middle = MIDDLE_NAMES[(i // len(FIRST_NAMES)) % len(MIDDLE_NAMES)]
+        last = LAST_NAMES[i // (len(FIRST_NAMES) * len(MIDDLE_NAMES))]
+        name = ' '.join(part for part in (first, middle, last) if part)
+        attendees.append({
+            'ticket': rng.choice(TICKETS),
+            'name': name,
+            'job_title': rng.choice(ROLES),
+            'company': rng.choice(COMPANIES),
+            'intro_lines': rng.choice([0, 1, 2, 2, 3, 6, 10]),
+            'operates_in': rng.sample(COUNTRIES, rng.choice([0, 1, 2, 2, 3, 5])),
+            'industry': rng.choice(INDUSTRIES + [None]),
+            'job_function': rng.choice(JOB_FUNCTIONS + [None]),
+        })
+    return attendees
+
+
+def load_recorded_attendee(path):
+    """Wrap a recorded detail page dump (e.g. hierarchy.xml) as a replay attendee."""
+    with open(path, encoding='utf-8') as f:
+        xml = f.read()
+    texts = [text for text, _, _ in text_nodes(xml)]
+    data = parse_detail_texts(texts)
+    ticket = texts[texts.index(data['name']) - 1] if data['name'] in texts[1:] else ''
+    return dict(data, ticket=ticket, detail_xml=xml)
+
+
+def list_content_desc(attendee):
+    # Same shape as the real list buttons: "TITLE, NAME, ROLE\nCOMPANY"
+    return (f"{attendee.get('ticket', '')}, {attendee['name']}, "
+            f"{attendee.get('job_title') or ''}\n{attendee.get('company') or ''}")
+
+
+def _bounds(left, top, right, bottom):
+    return f"[{left},{top}][{right},{bottom}]"
+
+
+def _node(cls, bounds, text='', desc='', clickable=False, scrollable=False,
+          package=None, resource_id='', children=(), index=0):
+    attrs = (f'index="{index}" text={quoteattr(text)} resource-id={quoteattr(resource_id)} '
+             f'class="{cls}" package="{package or config.APP_PACKAGE}" '
+             f'content-desc={quoteattr(desc)} checkable="false" checked="false" '
+             f'clickable="{str(clickable).lower()}" enabled="true" '
+             f'focusable="{str(clickable).lower()}" focused="false" '
+             f'scrollable="{str(scrollable).lower()}" long-clickable="false" '
+             f'password="false" selected="false" visible-to-user="true" '
+             f'bounds="{_bounds(*bounds)}" drawing-order="0" hint="" display-id="0"')
+    if not children:
+        return f'<node {attrs} />'
+    return f'<node {attrs}>' + ''.join(children) + '</node>'
+
+
+_status_bar_xml = None
+
+
+def _status_bar():
+    # Reuse the systemui subtree of the bundled dump so replayed dumps carry
+    # the same status bar noise as real ones
+    global _status_bar_xml
+    if _status_bar_xml is None:
+        try:
+            with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'hierarchy.xml'),
+                      encoding='utf-8') as f:
+                raw = f.read()
+            start = raw.index('<node', raw.index('<hierarchy'))
+            end = raw.rindex('<node', start, raw.index(f'package="{config.APP_PACKAGE}"'))
+            _status_bar_xml = raw[start:end].strip()
+        except (OSError, ValueError):
+            _status_bar_xml = _node(
+                'android.widget.FrameLayout', (0, 0, SCREEN_WIDTH, 66),
+                package='com.android.systemui', children=[
+                    _node('android.widget.TextView', (39, 0, 160, 66), text='9:41',
+                          package='com.android.systemui',
+                          resource_id='com.android.systemui:id/clock'),
+                ])
+    return _status_bar_xml
+
+
+def _screen(*children):
+    app = _node('android.widget.FrameLayout', (0, 0, SCREEN_WIDTH, SCREEN_HEIGHT),
+                children=list(children), index=1)
+    return ("<?xml version='1.0' encoding='UTF-8' standalone='yes' ?>"
+            f'<hierarchy rotation="0">{_status_bar()}{app}</hierarchy>')
+
+
+def _toolbar(title):
+    return _node('android.view.ViewGroup', (0, 66, SCREEN_WIDTH, TOOLBAR_BOTTOM), children=[
+        _node('android.widget.ImageButton', (0, 66, 154, TOOLBAR_BOTTOM), desc='Navigate up',
+              clickable=True),
+        _node('android.view.View', (395, 111, 685, 175), text=title),
+    ])
+
+
+def matches_search(attendee, query):
+    """The app's attendee search: case-insensitive, on name or company."""
+    query = query.casefold()
+    return query in attendee['name'].casefold() or query in (attendee.get('company') or '').casefold()
+
+
+def render_list_page(attendees, scroll_px, query=''):
+    first = scroll_px // LIST_ITEM_HEIGHT
+    items = []
+    for k in range(first, len(attendees)):
+        top = TOOLBAR_BOTTOM + k * LIST_ITEM_HEIGHT - scroll_px
+        if top >= SCREEN_HEIGHT:
+            break
+        center = top + LIST_ITEM_HEIGHT // 2
+        if center < TOOLBAR_BOTTOM:
+            continue
+        attendee = attendees[k]
+        bottom = min(top + LIST_ITEM_HEIGHT, SCREEN_HEIGHT)
+        top = max(top, TOOLBAR_BOTTOM)
+        texts = [attendee.get('ticket', ''), attendee['name'], attendee.get('job_title') or '',
+                 attendee.get('company') or '']
+        items.append(_node(
+            'android.widget.Button', (0, top, SCREEN_WIDTH, bottom), desc=list_content_desc(attendee),
+            clickable=True, index=len(items),
+            children=[_node('android.widget.TextView', (200, top, 1000, bottom), text=t, index=j)
+                      for j, t in enumerate(texts) if t]))
+
+    recycler = _node('androidx.recyclerview.widget.RecyclerView',
+                     (0, TOOLBAR_BOTTOM, SCREEN_WIDTH, SCREEN_HEIGHT), scrollable=True,
+                     children=items)
+    search = _node('android.widget.EditText', (700, 96, 1060, 190), text=query, clickable=True)
+    return _screen(_toolbar('Attendees'), search, recycler)
+
+
+def detail_layout(attendee):
+    """Lay out the detail page like hierarchy.xml: (text, top, height) in page coordinates."""
+    rows = []
+    y = 800
+    for text, height in ((attendee.get('ticket', ''), 58), (attendee['name'], 101),
+                         (attendee.get('job_title') or '', 51), (attendee.get('company') or '', 51)):
+        if text:
+            rows.append((text, y, height))
+        y += height + 10
+    y = 1185
+    rows.append(('Introduction', y + 26, 58))
+    rows.append(('Interests', y + 26, 58))
+    y += 159
+    if attendee.get('intro_lines'):
+        height = 54 * attendee['intro_lines']
+        rows.append(('Happy to connect with founders and investors at the event.', y, height))
+        y += height + 56
+    if attendee.get('operates_in'):
+        rows.append((config.FIELD_LABEL_OPERATES_IN, y, 51))
+        y += 86
+        for i, country in enumerate(attendee['operates_in']):
+            if i and i % 3 == 0:
+                y += 70
+            rows.append((country, y, 46))
+        y += 115
+    for label, key in ((config.FIELD_LABEL_INDUSTRY, 'industry'),
+                       (config.FIELD_LABEL_JOB_FUNCTION, 'job_function')):
+        if attendee.get(key):
+            rows.append((label, y, 51))
+            rows.append((attendee[key], y + 56, 51))
+            y += 163
+    return rows, y
+
+
+def render_detail_page(attendee, scroll_px):
+    if attendee.get('detail_xml'):
+        return attendee['detail_xml']
+
+    rows, _ = detail_layout(attendee)
+    nodes = []
+    for text, top, height in rows:
+        top -= scroll_px
+        bottom = top + height
+        if bottom <= TOOLBAR_BOTTOM or top >= SCREEN_HEIGHT:
+            continue
+        nodes.append(_node('android.widget.TextView', (44, max(top, TOOLBAR_BOTTOM), 1036, bottom),
+                           text=text, index=len(nodes)))
+
+    scroll = _node('android.widget.ScrollView', (0, TOOLBAR_BOTTOM, SCREEN_WIDTH, SCREEN_HEIGHT),
+                   scrollable=True, children=nodes)
+    footer = _node('android.view.ViewGroup', (0, DETAIL_FOOTER_TOP, SCREEN_WIDTH, 2154), children=[
+        _node('android.view.ViewGroup', (193, DETAIL_FOOTER_TOP, 487, 2154), desc='Chat', clickable=True,
+              children=[_node('android.widget.TextView', (327, 2059, 414, 2117), text='Chat')]),
+        _node('android.view.ViewGroup', (515, DETAIL_FOOTER_TOP, 1036, 2154), desc='Suggest meeting',
+              clickable=True,
+              children=[_node('android.widget.TextView', (654, 2059, 965, 2117), text='Suggest meeting')]),
+    ])
+    return _screen(_toolbar(attendee['name']), scroll, footer)
+
+
+def _detail_max_scroll(attendee):
+    if attendee.get('detail_xml'):
+        return 0
+    _, bottom = detail_layout(attendee)
+    return max(0, bottom - DETAIL_FOOTER_TOP + 40)
+
+
+def render_menu_page():
+    return _screen(_toolbar('People'), _node(
+        'android.view.ViewGroup', (0, TOOLBAR_BOTTOM, SCREEN_WIDTH, 400), children=[
+            _node('android.widget.TextView', (60, 250, 300, 330), text='attendees', clickable=True),
+            _node('android.widget.TextView', (360, 250, 600, 330), text='speakers', clickable=True),
+        ]))
+
+
+def render_home_page():
+    return _screen(_node(
+        'android.view.ViewGroup', (0, 66, SCREEN_WIDTH, SCREEN_HEIGHT), children=[
+            _node('android.widget.TextView', (60, 300, 1020, 400), text='Event Home'),
+            _node('android.widget.TextView', (860, 2050, 1020, 2150), text='Menu', clickable=True),
+        ]))
+
+
+def render_events_page(events):
+    rows = []
+    for k, event in enumerate(events):
+        top = TOOLBAR_BOTTOM + k * 200
+        if top + 200 > SCREEN_HEIGHT:
+            break
+        rows.append(_node('android.widget.Button', (0, top, SCREEN_WIDTH, top + 200), text=event,
+                          clickable=True, index=k))
+    return _screen(_toolbar(config.EVENTS_PAGE_TEXT), _node(
+        'android.widget.LinearLayout', (0, TOOLBAR_BOTTOM, SCREEN_WIDTH, SCREEN_HEIGHT), children=rows))
+
+
+_SELECTOR_ATTRS = {
+    'className': 'class',
+    'text': 'text',
+    'description': 'content-desc',
+    'resourceId': 'resource-id',
+    'packageName': 'package',
+}
+
+
+def _matches(elem, selector):
+    for key, value in selector.items():
+        if key in _SELECTOR_ATTRS:
+            if elem.get(_SELECTOR_ATTRS[key]) != value:
+                return False
+        elif key == 'textContains':
+            if value not in elem.get('text', ''):
+                return False
+        elif key == 'descriptionContains':
+            if value not in elem.get('content-desc', ''):
+                return False
+        elif key in ('clickable', 'scrollable'):
+            if (elem.get(key) == 'true') != bool(value):
+                return False
+        else:
+            raise ValueError(f"Unsupported selector key: {key}")
+    return True
+
+
+class ReplaySelector:
+    def __init__(self, device, selector, parent=None, index=None):
+        self._device = device
+        self._selector = selector
+        self._parent = parent
+        self._index = index
+
+    def _resolve(self):
+        if self._parent is None:
+            candidates = [e for e in self._device._elements() if _matches(e, self._selector)]
+        else:
+            candidates = []
+            for parent in self._parent._resolve():
+                candidates.extend(e for e in parent.iter('node')
+                                  if e is not parent and _matches(e, self._selector))
+        if self._index is None:
+            return candidates
+        return candidates[self._index:self._index + 1]
+
+    def _first(self):
+        found = self._resolve()
+        if not found:
+            raise UiObjectNotFoundError(f"UiObjectNotFoundException: {self._selector}")
+        return found[0]
+
+    @property
+    def exists(self):
+        self._device._rpc('exists')
+        return bool(self._resolve())
+
+    @property
+    def count(self):
+        self._device._rpc('count')
+        return len(self._resolve())
+
+    @property
+    def info(self):
+        self._device._rpc('info')
+        elem = self._first()
+        left, top, right, bottom = parse_bounds(elem.get('bounds'))
+        return {
+            'className': elem.get('class'),
+            'text': elem.get('text'),
+            'contentDescription': elem.get('content-desc'),
+            'packageName': elem.get('package'),
+            'resourceName': elem.get('resource-id'),
+            'clickable': elem.get('clickable') == 'true',
+            'bounds': {'left': left, 'top': top, 'right': right, 'bottom': bottom},
+        }
+
+    def get_text(self):
+        self._device._rpc('get_text')
+        return self._first().get('text', '')
+
+    def click(self):
+        elem = self._first()
+        left, top, right, bottom = parse_bounds(elem.get('bounds'))
+        self._device.click((left + right) // 2, (top + bottom) // 2)
+
+    def set_text(self, text):
+        self._device._rpc('set_text')
+        if self._first().get('class') == 'android.widget.EditText':
+            self._device._search(text or '')
+
+    def clear_text(self):
+        self.set_text('')
+
+    def child(self, **selector):
+        return ReplaySelector(self._device, selector, parent=self)
+
+    def __getitem__(self, index):
+        return ReplaySelector(self._device, self._selector, parent=self._parent, index=index)
+
+    def __len__(self):
+        return self.count
+
+
+class ReplayDevice:
+    """
+    Replays an attendee list. Screens: list -> detail on click, and back
+    walks detail -> list -> menu -> home. Swipes scroll the current page,
+    and text in the list's search field filters it. With events
+    ({name: attendees}) it starts on an event picker that back from an
+    event home returns to, and each event has its own list.
+    """
+
+    def __init__(self, attendees, latency=None, clock=time, max_idle_swipes=50, events=None):
+        self.events = events
+        self.event = None
+        if events:
+            attendees = []  # Until an event is opened
+        self.attendees = attendees
+        self.latency = latency or LatencyModel()
+        self.clock = clock
+        self.max_idle_swipes = max_idle_swipes
+
+        self.screen = 'events' if events else 'list'
+        self.list_scroll = 0
+        self.detail_index = None
+        self.detail_scroll = 0
+        self.query = ''
+        self.idle_swipes = 0
+
+        self.calls = Counter()
+        self.call_time = defaultdict(float)
+        self.opened = Counter()  # Detail page opens per attendee index
+
+        self._shown = None  # Screen still displayed while a transition renders
+        self._visible_at = 0.0
+
+        self._cache_key = None
+        self._cache = None
+        self._results_query = ''
+        self._results = (attendees, range(len(attendees)))
+
+    # -- accounting ---------------------------------------------------------
+
+    def _rpc(self, call, extra=0.0):
+        cost = self.latency.sample(call) + extra
+        self.calls[call] += 1
+        self.call_time[call] += cost
+        self.clock.sleep(cost)
+
+    # -- state --------------------------------------------------------------
+
+    def _state(self):
+        return (self.screen, self.list_scroll, self.detail_index, self.detail_scroll, self.query, self.event)
+
+    def _displayed_state(self):
+        if self._shown is not None and self.clock.time() < self._visible_at:
+            return self._shown
+        self._shown = None
+        return self._state()
+
+    def _transition(self, before, kind, moving=None):
+        # Keep showing the old screen (or a scroll partway, if given) until the new one has rendered
+        if self._state() != before:
+            self._shown = moving or before
+            self._visible_at = self.clock.time() + self.latency.sample(f'render_{kind}')
+
+    def _render(self):
+        screen, list_scroll, detail_index, detail_scroll, query, _ = self._displayed_state()
+        if screen == 'list':
+            return render_list_page(self._listed(query)[0], list_scroll, query)
+        if screen == 'detail':
+            return render_detail_page(self.attendees[detail_index], detail_scroll)
+        if screen == 'menu':
+            return render_menu_page()
+        if screen == 'home':
+            return render_home_page()
+        if screen == 'events':
+            return render_events_page(list(self.events))
+        return _screen()
+
+    def _elements(self):
+        key = self._displayed_state()
+        if key != self._cache_key:
+            root = ET.fromstring(self._render())
+            self._cache = list(root.iter('node'))
+            self._cache_key = key
+        return self._cache
+
+    def _listed(self, query):
+        """(attendees the list shows, their indexes in self.attendees) for a search query."""
+        if query != self._results_query:
+            indexes = [k for k, attendee in enumerate(self.attendees) if matches_search(attendee, query)]
+            self._results = ([self.attendees[k] for k in indexes], indexes)
+            self._results_query = query
+        return self._results
+
+    @property
+    def list_max_scroll(self):
+        listed, _ = self._listed(self.query)
+        return max(0, len(listed) * LIST_ITEM_HEIGHT - (SCREEN_HEIGHT - TOOLBAR_BOTTOM))
+
+    # -- u2 API -------------------------------------------------------------
+
+    def __call__(self, **selector):
+        return ReplaySelector(self, selector)
+
+    @property
+    def info(self):
+        self._rpc('info')
+        return {'currentPackageName': config.APP_PACKAGE, 'displayWidth': SCREEN_WIDTH,
+                'displayHeight': SCREEN_HEIGHT, 'productName': 'replay', 'screenOn': True}
+
+    def app_current(self):
+        self._rpc('info')
+        return {'package': config.APP_PACKAGE, 'activity': '.MainActivity'}
+
+    def dump_hierarchy(self, *args, **kwargs):
+        self._rpc('dump_hierarchy')
+        return self._render()
+
+    def screenshot(self, filename=None, *args, **kwargs):
+        self._rpc('screenshot')
+        return None
+
+    def close(self):
+        pass  # Same interface as session.DeviceSession
+
+    def click(self, x, y):
+        self._rpc('click')
+        before = self._displayed_state()
+        for elem in reversed(self._elements()):
+            if elem.get('clickable') != 'true':
+                continue
+            left, top, right, bottom = parse_bounds(elem.get('bounds'))
+            if left <= x < right and top <= y < bottom:
+                self._tap(elem)
+                break
+        self._transition(before, 'screen')
+
+    def _tap(self, elem):
+        if elem.get('content-desc') == 'Navigate up':
+            self._back()
+        elif self.screen == 'list' and elem.get('class') == 'android.widget.Button':
+            desc = elem.get('content-desc')
+            listed, indexes = self._listed(self.query)
+            first = self.list_scroll // LIST_ITEM_HEIGHT
+            for k in range(first, min(first + 12, len(listed))):
+                if list_content_desc(listed[k]) == desc:
+                    self.screen = 'detail'
+                    self.detail_index = indexes[k]
+                    self.detail_scroll = 0
+                    self.opened[indexes[k]] += 1
+                    return
+        elif self.screen == 'menu' and elem.get('text') == 'attendees':
+            self.screen = 'list'
+        elif self.screen == 'home' and elem.get('text') == 'Menu':
+            self.screen = 'menu'
+        elif self.screen == 'events' and elem.get('text') in self.events:
+            self._open_event(elem.get('text'))
+
+    def swipe(self, fx, fy, tx, ty, duration=0.1, steps=None):
+        self._rpc('swipe', extra=duration or 0.0)
+        shown = self._displayed_state()
+        delta = int(fy - ty)
+        if self.screen == 'list':
+            before = self.list_scroll
+            self.list_scroll = max(0, min(self.list_max_scroll, self.list_scroll + delta))
+            if self.list_scroll == before:
+                self.idle_swipes += 1
+                if self.idle_swipes >= self.max_idle_swipes:
+                    raise ReplayStop(f"{self.idle_swipes} swipes without the list moving")
+            else:
+                self.idle_swipes = 0
+        elif self.screen == 'detail':
+            limit = _detail_max_scroll(self.attendees[self.detail_index])
+            self.detail_scroll = max(0, min(limit, self.detail_scroll + delta))
+            if shown[:3] == self._state()[:3]:
+                # The page follows the finger: halfway there until the fling settles
+                moving = shown[:3] + ((shown[3] + self.detail_scroll) // 2,) + shown[4:]
+                self._transition(shown, 'scroll', moving)
+                return
+        self._transition(shown, 'scroll')
+
+    def _open_event(self, event):
+        self.event = event
+        self.attendees = self.events[event]
+        self.screen = 'home'
+        self.list_scroll = 0
+        self.query = ''
+        self._results_query = None  # Search results belong to the previous event
+
+    def _search(self, query):
+        before = self._displayed_state()
+        if self.screen == 'list' and query != self.query:
+            self.query = query
+            self.list_scroll = 0
+        self._transition(before, 'screen')
+
+    def press(self, key, *args):
+        self._rpc('press')
+        before = self._displayed_state()
+        if key == 'back':
+            self._back()
+        self._transition(before, 'screen')
+
+    def _back(self):
+        if self.screen == 'detail':
+            self.screen = 'list'
+            self.detail_index = None
+            self.detail_scroll = 0
+        elif self.screen == 'list':
+            self.screen = 'menu'
+        elif self.screen == 'menu':
+            self.screen = 'home'
+        elif self.screen == 'home' and self.events:
+            self.screen = 'events'
+        else:
+            self.screen = 'launcher'
@@ -0,0 +1,172 @@
+"""
+Detail page field rules
+
+config.DETAIL_FIELD_RULES describes every field declaratively:
+
+    {'field': 'industry', 'anchor': 'Industry', 'offset': 1}
+        the text `offset` places after the anchor label
+    {'field': 'name', 'validators': ['person_name']}
+        no anchor: the first text that passes the validators
+    {'field': 'job_title', 'after': 'name', 'offset': 1}
+        relative to where another field was found
+    {'field': 'operates_in', 'anchor': 'Operates in', 'multi': True, 'join': ', '}
+        every valid text after the anchor until the next label (or max_values)
+
+Texts in DETAIL_SKIP_TEXTS are never values, and DETAIL_IGNORE_TEXTS (the
+sticky footer, which lands mid-page once dumps are merged) are dropped
+before offsets are counted. The rules are compiled once into sets and
+validator chains; a page's labels are then found with one set
+intersection over its ordered, de-duplicated texts, and every rule is a
+direct lookup from there.
+"""
+
+import config
+
+
+def _person_name(text):
+    words = text.split()
+    return len(text) > 5 and 2 <= len(words) <= 4 and ''.join(words).isalpha()
+
+
+def _letters(text):
+    # Letters and spaces only (texts are stripped, so never all whitespace). split() would also
+    # swallow newlines and tabs, so control characters are rejected first
+    return text.isprintable() and ''.join(text.split()).isalpha()
+
+
+def _min_length(n):
+    n = int(n)
+    return lambda text: len(text) >= n
+
+
+def _max_words(n):
+    n = int(n)
+    return lambda text: len(text.split()) <= n
+
+
+# Validator specs used in config: "name" or "name:argument"
+VALIDATORS = {
+    'person_name': lambda: _person_name,
+    'letters': lambda: _letters,
+    'min_length': _min_length,
+    'max_words': _max_words,
+}
+
+
+def _compile_validator(spec):
+    name, _, arg = spec.partition(':')
+    if name not in VALIDATORS:
+        raise ValueError(f"Unknown validator '{name}' in DETAIL_FIELD_RULES")
+    factory = VALIDATORS[name]
+    return factory(arg) if arg else factory()
+
+
+def _all(validators):
+    if not validators:
+        return None  # Any text
+    first, *rest = validators
+    if not rest:
+        return first
+    tail = _all(rest)
+    return lambda text: first(text) and tail(text)
+
+
+class _Rule:
+    __slots__ = ('field', 'anchor', 'after', 'offset', 'multi', 'max_values', 'join', 'accepts')
+
+    def __init__(self, spec):
+        self.field = spec['field']
+        self.anchor = spec.get('anchor')
+        self.after = spec.get('after')
+        self.offset = spec.get('offset', 1)
+        self.multi = spec.get('multi', False)
+        self.max_values = spec.get('max_values')
+        self.join = spec.get('join', ', ')
+        self.accepts = _all([_compile_validator(v) for v in spec.get('validators', ())])
+
+
+class FieldRules:
+    def __init__(self, specs, skip_texts=(), ignore_texts=()):
+        rules = [_Rule(spec) for spec in specs]
+        self.fields = tuple(rule.field for rule in rules)
+        # Fields another rule is relative to are resolved first
+        self.rules = [rule for rule in rules if not rule.after] + [rule for rule in rules if rule.after]
+        self.labels = frozenset(rule.anchor for rule in rules if rule.anchor)
+        self.skip = frozenset(skip_texts) | self.labels  # Labels are never values themselves
+        self.ignore = frozenset(ignore_texts)  # Dropped before positions are counted
+
+    def apply(self, texts):
+        """Extract every field from texts (ordered, de-duplicated, so each label has one position)."""
+        ignored = self.ignore.intersection(texts)
+        if ignored:
+            texts = list(texts)
+            for text in ignored:
+                texts.remove(text)
+        # Set intersection finds the labels on the page, so absent ones cost nothing
+        present = self.labels.intersection(texts)
+        skip = self.skip
+        data = dict.fromkeys(self.fields)
+        found = {}  # field -> position of its value
+
+        for rule in self.rules:
+            accepts = rule.accepts
+            if rule.anchor:
+                start = texts.index(rule.anchor) if rule.anchor in present else None
+            elif rule.after:
+                start = found.get(rule.after)
+            else:
+                start = self._search(texts, skip, accepts)
+                if start is not None:
+                    data[rule.field] = texts[start]
+                    found[rule.field] = start
+                continue
+            if start is None:
+                continue
+
+            if rule.multi:
+                values = self._collect(texts, start + 1, rule)
+                if values:
+                    data[rule.field] = rule.join.join(values)
+                continue
+            i = start + rule.offset
+            if i < len(texts):
+                text = texts[i]
+                if text not in skip and (accepts is None or accepts(text)):
+                    data[rule.field] = text
+                    found[rule.field] = i
+        return data
+
+    @staticmethod
+    def _search(texts, skip, accepts):
+        for i, text in enumerate(texts):
+            if text not in skip and (accepts is None or accepts(text)):
+                return i
+        return None
+
+    def _collect(self, texts, start, rule):
+        # Every valid text up to the next label
+        values = []
+        labels, skip, accepts = self.labels, self.skip, rule.accepts
+        for text in texts[start:]:
+            if text in labels:
+                break
+            if text not in skip and (accepts is None or accepts(text)):
+                values.append(text)
+                if len(values) == rule.max_values:
+                    break
+        return values
+
+
+_compiled = None
+
+
+def compile_rules():
+    """(Re)build the rules from config; done once, on first use."""
+    global _compiled
+    _compiled = FieldRules(config.DETAIL_FIELD_RULES, config.DETAIL_SKIP_TEXTS,
+                           config.DETAIL_IGNORE_TEXTS)
+    return _compiled
+
+
+def detail_rules():
+    return _compiled or compile_rules()
@@ -0,0 +1,402 @@
+"""
+Multi-event job scheduler
+
+Events to scrape are jobs in a small SQLite table (JOBS_DB_PATH) with a
+priority, device requirements, status and progress. `run` starts one
+worker per device. An idle worker claims the best queued job it may run,
+or joins a running job that accepts more devices, walks the app to that
+event through the event picker and scrapes it into the event's own
+database (rows, checkpoint and clicked set), then claims the next one.
+Devices keep their session between events, and the run ends once the
+backlog is drained.
+
+Usage:
+    python scheduler.py add "Web Summit 2026" --priority 5
+    python scheduler.py add "Slush" --devices 2          # up to two devices at once
+    python scheduler.py add "Collision" --device emulator-5556
+    python scheduler.py list
+    python scheduler.py run                              # until the queue is empty
+    python scheduler.py run --watch                      # keep waiting for new jobs
+    python scheduler.py retry 3
+    python scheduler.py cancel 4
+"""
+
+import argparse
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+from datetime import datetime, timedelta
+
+import config
+from database import init_db, open_store
+from metrics import incr, start_exporter
+from pages import open_event
+from parallel import WorkQueue
+from scraper import run_scraper
+from session import DeviceLost, open_session
+from utils import setup_logging
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+CREATE_JOBS_SQL = """
+    CREATE TABLE IF NOT EXISTS jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        event TEXT NOT NULL,
+        db_path TEXT NOT NULL,
+        priority INTEGER NOT NULL DEFAULT 0,
+        device TEXT,
+        max_devices INTEGER NOT NULL DEFAULT 1,
+        status TEXT NOT NULL DEFAULT 'queued',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        saved INTEGER NOT NULL DEFAULT 0,
+        attendees INTEGER NOT NULL DEFAULT 0,
+        workers TEXT,
+        error TEXT,
+        created_at TIMESTAMP,
+        started_at TIMESTAMP,
+        finished_at TIMESTAMP,
+        heartbeat TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_jobs_queue ON jobs(status, priority DESC, id);
+"""
+
+# Highest priority first, then first come first served; a job pinned to a device waits for it
+CLAIMABLE_SQL = """
+    SELECT * FROM jobs WHERE status = 'queued' AND (device IS NULL OR device = ?)
+    ORDER BY priority DESC, id LIMIT 1
+"""
+START_JOB_SQL = """
+    UPDATE jobs SET status = 'running', attempts = attempts + 1, workers = ?, error = NULL,
+                    started_at = ?, heartbeat = ?, saved = 0
+    WHERE id = ?
+"""
+JOIN_JOB_SQL = "UPDATE jobs SET workers = ? WHERE id = ?"
+PROGRESS_SQL = "UPDATE jobs SET saved = ?, attendees = ?, heartbeat = ? WHERE id = ?"
+FINISH_JOB_SQL = "UPDATE jobs SET status = ?, error = ?, workers = NULL, finished_at = ? WHERE id = ?"
+
+
+def event_db_path(event):
+    """Database of one event under EVENTS_DIR, named after it."""
+    slug = re.sub(r'[^a-z0-9]+', '-', event.casefold()).strip('-') or 'event'
+    return os.path.join(config.EVENTS_DIR, f"{slug}.db")
+
+
+class JobQueue:
+    """The persistent job table. Every call uses its own connection, so any thread may call it."""
+
+    def __init__(self, path=None):
+        self.path = path or config.JOBS_DB_PATH
+        conn = self._connect()
+        conn.executescript(CREATE_JOBS_SQL)
+        conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _execute(self, sql, params=()):
+        conn = self._connect()
+        try:
+            return conn.execute(sql, params).rowcount
+        finally:
+            conn.close()
+
+    def add(self, event, priority=0, device=None, max_devices=1, db_path=None):
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                "INSERT INTO jobs (event, db_path, priority, device, max_devices, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (event, db_path or event_db_path(event), priority, device, max(1, max_devices),
+                 datetime.now()))
+            return cursor.lastrowid
+        finally:
+            conn.close()
+
+    def jobs(self):
+        conn = self._connect()
+        try:
+            return [dict(row) for row in conn.execute("SELECT * FROM jobs ORDER BY id")]
+        finally:
+            conn.close()
+
+    def claimable(self, serial):
+        conn = self._connect()
+        try:
+            return conn.execute(CLAIMABLE_SQL, (serial,)).fetchone() is not None
+        finally:
+            conn.close()
+
+    def claim(self, serial):
+        """Atomically start the best queued job serial may run. Returns it, or None."""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")  # Other scheduler processes wait here
+            row = conn.execute(CLAIMABLE_SQL, (serial,)).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            now = datetime.now()
+            conn.execute(START_JOB_SQL, (serial, now, now, row['id']))
+            conn.execute("COMMIT")
+            return dict(row, status=RUNNING, attempts=row['attempts'] + 1)
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def set_workers(self, job_id, serials):
+        self._execute(JOIN_JOB_SQL, (','.join(sorted(serials)), job_id))
+
+    def progress(self, job_id, saved, attendees):
+        self._execute(PROGRESS_SQL, (saved, attendees, datetime.now(), job_id))
+
+    def finish(self, job, error=None):
+        """Mark a job done, or requeue it until it has failed JOB_MAX_ATTEMPTS times."""
+        if error is None:
+            status = DONE
+        else:
+            status = QUEUED if job['attempts'] < config.JOB_MAX_ATTEMPTS else FAILED
+        self._execute(FINISH_JOB_SQL, (status, error, datetime.now(), job['id']))
+        return status
+
+    def retry(self, job_id):
+        return self._execute("UPDATE jobs SET status = 'queued', attempts = 0, error = NULL "
+                             "WHERE id = ? AND status != 'running'", (job_id,)) > 0
+
+    def cancel(self, job_id):
+        return self._execute("UPDATE jobs SET status = 'cancelled' WHERE id = ? AND status = 'queued'",
+                             (job_id,)) > 0
+
+    def requeue(self, job_id):
+        self._execute("UPDATE jobs SET status = 'queued', workers = NULL WHERE id = ? AND status = 'running'",
+                      (job_id,))
+
+    def requeue_stale(self):
+        """Requeue running jobs whose scheduler stopped sending heartbeats (crash, kill -9)."""
+        cutoff = datetime.now() - timedelta(seconds=config.JOB_STALE_AFTER)
+        return self._execute("UPDATE jobs SET status = 'queued', workers = NULL "
+                             "WHERE status = 'running' AND heartbeat < ?", (cutoff,))
+
+
+class ActiveJob:
+    """A claimed job while this process runs it: one store and, for several devices, shared claims."""
+
+    def __init__(self, job):
+        self.job = job
+        init_db(job['db_path'])
+        self.store = open_store(job['db_path'])
+        self.work_queue = WorkQueue() if job['max_devices'] > 1 else None
+        self.workers = set()
+        self.errors = []
+        self.completed = False  # A worker reached the end of the list
+
+    @property
+    def joinable(self):
+        return (not self.completed and self.job['device'] is None
+                and len(self.workers) < self.job['max_devices'])
+
+
+class Scheduler:
+    def __init__(self, serials, queue=None, connect=open_session, watch=False):
+        self.serials = serials
+        self.queue = queue or JobQueue()
+        self.connect = connect
+        self.watch = watch
+        self.finished = []  # (job id, event, status)
+        self._active = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def run(self):
+        stale = self.queue.requeue_stale()
+        if stale:
+            logger.info(f"Requeued {stale} jobs left running by a stopped scheduler")
+        os.makedirs(config.EVENTS_DIR, exist_ok=True)
+
+        progress = threading.Thread(target=self._progress_loop, name="job-progress", daemon=True)
+        progress.start()
+        workers = [threading.Thread(target=self._worker, args=(serial,), name=f"jobs-{serial}", daemon=True)
+                   for serial in self.serials]
+        for worker in workers:
+            worker.start()
+        try:
+            # Join with a timeout so Ctrl-C still reaches the main thread
+            for worker in workers:
+                while worker.is_alive():
+                    worker.join(timeout=1.0)
+        except KeyboardInterrupt:
+            with self._lock:
+                for job_id in self._active:
+                    self.queue.requeue(job_id)  # Resumes from the event's checkpoint next time
+            raise
+        finally:
+            self._stop.set()
+            progress.join()
+        return self.finished
+
+    # -- workers ------------------------------------------------------------
+
+    def _worker(self, serial):
+        device = None
+        try:
+            device = self.connect(serial)
+            while not self._stop.is_set():
+                active = self._next(serial)
+                if active is None:
+                    if not self.watch and self._drained(serial):
+                        logger.info(f"[{serial}] No more jobs for this device")
+                        break
+                    self._stop.wait(config.JOB_POLL_INTERVAL)
+                    continue
+                self._run(device, serial, active)
+        except Exception as e:
+            logger.error(f"[{serial}] Device worker stopped: {e}")
+        finally:
+            if device is not None:
+                device.close()
+
+    def _next(self, serial):
+        """A new job for serial, or a running one it can help with, or None."""
+        with self._lock:
+            job = self.queue.claim(serial)
+            if job is not None:
+                try:
+                    active = ActiveJob(job)
+                except Exception as e:
+                    logger.error(f"Job {job['id']} '{job['event']}': cannot open {job['db_path']}: {e}")
+                    self.queue.finish(job, str(e))
+                    return None
+                self._active[job['id']] = active
+                logger.info(f"[{serial}] Job {job['id']} '{job['event']}' started "
+                            f"(priority {job['priority']}, attempt {job['attempts']})")
+            else:
+                active = next((a for a in self._active.values() if a.joinable), None)
+                if active is None:
+                    return None
+                logger.info(f"[{serial}] Joining job {active.job['id']} '{active.job['event']}'")
+            active.workers.add(serial)
+            self.queue.set_workers(active.job['id'], active.workers)
+            return active
+
+    def _drained(self, serial):
+        with self._lock:
+            return not self._active and not self.queue.claimable(serial)
+
+    def _run(self, device, serial, active):
+        event = active.job['event']
+        try:
+            if open_event(device, event) is None:
+                raise RuntimeError(f"Could not open event '{event}'")
+            run_scraper(device, store=active.store, work_queue=active.work_queue)
+            active.completed = True
+        except DeviceLost as e:
+            active.errors.append(f"{serial}: {e}")
+            raise  # This device is gone; the job's other workers (or a retry) carry on
+        except Exception as e:
+            logger.error(f"[{serial}] Job {active.job['id']} '{event}' failed: {e}")
+            incr('job_errors')
+            active.errors.append(f"{serial}: {e}")
+        finally:
+            self._leave(active, serial)
+
+    def _leave(self, active, serial):
+        with self._lock:
+            active.workers.discard(serial)
+            if active.workers:
+                self.queue.set_workers(active.job['id'], active.workers)
+                return
+            del self._active[active.job['id']]
+
+        job = active.job
+        active.store.close()
+        self.queue.progress(job['id'], active.store.saved, active.store.known_count)
+        status = self.queue.finish(job, None if active.completed else '; '.join(active.errors))
+        self.finished.append((job['id'], job['event'], status))
+        incr(f'jobs_{status}')
+        logger.info(f"Job {job['id']} '{job['event']}' {status}: {active.store.saved} new, "
+                    f"{active.store.known_count} in {job['db_path']}")
+
+    def _progress_loop(self):
+        while not self._stop.wait(config.JOB_PROGRESS_INTERVAL):
+            with self._lock:
+                active = list(self._active.values())
+            for a in active:
+                self.queue.progress(a.job['id'], a.store.saved, a.store.known_count)
+
+
+def run_scheduler(serials=None, watch=False):
+    """Drain the job queue with one worker per device. Returns [(job id, event, status)]."""
+    serials = serials or config.DEVICE_SERIALS or [config.DEVICE_SERIAL]
+    return Scheduler(serials, watch=watch).run()
+
+
+def _print_jobs(jobs):
+    print(f"{'id':>4} {'status':>9} {'pri':>4} {'devices':>8} {'tries':>5} {'saved':>6} {'rows':>6}  event")
+    for job in jobs:
+        devices = job['device'] or f"any x{job['max_devices']}"
+        print(f"{job['id']:>4} {job['status']:>9} {job['priority']:>4} {devices:>8} {job['attempts']:>5} "
+              f"{job['saved']:>6} {job['attendees']:>6}  {job['event']}"
+              + (f"  [{job['workers']}]" if job['workers'] else '')
+              + (f"  ({job['error']})" if job['error'] else ''))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape a backlog of events across a device pool")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    add = sub.add_parser('add', help="Queue an event")
+    add.add_argument('event', help="Event name as shown in the app's event picker")
+    add.add_argument('--priority', type=int, default=0, help="Higher runs first")
+    add.add_argument('--device', help="Only this device serial may run it")
+    add.add_argument('--devices', type=int, default=1, help="Devices that may work on it at once")
+    add.add_argument('--db', help="Event database (default: EVENTS_DIR/<event>.db)")
+    sub.add_parser('list', help="Show every job")
+    run = sub.add_parser('run', help="Work through the queue")
+    run.add_argument('--serials', type=lambda v: [s for s in v.split(',') if s],
+                     help="Device pool (default: DEVICE_SERIALS or DEVICE_SERIAL)")
+    run.add_argument('--watch', action='store_true', help="Keep waiting for new jobs when the queue is empty")
+    for name in ('retry', 'cancel'):
+        cmd = sub.add_parser(name, help=f"{name.capitalize()} a job")
+        cmd.add_argument('id', type=int)
+    args = parser.parse_args()
+
+    if args.command != 'run':
+        logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+    queue = JobQueue()
+
+    if args.command == 'add':
+        job_id = queue.add(args.event, args.priority, args.device, args.devices, args.db)
+        logger.info(f"Queued job {job_id}: '{args.event}'")
+    elif args.command == 'list':
+        _print_jobs(queue.jobs())
+    elif args.command in ('retry', 'cancel'):
+        if not getattr(queue, args.command)(args.id):
+            logger.error(f"Job {args.id} cannot be {'retried' if args.command == 'retry' else 'cancelled'} now")
+            sys.exit(1)
+    else:
+        setup_logging()
+        exporter = start_exporter()
+        try:
+            finished = run_scheduler(args.serials, watch=args.watch)
+            logger.info(f"Scheduler done: {len(finished)} jobs finished")
+        except KeyboardInterrupt:
+            logger.info("STOPPED by user, running jobs requeued")
+        finally:
+            exporter.stop()
+
+
+if __name__ == "__main__":
+    main()
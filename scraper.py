@@ -1,182 +1,325 @@
 import logging
 import time
 import config
-from database import attendee_exists, save_attendee
-from extractor import extract_from_detail_page
+from archive import DumpArchive
+from capture import capture_error, record
+from database import load_checkpoint, open_store
+from extractor import (capture_detail_page, detail_name, extract_list_items, is_detail_page, is_list_page,
+                       list_fingerprint, list_summary_changed, parse_list_content_desc)
+from identity import list_identity
+from metrics import incr, instrument, timer
+from pages import recover_to_list
+from pipeline import DetailPipeline
+from session import DeviceLost
+from waits import changed_and_settled, controller as wait_controller, wait_for
 
 logger = logging.getLogger(__name__)
 
 
-def check_and_recover_from_main_page(device):
+def fast_forward(device, checkpoint, store):
     """
-    Detect if we're on the main page and navigate to attendee list.
-    Navigation flow: Event Home → Menu → Attendees
-    Returns True if we recovered, False if already on correct page.
+    Fling back down to where an interrupted run stopped, without clicking
+    anything. Flings go one at a time and stop once the checkpoint anchor
+    is on screen, or once the screen shows items the interrupted run never
+    handled (momentum carried past the anchor). Then the list is scrolled
+    back until the anchor, or ground the run already covered, shows again.
+    Returns (scroll offset reached in px, list dump).
     """
-    # Check if we're already on attendees page (RecyclerView exists)
-    if device(className="androidx.recyclerview.widget.RecyclerView").exists:
-        logger.debug("Already on attendees page")
-        return False
+    fx, fy, tx, ty = config.FAST_FORWARD_SWIPE
+    fling = fy - ty
+    flings = int(checkpoint['scroll_offset'] * config.FAST_FORWARD_UNDERSHOOT) // fling
+    if flings <= 0:
+        return 0, None
+
+    anchor = parse_list_content_desc(checkpoint['anchor']) or checkpoint['anchor']
+    anchor_key = list_identity(checkpoint['anchor'])
+    logger.info(f"Resuming near '{anchor}': up to {flings} flings, {len(checkpoint['clicked'])} already clicked")
+
+    def position(xml):
+        # 'anchor' on screen, 'past' it (unhandled items showing), or 'before' it
+        keys = [list_identity(content_desc) for content_desc in list_fingerprint(xml)]
+        if anchor_key in keys:
+            return 'anchor'
+        if any(key not in checkpoint['clicked'] and not store.exists(key) for key in keys):
+            return 'past'
+        return 'before'
+
+    xml = device.dump_hierarchy()
+    offset, where = 0, position(xml)
+    for _ in range(flings):
+        if where != 'before':
+            break
+        device.swipe(fx, fy, tx, ty, duration=config.FAST_FORWARD_DURATION)
+        moved = wait_for(device, 'fast_forward', changed_and_settled(list_fingerprint, list_fingerprint(xml)))
+        if moved is None:
+            break  # End of the list
+        xml, offset, where = moved, offset + fling, position(moved)
+
+    # Overshot: step back (a plain swipe, no momentum) until the anchor or covered ground shows
+    lx, ly, _, ly_end = config.LIST_SWIPE
+    step = ly - ly_end
+    while where == 'past':
+        device.swipe(lx, ly_end, lx, ly, duration=0.3)
+        moved = wait_for(device, 'list_scroll', changed_and_settled(list_fingerprint, list_fingerprint(xml)))
+        if moved is None:
+            break  # Top of the list
+        xml, offset, where = moved, max(0, offset - step), position(moved)
+
+    if where == 'anchor':
+        logger.info("Checkpoint anchor is on screen")
+    else:
+        logger.warning("Checkpoint anchor not found, walking on from here (clicked items are still skipped)")
+    return offset, xml
+
+
+def is_known(store, content_desc, identity=None):
+    """
+    Whether a list item's attendee is already stored, so it can be skipped
+    without opening it. Pass the item's identity key if it is at hand. In
+    refresh mode rows whose list summary no longer matches count as unknown.
+    """
+    with timer('db_lookup'):
+        if identity is None:
+            identity = list_identity(content_desc)
+        known = store.exists(identity)
+        if known and store.refresh_mode:
+            known = not list_summary_changed(store.stored_row(identity), content_desc)
+    return known
 
-    logger.warning("Not on attendees page! Attempting to navigate...")
-
-    # Check if we're on the menu/people page (attendees tab visible)
-    if device(text="attendees").exists:
-        logger.info("On menu page, clicking 'attendees' tab...")
-        device(text="attendees").click()
-        time.sleep(2.0)
-
-        # Verify we made it to attendees list
-        if device(className="androidx.recyclerview.widget.RecyclerView").exists:
-            logger.info("Successfully navigated to attendee list")
-            return True
-        else:
-            logger.warning("Clicked attendees but RecyclerView not found")
-            return False
-
-    # Check if we're on event home page (Menu button visible)
-    if device(text="Menu").exists:
-        logger.info("On event home page, clicking 'Menu' button...")
-        device(text="Menu").click()
-        time.sleep(2.0)
-
-        # Now click attendees tab
-        if device(text="attendees").exists:
-            logger.info("Menu opened, clicking 'attendees' tab...")
-            device(text="attendees").click()
-            time.sleep(2.0)
-
-            # Verify we made it to attendees list
-            if device(className="androidx.recyclerview.widget.RecyclerView").exists:
-                logger.info("Successfully navigated to attendee list")
-                return True
-            else:
-                logger.warning("Clicked attendees but RecyclerView not found")
-                return False
-        else:
-            logger.error("Menu opened but 'attendees' tab not found!")
-            return False
-
-    # If we can't find Menu or attendees, we're in an unknown state
-    logger.error("Unknown page state - cannot find Menu or attendees elements")
-    return False
-
-
-def run_scraper(device):
-    scraped_count = 0
-    clicked_buttons = set()  # Track content-desc of buttons we've clicked
+
+def open_attendee(device, item, pipeline):
+    """
+    Tap a list item, capture its detail page for the pipeline workers and
+    go back to the list. Returns the name on the page that opened.
+    """
+    device.click(*item['center'])  # By bounds center, the list does not move while we are away
+    with timer('page_load'):
+        detail_xml = wait_for(device, 'open_detail', is_detail_page)
+    if detail_xml is None:
+        raise RuntimeError("Detail page did not open")
+
+    # Capture the detail page; fields are extracted on the pipeline workers
+    detail_stats = {}
+    with timer('capture'):
+        dumps = capture_detail_page(device, detail_stats, xml=detail_xml)
+    incr('detail_dumps', detail_stats['dumps'])
+    incr('detail_swipes', detail_stats['swipes'])
+
+    # Go back while the workers process this attendee
+    pipeline.submit(dumps, detail_stats, item['content_desc'])
+    with timer('back'):
+        device.press("back")
+        back_xml = wait_for(device, 'back_to_list', is_list_page)
+    if back_xml is None:
+        logger.warning("List not visible after back")
+        recover_to_list(device)
+    return detail_name(detail_xml)
+
+
+def run_scraper(device, store=None, work_queue=None):
+    """
+    Walk the attendee list, open each new attendee and save it.
+    In parallel mode every worker passes the shared store (single
+    deduplicating DB writer) and work_queue (to claim list items).
+    """
+    device = instrument(record(device))
+    own_store = store is None
+    if own_store:
+        store = open_store()
+    archive = DumpArchive() if config.ARCHIVE_DUMPS else None
+    pipeline = DetailPipeline(store, config.PIPELINE_WORKERS, config.PIPELINE_QUEUE_SIZE, archive)
+    try:
+        _scrape(device, store, work_queue, pipeline)
+    finally:
+        pipeline.close()  # Process whatever was still captured
+        wait_controller.log_stats()
+        if own_store:
+            store.close()  # Flushes queued rows
+    return pipeline.saved
+
+
+def _limit_reached(store, pipeline):
+    if not config.MAX_ATTENDEES:
+        return False
+    if store.saved + pipeline.pending < config.MAX_ATTENDEES:
+        return False
+    # Captures in flight may turn out to be duplicates: settle them before deciding
+    pipeline.join()
+    return store.saved >= config.MAX_ATTENDEES
+
+
+def _scrape(device, store, work_queue, pipeline):
+    skipped_known = 0
+    retried_buttons = set()
+    seen_items = set()  # Identity key of every list item that was on screen
+    unhandled = {}  # Content-desc of seen items not clicked or skipped yet, for the coverage log
+    idle_swipes = 0  # Consecutive swipes that left the list unchanged
+    next_list_xml = None  # A list dump a wait already fetched
+    logger.info(f"Dedup index: {store.known_count} attendees already in DB")
+
+    # Only a single-device run owns the checkpoint; parallel workers share the clicked set
+    checkpoint = load_checkpoint(store.db_path) if config.RESUME_FROM_CHECKPOINT else None
+    clicked_buttons = set(checkpoint['clicked']) if checkpoint else set()  # Identity keys of buttons we've clicked
+    track_checkpoint = work_queue is None
+    scroll_px = 0  # Approximate list offset from the top
+    if checkpoint and track_checkpoint:
+        scroll_px, next_list_xml = fast_forward(device, checkpoint, store)
 
     while True:
         try:
-            if scraped_count > 0 and scraped_count % 10 == 0:
-                logger.info(f"[Progress] Saved: {scraped_count}")
+            saved_so_far = pipeline.saved
+            if saved_so_far > 0 and saved_so_far % 10 == 0:
+                logger.info(f"[Progress] Saved: {saved_so_far}")
 
-            if config.MAX_ATTENDEES and scraped_count >= config.MAX_ATTENDEES:
+            if _limit_reached(store, pipeline):
                 logger.info(f"Reached limit: {config.MAX_ATTENDEES}")
                 break
 
-            # Get RecyclerView
-            recyclerview = device(className="androidx.recyclerview.widget.RecyclerView")
-            if not recyclerview.exists:
-                logger.warning("RecyclerView not found, scrolling...")
-                # Check if we accidentally navigated to main page and recover
-                if check_and_recover_from_main_page(device):
+            # Read the whole list page with a single dump
+            xml = next_list_xml or device.dump_hierarchy()
+            next_list_xml = None
+            items = extract_list_items(xml)
+            if items is None:
+                logger.warning("Not on the attendee list, recovering...")
+                # Classify this same dump and navigate back (menu, event home, detail page)
+                next_list_xml = recover_to_list(device, xml)
+                if next_list_xml is not None:
                     continue  # Recovery successful, restart loop
-                device.swipe(500, 1500, 500, 700, duration=0.3)
-                time.sleep(1.0)
+                device.swipe(*config.LIST_SWIPE, duration=0.3)
+                next_list_xml = wait_for(device, 'list_scroll', is_list_page)
                 continue
 
-            # Get ALL buttons inside RecyclerView (NO FILTERING)
-            all_buttons = recyclerview.child(className="android.widget.Button")
-            if not all_buttons.exists or all_buttons.count == 0:
+            if not items:
                 logger.info("No buttons found, scrolling...")
-                device.swipe(500, 1500, 500, 700, duration=0.3)
-                time.sleep(1.0)
+                device.swipe(*config.LIST_SWIPE, duration=0.3)
+                next_list_xml = wait_for(device, 'list_scroll', is_list_page)
                 continue
 
-            logger.info(f">> Found {all_buttons.count} buttons")
+            logger.info(f">> Found {len(items)} buttons")
+            for item in items:
+                key = item['identity'] = list_identity(item['content_desc'])
+                seen_items.add(key)
+                if key not in clicked_buttons:
+                    unhandled.setdefault(key, item['content_desc'])
 
             # Click each button we haven't clicked yet
-            for i in range(all_buttons.count):
+            for item in items:
+                i = item['index']
+                content_desc = item['content_desc']
+                key = item['identity']
                 try:
-                    button = all_buttons[i]
-                    content_desc = button.info.get('contentDescription', '')
-
-                    # Skip if we've already clicked this exact button
-                    if content_desc in clicked_buttons:
+                    # Skip if we've already clicked this attendee
+                    if key in clicked_buttons:
                         continue
 
-                    # CLICK IT
-                    logger.info(f"CLICK button {i+1}/{all_buttons.count}")
-                    button.click()
-                    time.sleep(config.PAGE_LOAD_TIMEOUT)
-
-                    # Extract ALL data from detail page
-                    data = extract_from_detail_page(device)
-
-                    # Mark as clicked (so we never click again)
-                    clicked_buttons.add(content_desc)
-
-                    # Go back
-                    device.press("back")
-                    time.sleep(config.CLICK_TIMEOUT)
-
-                    # Check if we got valid data
-                    if not data['name']:
-                        logger.warning("No name found")
+                    # Already stored (e.g. from before a restart): skip without opening it
+                    list_name = parse_list_content_desc(content_desc)
+                    if is_known(store, content_desc, key):
+                        clicked_buttons.add(key)
+                        unhandled.pop(key, None)
+                        skipped_known += 1
+                        incr('skipped_known')
+                        logger.debug(f"SKIP: {list_name} (in DB, not clicked)")
                         continue
 
-                    # Check if already in DB
-                    if attendee_exists(data['name']):
-                        logger.info(f"SKIP: {data['name']} (in DB)")
+                    # Another worker already took this one
+                    if work_queue and not work_queue.claim(key):
                         continue
 
-                    # Save new attendee
-                    saved = save_attendee(
-                        data['name'],
-                        data['job_title'],
-                        data['company'],
-                        data['industry'],
-                        data['job_function'],
-                        data['operates_in']
-                    )
-
-                    if saved:
-                        scraped_count += 1
-                        fields = []
-                        if data['job_title']: fields.append(f"title={data['job_title']}")
-                        if data['company']: fields.append(f"company={data['company']}")
-                        if data['industry']: fields.append(f"industry={data['industry']}")
-                        if data['job_function']: fields.append(f"job={data['job_function']}")
-                        if data['operates_in']: fields.append(f"location={data['operates_in']}")
-                        logger.info(f"SAVED #{scraped_count}: {data['name']} | {', '.join(fields)}")
-
+                    # CLICK IT
+                    logger.info(f"CLICK button {i+1}/{len(items)}")
+                    opened_name = open_attendee(device, item, pipeline)
+
+                    # The list moved under us and the tap opened someone else:
+                    # keep the data, but re-read the list before the next click
+                    list_moved = bool(list_name and opened_name) and opened_name != list_name
+                    if list_moved:
+                        logger.warning(f"Opened {opened_name} but expected {list_name}, re-reading list")
+
+                    # Mark as clicked (so we never click again), allowing one
+                    # retry for an item a moved list made us miss
+                    if list_moved and key not in retried_buttons:
+                        retried_buttons.add(key)
+                        if work_queue:
+                            work_queue.release(key)
+                    else:
+                        clicked_buttons.add(key)
+                        unhandled.pop(key, None)
+                        if track_checkpoint:
+                            store.mark_clicked(key)  # Workers never clear the checkpoint, so never add to it
+                        if work_queue:
+                            work_queue.done(key)
+
+                    if list_moved:
+                        break
+
+                except DeviceLost:
+                    # Hand the claim back, or no other worker would ever open this attendee
+                    if work_queue and key not in clicked_buttons:
+                        work_queue.release(key)
+                    raise
                 except Exception as e:
                     logger.error(f"Error with button {i}: {e}")
-                    # Check if it's a stale button reference error
-                    if "UiObjectNotFoundException" in str(e):
-                        logger.warning("Stale button reference, restarting iteration...")
-                        break  # Break out of button loop, restart from top
-
-                    # Only press back if we're NOT on the list page (i.e., we're on a detail page)
-                    # This prevents accidentally exiting the app if we're on the home page
-                    if not device(className="androidx.recyclerview.widget.RecyclerView").exists:
-                        logger.info("Not on list page, pressing back to recover...")
-                        device.press("back")
-                        time.sleep(config.CLICK_TIMEOUT)
-                    else:
-                        logger.info("Already on list page, no need to press back")
+                    incr('errors')
+                    capture_error(device, f"button {i}", e)
+                    if work_queue and key not in clicked_buttons:
+                        work_queue.release(key)
+
+                    # Back press only from a detail page, a tap from menu/home, nothing if
+                    # already on the list: never back out of the app from the home page
+                    recover_to_list(device)
                     continue
 
             # Scroll to reveal more
-            logger.info(f"[SCROLL] Total unique buttons clicked: {len(clicked_buttons)}")
-            device.swipe(500, 1500, 500, 700, duration=0.3)
-            time.sleep(1.0)
+            logger.info(f"[SCROLL] Total unique buttons clicked: {len(clicked_buttons) - skipped_known} "
+                        f"| skipped (in DB): {skipped_known}")
+            if track_checkpoint:
+                store.save_checkpoint(items[-1]['content_desc'], scroll_px)
+            device.swipe(*config.LIST_SWIPE, duration=0.3)
+            before = list_fingerprint(xml)
+            next_list_xml = wait_for(device, 'list_scroll', changed_and_settled(list_fingerprint, before))
+            if next_list_xml is None:
+                # A timeout only means the list did not settle in time (a slow render): look once
+                # more before calling the swipe idle, and go on from there if the list did move
+                latest = device.dump_hierarchy()
+                if list_fingerprint(latest) != before:
+                    next_list_xml = latest
+            if next_list_xml is not None:
+                scroll_px += config.LIST_SWIPE[1] - config.LIST_SWIPE[3]
+                idle_swipes = 0
+                continue
+
+            # The swipe did not move the list: reuse the dump we have rather than
+            # reading the same screen again, and stop once the bottom is certain
+            idle_swipes += 1
+            incr('noop_swipes')
+            if idle_swipes >= config.END_OF_LIST_SWIPES:
+                logger.info(f"End of list: {idle_swipes} swipes left the list unchanged")
+                if track_checkpoint:
+                    store.clear_checkpoint()  # Finished: the next run starts from the top
+                break
+            next_list_xml = xml
 
+        except DeviceLost:
+            raise
         except Exception as e:
             logger.error(f"Error: {e}")
+            incr('errors')
+            capture_error(device, "scrape loop", e)
             # Do NOT press back here - let the recovery function handle navigation
             # Pressing back blindly could exit the app if we're on the home page
             time.sleep(config.CLICK_TIMEOUT)
 
-    return scraped_count
+    _log_coverage(seen_items, clicked_buttons, skipped_known, work_queue, unhandled)
+
+
+def _log_coverage(seen_items, clicked_buttons, skipped_known, work_queue, unhandled):
+    handled = seen_items & clicked_buttons
+    missed = seen_items - clicked_buttons
+    if work_queue:
+        missed -= work_queue.done_keys()  # Opened by another worker
+    opened = len(handled) - skipped_known
+    logger.info(f"[COVERAGE] list items seen: {len(seen_items)} | opened: {opened} "
+                f"| already in DB: {skipped_known} | missed: {len(missed)}")
+    for content_desc in sorted(unhandled[key] for key in missed)[:20]:
+        logger.info(f"[COVERAGE] missed: {parse_list_content_desc(content_desc) or content_desc!r}")
@@ -0,0 +1,191 @@
+"""
+Device session that survives agent and ADB drops
+
+DeviceSession stands in for the uiautomator2 device. When an RPC fails
+with a connection error it reconnects with exponential backoff. Dumps
+and other read-only calls are retried on the new connection; clicks,
+swipes and presses re-raise so the scrape loop's recovery checks where
+it ended up instead of tapping twice. A background probe keeps checking
+an idle link, and warm_up() starts the agent before the first real call.
+"""
+
+import logging
+import random
+import threading
+import time
+import config
+from metrics import incr, registry
+
+logger = logging.getLogger(__name__)
+
+# Exception class names (anywhere in the MRO) that mean the link is gone, not that the UI is wrong.
+# Matched by name so requests/adbutils/u2 internals don't have to be imported here
+_CONNECTION_ERROR_NAMES = {
+    'ConnectionError', 'ConnectError', 'GatewayError', 'RPCUnknownError', 'HTTPError',
+    'ReadTimeout', 'ConnectTimeout', 'Timeout', 'AdbError', 'DeviceError', 'RemoteDisconnected',
+}
+
+# Safe to repeat after a reconnect
+_RETRYABLE = {'dump_hierarchy', 'info', 'app_current', 'screenshot', 'window_size'}
+
+
+class DeviceLost(Exception):
+    """Reconnecting failed for longer than SESSION_GIVE_UP_AFTER."""
+
+
+def is_connection_error(exc):
+    if isinstance(exc, (ConnectionError, TimeoutError)):
+        return True
+    return any(cls.__name__ in _CONNECTION_ERROR_NAMES for cls in type(exc).__mro__)
+
+
+class DeviceSession:
+    def __init__(self, serial=None, connect=None):
+        if connect is None:
+            from device import connect_device as connect  # uiautomator2 only where a real device is used
+        self.serial = serial
+        self._connect = connect
+        self._device = None
+        self._lock = threading.RLock()  # Held while (re)connecting
+        self._last_ok = 0.0  # monotonic time of the last successful RPC
+        self._stop = threading.Event()
+        self._probe = threading.Thread(target=self._probe_loop, name=f"health-{serial or 'default'}",
+                                       daemon=True)
+        self.reconnects = 0
+        self.label = serial or 'default'
+
+    # -- lifecycle ----------------------------------------------------------
+
+    def start(self):
+        self._reconnect(initial=True)
+        if config.SESSION_WARM_UP:
+            self.warm_up()
+        if config.SESSION_HEALTH_INTERVAL:
+            self._probe.start()
+        return self
+
+    def close(self):
+        self._stop.set()
+        if self._probe.is_alive():
+            self._probe.join()
+
+    def warm_up(self):
+        """First calls start the on-device agent; pay that before the scrape loop's clock starts."""
+        for name, call in (('info', lambda: self._device.info), ('dump', self._device.dump_hierarchy)):
+            start = time.monotonic()
+            try:
+                call()
+            except Exception as e:
+                logger.warning(f"[{self.label}] Warm-up {name} failed: {e}")
+                return
+            logger.info(f"[{self.label}] Warm-up {name}: {time.monotonic() - start:.2f}s")
+        self._last_ok = time.monotonic()
+
+    # -- connection ---------------------------------------------------------
+
+    def _reconnect(self, failed_device=None, initial=False):
+        with self._lock:
+            # Another thread already replaced the connection that failed
+            if failed_device is not None and self._device is not failed_device:
+                return
+
+            started = time.monotonic()
+            delay = config.SESSION_BACKOFF_MIN
+            attempt = 0
+            while True:
+                attempt += 1
+                try:
+                    device = self._connect(self.serial)
+                    device.info  # The agent answers, not just ADB
+                    break
+                except Exception as e:
+                    if initial:
+                        raise
+                    down = time.monotonic() - started
+                    if config.SESSION_GIVE_UP_AFTER and down >= config.SESSION_GIVE_UP_AFTER:
+                        raise DeviceLost(f"[{self.label}] Device unreachable for {down:.0f}s: {e}")
+                    logger.warning(f"[{self.label}] Reconnect attempt {attempt} failed ({e}), "
+                                   f"retrying in {delay:.1f}s")
+                    time.sleep(delay * random.uniform(0.8, 1.2))
+                    delay = min(delay * 2, config.SESSION_BACKOFF_MAX)
+
+            self._device = device
+            self._last_ok = time.monotonic()
+            if not initial:
+                self.reconnects += 1
+                downtime = time.monotonic() - started
+                registry.observe('reconnect', downtime)
+                incr('reconnects')
+                logger.info(f"[{self.label}] Reconnected after {downtime:.1f}s ({attempt} attempts)")
+
+    def _call(self, name, func):
+        device = self._device
+        try:
+            result = func(device)
+        except Exception as e:
+            if not is_connection_error(e):
+                raise
+            incr('rpc_connection_errors')
+            logger.warning(f"[{self.label}] {name} lost the connection: {e}")
+            self._reconnect(failed_device=device)
+            if name not in _RETRYABLE:
+                raise
+            result = func(self._device)
+        self._last_ok = time.monotonic()
+        return result
+
+    # -- health probe -------------------------------------------------------
+
+    def _probe_loop(self):
+        interval = config.SESSION_HEALTH_INTERVAL
+        while not self._stop.wait(interval):
+            if time.monotonic() - self._last_ok < interval:
+                continue  # The scrape loop is talking to the device, that is proof enough
+            device = self._device
+            start = time.monotonic()
+            try:
+                device.info
+            except Exception as e:
+                incr('health_probe_failures')
+                logger.warning(f"[{self.label}] Health probe failed: {e}")
+                try:
+                    self._reconnect(failed_device=device)
+                except DeviceLost as lost:
+                    logger.error(str(lost))
+                continue
+            registry.observe('health_probe', time.monotonic() - start)
+            self._last_ok = time.monotonic()
+
+    # -- u2 API -------------------------------------------------------------
+
+    def dump_hierarchy(self, *args, **kwargs):
+        return self._call('dump_hierarchy', lambda d: d.dump_hierarchy(*args, **kwargs))
+
+    def click(self, *args, **kwargs):
+        return self._call('click', lambda d: d.click(*args, **kwargs))
+
+    def swipe(self, *args, **kwargs):
+        return self._call('swipe', lambda d: d.swipe(*args, **kwargs))
+
+    def press(self, *args, **kwargs):
+        return self._call('press', lambda d: d.press(*args, **kwargs))
+
+    def screenshot(self, *args, **kwargs):
+        return self._call('screenshot', lambda d: d.screenshot(*args, **kwargs))
+
+    def app_current(self):
+        return self._call('app_current', lambda d: d.app_current())
+
+    @property
+    def info(self):
+        return self._call('info', lambda d: d.info)
+
+    def __call__(self, **selector):
+        return self._device(**selector)
+
+    def __getattr__(self, name):
+        return getattr(self._device, name)
+
+
+def open_session(serial=None):
+    return DeviceSession(serial).start()
@@ -0,0 +1,85 @@
+"""
+Attendee statistics
+
+Progress counters and top-N breakdowns (industry, job function, company,
+country) read from the aggregate tables the database triggers keep up to
+date, so polling them during a scrape never scans the attendees table.
+
+Usage:
+    python stats.py                       # progress and the top values of every breakdown
+    python stats.py --by company --top 25
+    python stats.py --watch 5             # reprint the progress line every 5s
+    python stats.py check                 # compare the aggregates with a full recount
+    python stats.py rebuild               # recount them from the attendees
+"""
+
+import argparse
+import logging
+import sys
+import time
+
+import config
+from database import STAT_DIMENSIONS, check_stats, get_breakdowns, get_progress, get_top, rebuild_stats
+
+logger = logging.getLogger(__name__)
+
+
+def format_progress(progress):
+    total = progress['attendees']
+    share = lambda n: f"{n} ({n / total:.0%})" if total else str(n)
+    return (f"{total} attendees | industry {share(progress['with_industry'])} | "
+            f"job function {share(progress['with_job_function'])} | company {share(progress['with_company'])} | "
+            f"countries {share(progress['with_countries'])} | last scraped {progress['last_scraped_at'] or '-'}")
+
+
+def _print_breakdown(dimension, rows):
+    print(f"\n{dimension}")
+    width = max((len(value) for value, _ in rows), default=0)
+    for value, count in rows:
+        print(f"  {value:<{width}}  {count:>7}")
+
+
+def _watch(db_path, interval):
+    try:
+        while True:
+            logger.info(format_progress(get_progress(db_path=db_path)))
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Attendee breakdowns and progress from the aggregate tables")
+    parser.add_argument('action', nargs='?', choices=('show', 'check', 'rebuild'), default='show')
+    parser.add_argument('--by', choices=STAT_DIMENSIONS, help="Only this breakdown")
+    parser.add_argument('--top', type=int, default=config.STATS_TOP_N, help="Values per breakdown")
+    parser.add_argument('--watch', type=float, metavar='SECONDS', help="Keep printing the progress line")
+    parser.add_argument('--db', default=config.DB_PATH)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+
+    if args.action == 'check':
+        diffs = check_stats(args.db)
+        for dimension, value, stored, actual in diffs:
+            logger.warning(f"{dimension} '{value}': stored {stored}, actual {actual}")
+        if diffs:
+            logger.error(f"{len(diffs)} aggregates out of date, run: python stats.py rebuild")
+            sys.exit(1)
+        logger.info("Aggregates match the attendees")
+    elif args.action == 'rebuild':
+        start = time.perf_counter()
+        rebuild_stats(args.db)
+        logger.info(f"Aggregates rebuilt in {time.perf_counter() - start:.1f}s")
+    elif args.watch:
+        _watch(args.db, args.watch)
+    else:
+        print(format_progress(get_progress(db_path=args.db)))
+        if args.by:
+            _print_breakdown(args.by, get_top(args.by, args.top, db_path=args.db))
+        else:
+            for dimension, rows in get_breakdowns(args.top, db_path=args.db).items():
+                _print_breakdown(dimension, rows)
+
+
+if __name__ == "__main__":
+    main()
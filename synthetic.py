@@ -0,0 +1,350 @@
+"""
+Synthetic events
+
+Generates Brella-style events of any size for scale tests: attendees
+whose names collide the way real ones do (a few very common first and
+last names, then a long tail of rare ones), database rows for them, and
+the list and detail page dumps the scraper would read. Detail dumps are
+built on the node tree of the recorded hierarchy.xml (header artwork,
+tabs, country chips, sticky footer), so parsing one costs what parsing
+a real page costs.
+
+Usage:
+    python synthetic.py sample/ --attendees 5000 --dumps 50
+"""
+
+import argparse
+import copy
+import json
+import logging
+import os
+import random
+import xml.etree.ElementTree as ET
+from bisect import bisect
+from collections import Counter
+from datetime import datetime, timedelta
+from itertools import accumulate
+from xml.sax.saxutils import escape
+
+import config
+import replay
+from hierarchy import parse_bounds
+
+logger = logging.getLogger(__name__)
+
+SYLLABLES = ['an', 'bel', 'cor', 'da', 'el', 'fen', 'gar', 'hal', 'is', 'jor', 'ka', 'lin', 'mar',
+             'nor', 'os', 'per', 'quin', 'ros', 'sten', 'tor', 'ul', 'ven', 'wil', 'yan', 'zel']
+COMPANY_SUFFIXES = ['Labs', 'Capital', 'Ventures', 'AI', 'Health', 'Energy', 'Media', 'Systems',
+                    'Partners', 'Group', 'Robotics', 'Pay']
+MORE_ROLES = ['Co-Founder', 'COO', 'CFO', 'VP Engineering', 'VP Sales', 'Managing Director',
+              'Business Development Manager', 'Data Scientist', 'Angel Investor', 'Consultant',
+              'Student', 'Marketing Lead', 'Head of Partnerships', 'Principal']
+
+# Name and company pools: (size, Zipf exponent). Bigger exponents mean more collisions
+FIRST_NAME_POOL = (2000, 0.7)
+LAST_NAME_POOL = (15000, 0.6)
+COMPANY_POOL = (5000, 1.0)
+MIDDLE_NAME_SHARE = 0.15
+
+
+class _Zipf:
+    """Pick from values (most popular first) with weight 1 / rank ** exponent."""
+
+    def __init__(self, values, exponent):
+        self.values = values
+        self._cumulative = list(accumulate(1 / rank ** exponent for rank in range(1, len(values) + 1)))
+        self._total = self._cumulative[-1]
+
+    def pick(self, rng):
+        return self.values[bisect(self._cumulative, rng.random() * self._total)]
+
+
+def _invented(rng, syllables, count, make):
+    # Distinct made-up words from the syllables, in a random popularity order
+    seen = set()
+    words = []
+    while len(words) < count:
+        word = make(''.join(rng.choice(SYLLABLES) for _ in range(rng.choice(syllables))).capitalize())
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+    return words
+
+
+def _pool(head, size, tail):
+    """head (the common values, most popular first), then tail values up to size."""
+    values = list(dict.fromkeys(head))
+    values += [value for value in tail if value not in values][:max(0, size - len(values))]
+    return values
+
+
+class EventGenerator:
+    """Attendees for one synthetic event. The same seed always gives the same event."""
+
+    def __init__(self, seed=0):
+        self.seed = seed
+        rng = random.Random(f"pools-{seed}")
+        size, exponent = FIRST_NAME_POOL
+        self.first = _Zipf(_pool(replay.FIRST_NAMES, size, _invented(rng, (2, 2, 3), size, str)), exponent)
+        size, exponent = LAST_NAME_POOL
+        self.last = _Zipf(_pool(replay.LAST_NAMES, size, _invented(rng, (2, 3, 3), size, str)), exponent)
+        size, exponent = COMPANY_POOL
+        companies = _invented(rng, (1, 2), size, lambda word: f"{word} {rng.choice(COMPANY_SUFFIXES)}")
+        self.company = _Zipf(_pool(replay.COMPANIES, size, companies), exponent)
+        self.middle = [name for name in replay.MIDDLE_NAMES if name]
+
+    def attendees(self, count):
+        """Yield count attendee dicts (the replay.synthetic_attendees shape), one at a time."""
+        rng = random.Random(self.seed)
+        roles = replay.ROLES + MORE_ROLES
+        for _ in range(count):
+            parts = [self.first.pick(rng), self.last.pick(rng)]
+            if rng.random() < MIDDLE_NAME_SHARE:
+                parts.insert(1, rng.choice(self.middle))
+            yield {
+                'ticket': rng.choice(replay.TICKETS),
+                'name': ' '.join(parts),
+                'job_title': rng.choice(roles),
+                'company': self.company.pick(rng),
+                'intro_lines': rng.choice([0, 1, 2, 2, 3, 6, 10]),
+                'operates_in': rng.sample(replay.COUNTRIES, rng.choice([0, 1, 2, 2, 3, 5])),
+                'industry': rng.choice(replay.INDUSTRIES + [None]),
+                'job_function': rng.choice(replay.JOB_FUNCTIONS + [None]),
+            }
+
+
+def generate_attendees(count, seed=0):
+    return EventGenerator(seed).attendees(count)
+
+
+def attendee_row(attendee, scraped_at):
+    """The attendee as INSERT_ATTENDEE_SQL parameters, less the identity key (see database.with_identity)."""
+    return (attendee['name'], attendee['job_title'], attendee['company'], attendee['industry'],
+            attendee['job_function'], ', '.join(attendee['operates_in']) or None, scraped_at)
+
+
+def attendee_rows(count, seed=0, start=datetime(2025, 1, 1)):
+    """Yield count database rows, scraped 3 seconds apart."""
+    for i, attendee in enumerate(generate_attendees(count, seed)):
+        yield attendee_row(attendee, start + timedelta(seconds=i * 3))
+
+
+def collision_stats(names):
+    """How names collide: {'attendees', 'distinct', 'sharing' (attendees with a namesake), 'largest'}."""
+    counts = Counter(names)
+    return {
+        'attendees': sum(counts.values()),
+        'distinct': len(counts),
+        'sharing': sum(n for n in counts.values() if n > 1),
+        'largest': max(counts.values(), default=0),
+    }
+
+
+# -- dumps ------------------------------------------------------------------
+
+def list_dumps(attendees):
+    """Yield the list page dumps a full scroll through attendees shows, one screen at a time."""
+    step = replay.SCREEN_HEIGHT - replay.TOOLBAR_BOTTOM - replay.LIST_ITEM_HEIGHT
+    end = max(0, len(attendees) * replay.LIST_ITEM_HEIGHT - step)
+    for scroll_px in range(0, end + 1, step):
+        yield replay.render_list_page(attendees, scroll_px)
+
+
+_CONTENT_MARK = '@@content@@'
+_TITLE_MARK = '@@title@@'
+_template = None
+
+
+def _load_template():
+    """
+    hierarchy.xml split around the children of its page content, plus the
+    recorded node of each kind the page is built from (and its text width
+    per character). None when the recording is missing or not a detail page.
+    """
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'hierarchy.xml')
+    try:
+        root = ET.parse(path).getroot()
+    except (OSError, ET.ParseError):
+        return None
+    parents = {child: parent for parent in root.iter() for child in parent}
+    nodes = list(root.iter('node'))
+    by_text = {node.get('text'): node for node in nodes if node.get('text')}
+    labels = (config.FIELD_LABEL_OPERATES_IN, config.FIELD_LABEL_INDUSTRY, config.FIELD_LABEL_JOB_FUNCTION)
+    if not all(label in by_text for label in labels):
+        return None
+
+    content = parents[by_text[config.FIELD_LABEL_OPERATES_IN]]
+    children = list(content)
+    label = children.index(by_text[config.FIELD_LABEL_OPERATES_IN])
+    header = children[0]
+    header_texts = [node for node in header if node.get('class') == 'android.widget.TextView']
+    parts = {
+        'header': header, 'tabs': children[1:label - 1], 'intro': children[label - 1],
+        'label': children[label], 'chip': children[label + 1], 'flag': children[label + 2],
+        'country': children[label + 3],
+        'value': children[children.index(by_text[config.FIELD_LABEL_INDUSTRY]) + 1],
+    }
+    if len(header_texts) != 4:
+        return None
+
+    width = lambda node: (_bounds(node)[2] - _bounds(node)[0]) / max(1, len(node.get('text')))
+    char_px = {'header': [width(node) for node in header_texts], 'label': width(parts['label']),
+               'country': width(parts['country'])}
+
+    for child in children:
+        content.remove(child)
+    ET.SubElement(content, 'node', text=_CONTENT_MARK)
+    title = next(node for node in nodes if node.get('class') == 'android.view.View' and node.get('text'))
+    title.set('text', _TITLE_MARK)
+    xml = ET.tostring(root, encoding='unicode')
+    mark = xml.index(_CONTENT_MARK)
+    prefix, suffix = xml[:xml.rindex('<', 0, mark)], xml[xml.index('>', mark) + 1:]
+    prefix = "<?xml version='1.0' encoding='UTF-8' standalone='yes' ?>" + prefix
+    return {'prefix': prefix, 'suffix': suffix, 'parts': parts, 'char_px': char_px,
+            'viewport': _bounds(content)}
+
+
+def _bounds(node):
+    return parse_bounds(node.get('bounds'))
+
+
+def _place(prototype, bounds, text=None):
+    node = copy.deepcopy(prototype)
+    old = _bounds(prototype)
+    dx, dy = bounds[0] - old[0], bounds[1] - old[1]
+    for child in node.iter('node'):
+        left, top, right, bottom = _bounds(child)
+        child.set('bounds', replay._bounds(left + dx, top + dy, right + dx, bottom + dy))
+    node.set('bounds', replay._bounds(*bounds))
+    if text is not None:
+        node.set('text', text)
+    return node
+
+
+def _centered(text, top, height, char_px):
+    half = min(496, int(len(text) * char_px) // 2)
+    return (540 - half, top, 540 + half, top + height)
+
+
+def detail_page_nodes(attendee):
+    """
+    Lay the attendee's detail page out on the recorded page's nodes, in page
+    coordinates. Returns (nodes, page bottom), or None without a template.
+    """
+    global _template
+    if _template is None:
+        _template = _load_template() or {}
+    if not _template:
+        return None
+    parts, char_px = _template['parts'], _template['char_px']
+
+    header = copy.deepcopy(parts['header'])
+    texts = (attendee.get('ticket', ''), attendee['name'], attendee.get('job_title') or '',
+             attendee.get('company') or '')
+    for node, text, px in zip([n for n in header if n.get('class') == 'android.widget.TextView'],
+                              texts, char_px['header']):
+        if text:
+            _, top, _, bottom = _bounds(node)
+            node.set('text', text)
+            node.set('bounds', replay._bounds(*_centered(text, top, bottom - top, px)))
+        else:
+            header.remove(node)
+    nodes = [header] + [copy.deepcopy(tab) for tab in parts['tabs']]
+    _label = lambda text, y: _place(parts['label'], (44, y, 44 + int(len(text) * char_px['label']), y + 51), text)
+
+    y = _bounds(parts['intro'])[1]
+    if attendee.get('intro_lines'):
+        bottom = y + 54 * attendee['intro_lines']
+        nodes.append(_place(parts['intro'], (44, y, 1036, bottom),
+                            'Happy to connect with founders and investors at the event.'))
+        y = bottom + 56
+    if attendee.get('operates_in'):
+        nodes.append(_label(config.FIELD_LABEL_OPERATES_IN, y))
+        x, y = 44, y + 73
+        for country in attendee['operates_in']:
+            width = int(len(country) * char_px['country'])
+            if x + width + 110 > 1036:
+                x, y = 44, y + 95
+            nodes.append(_place(parts['chip'], (x, y, x + width + 110, y + 73)))
+            nodes.append(_place(parts['flag'], (x + 22, y + 22, x + 66, y + 51)))
+            nodes.append(_place(parts['country'], (x + 88, y + 13, x + 88 + width, y + 59), country))
+            x += width + 132
+        y += 128
+    for label, key in ((config.FIELD_LABEL_INDUSTRY, 'industry'),
+                       (config.FIELD_LABEL_JOB_FUNCTION, 'job_function')):
+        if attendee.get(key):
+            nodes.append(_label(label, y))
+            nodes.append(_place(parts['value'], (44, y + 56, 1036, y + 107), attendee[key]))
+            y += 163
+    return nodes, y
+
+
+def _clip(node, scroll_px, top, bottom):
+    # The node as the dump shows it scrolled by scroll_px, or None once it is out of the viewport
+    left, node_top, right, node_bottom = _bounds(node)
+    node_top, node_bottom = node_top - scroll_px, node_bottom - scroll_px
+    if node_bottom <= top or node_top >= bottom:
+        return None
+    clipped = copy.copy(node)
+    clipped[:] = [child for child in (_clip(child, scroll_px, top, bottom) for child in node) if child is not None]
+    clipped.set('bounds', replay._bounds(left, max(node_top, top), right, min(node_bottom, bottom)))
+    return clipped
+
+
+def render_detail_dump(attendee, scroll_px=0, layout=None):
+    """The attendee's detail page dump scrolled by scroll_px (hierarchy.xml structure when available)."""
+    layout = layout or detail_page_nodes(attendee)
+    if layout is None:
+        return replay.render_detail_page(attendee, scroll_px)
+    nodes, _ = layout
+    _, top, _, bottom = _template['viewport']
+    visible = [clipped for clipped in (_clip(node, scroll_px, top, bottom) for node in nodes) if clipped is not None]
+    content = ''.join(ET.tostring(node, encoding='unicode') for node in visible)
+    return (_template['prefix'].replace(_TITLE_MARK, escape(attendee['name'], {'"': '&quot;'}))
+            + content + _template['suffix'])
+
+
+def detail_dumps(attendee, step=None):
+    """Every dump of a top-to-bottom read of the detail page, scrolling step px at a time."""
+    layout = detail_page_nodes(attendee)
+    if layout is None:
+        limit = replay._detail_max_scroll(attendee)
+    else:
+        limit = max(0, layout[1] - _template['viewport'][3] + 40)
+    step = step or config.DETAIL_SWIPE_MAX
+    scrolls = list(range(0, limit, step)) + [limit]
+    return [render_detail_dump(attendee, scroll_px, layout) for scroll_px in scrolls]
+
+
+def write_sample(out_dir, attendees, dumps, seed=0):
+    """Write attendees.jsonl, list page dumps and detail page dumps for the first `dumps` attendees."""
+    os.makedirs(out_dir, exist_ok=True)
+    people = list(generate_attendees(attendees, seed))
+    with open(os.path.join(out_dir, 'attendees.jsonl'), 'w', encoding='utf-8') as f:
+        f.writelines(json.dumps(attendee, ensure_ascii=False) + '\n' for attendee in people)
+    for n, xml in enumerate(list_dumps(people[:dumps])):
+        with open(os.path.join(out_dir, f"list_{n:04d}.xml"), 'w', encoding='utf-8') as f:
+            f.write(xml)
+    for n, attendee in enumerate(people[:dumps]):
+        for k, xml in enumerate(detail_dumps(attendee)):
+            with open(os.path.join(out_dir, f"detail_{n:04d}_{k}.xml"), 'w', encoding='utf-8') as f:
+                f.write(xml)
+    return collision_stats(attendee['name'] for attendee in people)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic Brella-style event")
+    parser.add_argument('output', help="Output directory")
+    parser.add_argument('--attendees', type=int, default=5000)
+    parser.add_argument('--dumps', type=int, default=50, help="Attendees to render list and detail dumps for")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+
+    stats = write_sample(args.output, args.attendees, args.dumps, args.seed)
+    logger.info(f"Wrote {stats['attendees']} attendees to {args.output}: {stats['distinct']} distinct names, "
+                f"{stats['sharing']} share theirs with someone (largest group {stats['largest']})")
+
+
+if __name__ == "__main__":
+    main()
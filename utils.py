@@ -1,17 +1,28 @@
+import atexit
 import logging
+import logging.handlers
+import math
 import os
+import queue
+import threading
+from collections import deque
 from datetime import datetime
 
 
 def setup_logging():
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler('scraper.log'),
-            logging.StreamHandler()
-        ]
-    )
+    # File and console writes happen on a listener thread; the scrape loop
+    # only pays for putting the record on a queue
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+    handlers = [logging.FileHandler('scraper.log'), logging.StreamHandler()]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.Queue(-1)
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)  # Drains whatever is still queued
+
+    logging.basicConfig(level=logging.INFO, handlers=[logging.handlers.QueueHandler(log_queue)])
     return logging.getLogger(__name__)
 
 
@@ -26,3 +37,30 @@ def take_screenshot(device, prefix="error"):
 
 def format_timestamp():
     return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+class LatencyWindow:
+    """Rolling window of latency samples (seconds) with percentile queries."""
+
+    def __init__(self, size=200):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self.count = 0  # Samples ever added, not just the ones still in the window
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+
+    def percentile(self, pct):
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        # Nearest-rank percentile
+        rank = max(1, math.ceil(pct / 100 * len(samples)))
+        return samples[rank - 1]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._samples)
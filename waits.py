@@ -0,0 +1,134 @@
+import logging
+import threading
+import time
+import config
+from utils import LatencyWindow
+
+logger = logging.getLogger(__name__)
+
+
+class WaitController:
+    """
+    Waits for a screen condition by polling hierarchy dumps instead of
+    sleeping a fixed time. Each named transition (open_detail,
+    back_to_list, list_scroll, ...) keeps a rolling latency window; the
+    give-up budget and the delay before the first poll follow the
+    observed percentiles. A timeout counts as a sample at the time spent,
+    and each consecutive timeout widens the budget further, so the budget
+    keeps up when the app slows down.
+    """
+
+    def __init__(self):
+        self._windows = {}
+        self._timeouts = {}
+        self._streaks = {}  # Consecutive timeouts per transition
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self._windows.clear()
+            self._timeouts.clear()
+            self._streaks.clear()
+
+    def _window(self, transition):
+        with self._lock:
+            if transition not in self._windows:
+                self._windows[transition] = LatencyWindow(config.WAIT_HISTORY)
+                self._timeouts[transition] = 0
+                self._streaks[transition] = 0
+            return self._windows[transition]
+
+    def budget(self, transition):
+        window = self._window(transition)
+        if window.count < config.WAIT_MIN_SAMPLES:
+            return config.WAIT_MAX_BUDGET
+        with self._lock:
+            widen = config.WAIT_TIMEOUT_GROWTH ** self._streaks[transition]
+        observed = window.percentile(config.WAIT_PERCENTILE) * config.WAIT_HEADROOM * widen
+        return max(config.WAIT_MIN_BUDGET, min(config.WAIT_MAX_BUDGET, observed))
+
+    def first_poll_delay(self, transition):
+        window = self._window(transition)
+        if window.count < config.WAIT_MIN_SAMPLES:
+            return 0.0
+        return window.percentile(config.WAIT_FIRST_POLL_PERCENTILE) / 2
+
+    def wait_for(self, device, transition, condition):
+        """
+        Poll until condition(xml) is true. Returns the matching dump so the
+        caller can reuse it, or None if the budget ran out.
+        """
+        window = self._window(transition)
+        start = time.monotonic()
+        deadline = start + self.budget(transition)
+
+        time.sleep(self.first_poll_delay(transition))
+        while True:
+            xml = device.dump_hierarchy()
+            if condition(xml):
+                window.add(time.monotonic() - start)
+                with self._lock:
+                    self._streaks[transition] = 0
+                return xml
+            if time.monotonic() >= deadline:
+                # The real latency was at least the time spent: a lower bound still pulls the budget up
+                window.add(time.monotonic() - start)
+                with self._lock:
+                    self._timeouts[transition] += 1
+                    self._streaks[transition] += 1
+                logger.debug(f"Wait '{transition}' gave up after {time.monotonic() - start:.2f}s")
+                return None
+            time.sleep(config.WAIT_POLL_INTERVAL)
+
+    def stats(self):
+        with self._lock:
+            transitions = list(self._windows.items())
+            timeouts = dict(self._timeouts)
+        result = {}
+        for transition, window in transitions:
+            result[transition] = {
+                'count': window.count,
+                'timeouts': timeouts[transition],
+                'p50': window.percentile(50),
+                'p90': window.percentile(90),
+                'p99': window.percentile(99),
+                'budget': self.budget(transition),
+            }
+        return result
+
+    def log_stats(self):
+        for transition, s in sorted(self.stats().items()):
+            if s['p50'] is None:
+                logger.info(f"[WAIT] {transition}: timeouts={s['timeouts']}")
+                continue
+            logger.info(f"[WAIT] {transition}: n={s['count']} timeouts={s['timeouts']} "
+                        f"p50={s['p50']:.2f}s p90={s['p90']:.2f}s p99={s['p99']:.2f}s "
+                        f"budget={s['budget']:.2f}s")
+
+
+def changed_and_settled(fingerprint, before):
+    """
+    Condition for scrolls: the screen differs from `before` and two
+    consecutive polls agree, so a fling has stopped moving.
+    """
+    last = []
+
+    def condition(xml):
+        current = fingerprint(xml)
+        settled = current != before and last and last[-1] == current
+        last.append(current)
+        return bool(settled)
+
+    return condition
+
+
+# Shared by every device worker; they all drive the same app
+controller = WaitController()
+
+
+def wait_for(device, transition, condition):
+    return controller.wait_for(device, transition, condition)
+
+
+def stats():
+    return controller.stats()
@@ -0,0 +1,173 @@
+"""
+Watchlist mode
+
+Scrapes only the attendees on a watchlist instead of walking the whole
+list. Each target (a name or company, one per line in WATCHLIST_FILE) is
+typed into the list's search field, and only the results that match it
+are opened, through the same pipeline and store dedup as a full run. The
+cost follows the length of the watchlist, not the size of the event.
+"""
+
+import json
+import logging
+import time
+import config
+import hierarchy
+from archive import DumpArchive
+from capture import capture_error, record
+from database import open_store
+from extractor import extract_list_items, list_fingerprint, parse_list_summary
+from metrics import incr, instrument, timer
+from pages import recover_to_list
+from pipeline import DetailPipeline
+from scraper import is_known, open_attendee
+from session import DeviceLost
+from waits import changed_and_settled, controller as wait_controller, wait_for
+
+logger = logging.getLogger(__name__)
+
+
+def load_watchlist(path):
+    """Targets from a text file: one per line, blank lines and # comments ignored, duplicates dropped."""
+    targets = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            target = line.split('#', 1)[0].strip()
+            if target:
+                targets.setdefault(target.casefold(), target)
+    return list(targets.values())
+
+
+def matches_target(target, content_desc):
+    """Whether a list item's name or company contains the target (case-insensitive)."""
+    summary = parse_list_summary(content_desc)
+    if summary is None:
+        return False
+    target = target.casefold()
+    return target in summary['name'].casefold() or target in (summary['company'] or '').casefold()
+
+
+def _results_shown(target, before):
+    # The filtered list is up once it changed, or every item on it matches the target
+    # (a repeated search can leave the same results on screen); either way, settled
+    changed = changed_and_settled(list_fingerprint, before)
+    last = []
+
+    def condition(xml):
+        if changed(xml):
+            return True
+        current = list_fingerprint(xml)
+        settled = (extract_list_items(xml) is not None and bool(last) and last[-1] == current
+                   and all(matches_target(target, desc) for desc in current))
+        last.append(current)
+        return settled
+
+    return condition
+
+
+def search(device, query, xml):
+    """Type query into the list's search field. Returns the dump of the results."""
+    device(**config.SEARCH_FIELD_SELECTOR).set_text(query)
+    return (wait_for(device, 'search_results', _results_shown(query, list_fingerprint(xml)))
+            or device.dump_hierarchy())
+
+
+def _fills_list(xml, items):
+    # The last result reaches the bottom of the list, so scrolling may reveal more
+    container = config.LIST_CONTAINER_SELECTOR['className']
+    bottom = max(node.bounds[3] for node in hierarchy.parse(xml) if node.cls == container)
+    return items[-1]['bounds'][3] >= bottom
+
+
+def run_watchlist(device, targets, store=None):
+    """
+    Search for each target and open its matching attendees. Returns one
+    result per target: {'target', 'matches', 'opened', 'known', 'seconds'}.
+    """
+    device = instrument(record(device))
+    own_store = store is None
+    if own_store:
+        store = open_store()
+    archive = DumpArchive() if config.ARCHIVE_DUMPS else None
+    pipeline = DetailPipeline(store, config.PIPELINE_WORKERS, config.PIPELINE_QUEUE_SIZE, archive)
+    results = []
+    try:
+        for n, target in enumerate(targets, 1):
+            logger.info(f"[WATCHLIST] {n}/{len(targets)}: '{target}'")
+            results.append(_lookup(device, store, pipeline, target))
+        xml = recover_to_list(device)
+        if xml is not None:
+            search(device, '', xml)  # Leave the full list for the next run
+    finally:
+        pipeline.close()
+        wait_controller.log_stats()
+        if own_store:
+            store.close()
+
+    _log_report(results, pipeline.saved)
+    if config.WATCHLIST_REPORT:
+        with open(config.WATCHLIST_REPORT, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+def _lookup(device, store, pipeline, target):
+    """Search for one target and open its new matches."""
+    result = {'target': target, 'matches': [], 'opened': 0, 'known': 0, 'seconds': 0.0}
+    start = time.monotonic()
+    handled = set()
+    try:
+        xml = recover_to_list(device)
+        if xml is None:
+            raise RuntimeError("Attendee list not reachable")
+        with timer('search'):
+            xml = search(device, target, xml)
+
+        while True:
+            items = extract_list_items(xml)
+            if not items:
+                break
+            new_items = [item for item in items if item['content_desc'] not in handled]
+            for item in new_items:
+                content_desc = item['content_desc']
+                handled.add(content_desc)
+                if not matches_target(target, content_desc):
+                    continue  # The app's search is looser than the watchlist match
+                result['matches'].append(parse_list_summary(content_desc)['name'])
+                if is_known(store, content_desc):
+                    result['known'] += 1
+                    incr('skipped_known')
+                elif result['opened'] < config.WATCHLIST_MAX_OPENS:
+                    open_attendee(device, item, pipeline)
+                    result['opened'] += 1
+
+            if not new_items or not _fills_list(xml, items):
+                break
+            device.swipe(*config.LIST_SWIPE, duration=0.3)
+            xml = wait_for(device, 'list_scroll', changed_and_settled(list_fingerprint, list_fingerprint(xml)))
+            if xml is None:
+                break  # End of the results
+    except DeviceLost:
+        raise
+    except Exception as e:
+        logger.error(f"Watchlist target '{target}' failed: {e}")
+        incr('errors')
+        capture_error(device, f"watchlist '{target}'", e)
+        result['error'] = str(e)
+
+    result['seconds'] = round(time.monotonic() - start, 2)
+    incr('watchlist_found' if result['matches'] else 'watchlist_missing')
+    return result
+
+
+def _log_report(results, saved):
+    found = [r for r in results if r['matches']]
+    for r in results:
+        if r['matches']:
+            logger.info(f"[WATCHLIST] FOUND '{r['target']}': {len(r['matches'])} matches, "
+                        f"{r['opened']} opened, {r['known']} already in DB ({r['seconds']:.1f}s)")
+        else:
+            logger.info(f"[WATCHLIST] NOT FOUND '{r['target']}' ({r['seconds']:.1f}s)")
+    total = sum(r['seconds'] for r in results)
+    logger.info(f"[WATCHLIST] {len(found)}/{len(results)} targets found | {saved} new | "
+                f"{total:.0f}s total, {total / max(len(results), 1):.1f}s per target")